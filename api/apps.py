@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def check_compression_settings():
+    """Fail at startup, not inside a request, on an unknown per-channel compression mode or profile."""
+    from .compression import COMPRESSION_MODES, COMPRESSION_PROFILES
+    for name in ('PDF_COMPRESSION_DOWNLOAD', 'PDF_COMPRESSION_EMAIL'):
+        value = getattr(settings, name, None)
+        if value not in COMPRESSION_MODES:
+            raise ImproperlyConfigured(f"{name}={value!r} is not a compression mode (expected one of: {', '.join(COMPRESSION_MODES)})")
+    for name in ('PDF_DOWNLOAD_PROFILE', 'PDF_EMAIL_PROFILE'):
+        value = getattr(settings, name, None)
+        if value not in COMPRESSION_PROFILES:
+            raise ImproperlyConfigured(f"{name}={value!r} is not a compression profile (expected one of: {', '.join(COMPRESSION_PROFILES)})")
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        check_compression_settings()
@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+import boto3
+from django.conf import settings
+from .cache_paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+# Task ids come from URLs; anything else never reaches the filesystem or a bucket key
+TASK_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+# Local stores sweep expired artifacts at most this often per process
+EVICT_INTERVAL_SECONDS = 60.0
+
+def _artifact_meta(task_id, sha256, size, created_at):
+    return {'task_id': task_id, 'sha256': sha256, 'size': size, 'created_at': created_at}
+
+class ArtifactStore(ABC):
+    """
+    Where finished (compressed) reports are kept for download, keyed by task id and
+    SHA-256 of the content. Artifacts older than ttl seconds expire (0 keeps them).
+
+    get() returns metadata: task_id, sha256, size and created_at. A store either opens
+    the file for the server to stream (open) or hands out a URL the client can fetch
+    directly (url); url() returns None when the server should stream it itself.
+    """
+    def __init__(self, ttl=0):
+        self.ttl = ttl
+
+    def _expired(self, meta):
+        return bool(self.ttl) and meta['created_at'] < time.time() - self.ttl
+
+    @abstractmethod
+    def put(self, task_id, pdf_buffer):
+        """Store the contents of a BytesIO for task_id and return its metadata. Raises ValueError if it is empty."""
+
+    @abstractmethod
+    def get(self, task_id):
+        """Metadata of the task's artifact, or None if there is none (or it expired)."""
+
+    @abstractmethod
+    def open(self, meta):
+        """Binary file object of an artifact. Raises FileNotFoundError if it is gone."""
+
+    def url(self, meta):
+        return None
+
+    @abstractmethod
+    def delete(self, task_id):
+        pass
+
+    @abstractmethod
+    def remove_older_than(self, cutoff):
+        """Delete every artifact created before cutoff. Returns the number removed."""
+
+    @abstractmethod
+    def stats(self):
+        pass
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Artifacts on the local filesystem, shared by every worker on the host. Contents are
+    stored once per hash (blobs/<sha256>.pdf) with a small JSON record per task
+    (index/<task_id>.json), the same layout as the logo cache. Downloads are served
+    straight from the blob file, so gunicorn can sendfile() it.
+    """
+    def __init__(self, root, **limits):
+        super().__init__(**limits)
+        self.root = root
+        self._last_evicted = 0
+
+    def _index_path(self, task_id):
+        return os.path.join(self.root, 'index', f'{task_id}.json')
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.root, 'blobs', f'{sha256}.pdf')
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, task_id, pdf_buffer):
+        if not TASK_ID_PATTERN.match(task_id):
+            raise ValueError(f"Invalid task id {task_id!r}")
+        data = pdf_buffer.getbuffer()
+        if not data:
+            raise ValueError(f"Refusing to store an empty report for task {task_id}")
+        sha256 = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(sha256)
+        if os.path.exists(blob_path):
+            os.utime(blob_path)  # still in use; the sweep skips recently touched blobs
+        else:
+            self._write_atomic(blob_path, data)
+        meta = _artifact_meta(task_id, sha256, len(data), time.time())
+        self._write_atomic(self._index_path(task_id), json.dumps(meta).encode())
+
+        now = time.time()
+        if self.ttl and now - self._last_evicted >= EVICT_INTERVAL_SECONDS:
+            self._last_evicted = now
+            self.remove_older_than(now - self.ttl)
+        return meta
+
+    def get(self, task_id):
+        if not TASK_ID_PATTERN.match(task_id):
+            return None
+        try:
+            with open(self._index_path(task_id), 'r') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return None if self._expired(meta) else meta
+
+    def open(self, meta):
+        return open(self._blob_path(meta['sha256']), 'rb')
+
+    def delete(self, task_id):
+        if TASK_ID_PATTERN.match(task_id):
+            try:
+                os.remove(self._index_path(task_id))
+            except FileNotFoundError:
+                pass
+
+    def _entries(self, folder):
+        try:
+            with os.scandir(os.path.join(self.root, folder)) as entries:
+                return [entry for entry in entries if entry.is_file() and not entry.name.endswith('.tmp')]
+        except FileNotFoundError:
+            return []
+
+    def remove_older_than(self, cutoff):
+        removed = 0
+        referenced = set()
+        for entry in self._entries('index'):
+            try:
+                with open(entry.path, 'r') as file:
+                    meta = json.load(file)
+                if meta['created_at'] < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+                else:
+                    referenced.add(meta['sha256'])
+            except (OSError, ValueError, KeyError):
+                continue
+        # Blobs no record points to any more; recently written ones may belong to a put in progress
+        for entry in self._entries('blobs'):
+            if entry.name[:-len('.pdf')] not in referenced and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        if removed:
+            logger.info(f"Removed {removed} expired report artifacts")
+        return removed
+
+    def stats(self):
+        blobs = self._entries('blobs')
+        return {
+            'backend': 'local',
+            'artifacts': len(self._entries('index')),
+            'blobs': len(blobs),
+            'bytes': sum(entry.stat().st_size for entry in blobs),
+        }
+
+class S3ArtifactStore(ArtifactStore):
+    """
+    Artifacts in an S3-compatible bucket (AWS, MinIO, ...) under <prefix><task_id>/<sha256>.pdf.
+    Downloads are redirected to a presigned URL, so the bucket serves ranges and
+    conditional requests itself. Prefer a bucket lifecycle rule for expiry;
+    remove_older_than lists and deletes.
+    """
+    def __init__(self, bucket, prefix='reports/', endpoint_url=None, url_expires=300, **limits):
+        super().__init__(**limits)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.url_expires = url_expires
+        self._client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or None,
+            aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', None),
+            aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', None),
+            region_name=getattr(settings, 'AWS_REGION', None),
+        )
+
+    def _meta(self, task_id, item):
+        sha256 = item['Key'].rsplit('/', 1)[-1][:-len('.pdf')]
+        return _artifact_meta(task_id, sha256, item['Size'], item['LastModified'].timestamp())
+
+    def _list(self, prefix):
+        paginator = self._client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            yield from page.get('Contents', [])
+
+    def put(self, task_id, pdf_buffer):
+        if not TASK_ID_PATTERN.match(task_id):
+            raise ValueError(f"Invalid task id {task_id!r}")
+        data = pdf_buffer.getvalue()
+        if not data:
+            raise ValueError(f"Refusing to store an empty report for task {task_id}")
+        sha256 = hashlib.sha256(data).hexdigest()
+        self._client.put_object(
+            Bucket=self.bucket, Key=f'{self.prefix}{task_id}/{sha256}.pdf',
+            Body=data, ContentType='application/pdf'
+        )
+        return _artifact_meta(task_id, sha256, len(data), time.time())
+
+    def get(self, task_id):
+        if not TASK_ID_PATTERN.match(task_id):
+            return None
+        items = sorted(self._list(f'{self.prefix}{task_id}/'), key=lambda item: item['LastModified'])
+        if not items:
+            return None
+        meta = self._meta(task_id, items[-1])
+        return None if self._expired(meta) else meta
+
+    def open(self, meta):
+        key = f"{self.prefix}{meta['task_id']}/{meta['sha256']}.pdf"
+        try:
+            return self._client.get_object(Bucket=self.bucket, Key=key)['Body']
+        except self._client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def url(self, meta):
+        return self._client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': f"{self.prefix}{meta['task_id']}/{meta['sha256']}.pdf"},
+            ExpiresIn=self.url_expires
+        )
+
+    def _delete_keys(self, keys):
+        for start in range(0, len(keys), 1000):
+            self._client.delete_objects(Bucket=self.bucket, Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]]})
+
+    def delete(self, task_id):
+        if TASK_ID_PATTERN.match(task_id):
+            self._delete_keys([item['Key'] for item in self._list(f'{self.prefix}{task_id}/')])
+
+    def remove_older_than(self, cutoff):
+        keys = [item['Key'] for item in self._list(self.prefix) if item['LastModified'].timestamp() < cutoff]
+        self._delete_keys(keys)
+        return len(keys)
+
+    def stats(self):
+        items = list(self._list(self.prefix))
+        return {'backend': 's3', 'bucket': self.bucket, 'artifacts': len(items), 'bytes': sum(item['Size'] for item in items)}
+
+ARTIFACT_STORES = ('local', 's3')
+
+def create_artifact_store(backend=None):
+    """Build the store named by PDF_ARTIFACT_STORE ('local' or 's3')."""
+    backend = backend or getattr(settings, 'PDF_ARTIFACT_STORE', 'local')
+    limits = {'ttl': getattr(settings, 'PDF_ARTIFACT_TTL_SECONDS', 24 * 3600)}
+    if backend == 'local':
+        root = getattr(settings, 'PDF_ARTIFACT_DIR', None) or cache_path('artifacts')
+        return LocalArtifactStore(root, **limits)
+    if backend == 's3':
+        bucket = getattr(settings, 'PDF_ARTIFACT_BUCKET', None)
+        if not bucket:
+            raise ValueError("PDF_ARTIFACT_STORE=s3 needs PDF_ARTIFACT_BUCKET")
+        return S3ArtifactStore(
+            bucket,
+            prefix=getattr(settings, 'PDF_ARTIFACT_PREFIX', 'reports/'),
+            endpoint_url=getattr(settings, 'PDF_ARTIFACT_S3_ENDPOINT_URL', None),
+            url_expires=getattr(settings, 'PDF_ARTIFACT_URL_EXPIRES', 300),
+            **limits
+        )
+    raise ValueError(f"Unknown PDF_ARTIFACT_STORE '{backend}' (expected one of: {', '.join(ARTIFACT_STORES)})")
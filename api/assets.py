@@ -0,0 +1,182 @@
+import os
+import json
+import math
+import mmap
+import shutil
+import logging
+import threading
+from io import BytesIO
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from .cache_paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+ASSET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset")
+PAGE_SIZE = (595, 842)
+
+# Resolution the built variants are downsampled to, at the size each asset is drawn
+ASSET_DPI = int(os.environ.get('ASSET_DPI', 144))
+
+# Every image asset the report draws, with the size (points) it is drawn at.
+# Sources larger than ASSET_DPI at that size are downsampled by the build step.
+ASSETS = {
+    'cover': PAGE_SIZE,
+    'ticker': PAGE_SIZE,
+    'company': PAGE_SIZE,
+    'company_blank': PAGE_SIZE,
+    'goliath': PAGE_SIZE,
+    'vincent': PAGE_SIZE,
+    'cta': PAGE_SIZE,
+    'periwatch': (90, 90),  # fallback logo on the company page
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+def _source_path(name):
+    return os.path.join(ASSET_PATH, f'{name}.png')
+
+def _tmp_path(path):
+    """Temp name next to path that no other process or thread writes to."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _source_stamp(name):
+    stat = os.stat(_source_path(name))
+    return {'mtime': stat.st_mtime, 'bytes': stat.st_size}
+
+def build_asset(name, dpi=ASSET_DPI):
+    """
+    Write the page-resolution variant of one asset to the asset cache.
+    Returns its manifest entry (variant dimensions and the source it was built from).
+    """
+    width_pt, height_pt = ASSETS[name]
+    with Image.open(_source_path(name)) as image:
+        image.load()
+        target_width = math.ceil(width_pt / 72 * dpi)
+        target_height = math.ceil(height_pt / 72 * dpi)
+        # Cover the drawn box at the target DPI, never upscale
+        scale = min(1.0, max(target_width / image.width, target_height / image.height))
+        path = cache_path('assets', f'{name}.png')
+        tmp_path = _tmp_path(path)
+        if scale < 1.0:
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+            image.save(tmp_path, format='PNG', optimize=True)
+        else:
+            shutil.copyfile(_source_path(name), tmp_path)  # already at or below the target
+        os.replace(tmp_path, path)
+        return {'width': image.width, 'height': image.height, 'dpi': dpi, 'source': _source_stamp(name)}
+
+def build_assets(force=False, dpi=ASSET_DPI):
+    """
+    Build every asset variant that is missing or older than its source and rewrite
+    the manifest. Returns {name: (entry, rebuilt)}.
+    """
+    manifest = _read_manifest()
+    results = {}
+    for name in ASSETS:
+        entry = manifest.get(name)
+        rebuild = force or not _is_current(name, entry, dpi)
+        if rebuild:
+            entry = manifest[name] = build_asset(name, dpi)
+        results[name] = (entry, rebuild)
+    _write_manifest(manifest)
+    return results
+
+def _read_manifest():
+    try:
+        with open(cache_path('assets', MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(manifest):
+    path = cache_path('assets', MANIFEST_NAME)
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _is_current(name, entry, dpi=ASSET_DPI):
+    return (
+        entry is not None
+        and entry.get('dpi') == dpi
+        and entry.get('source') == _source_stamp(name)
+        and os.path.exists(cache_path('assets', f'{name}.png'))
+    )
+
+class AssetRegistry:
+    """
+    Process-wide access to the built asset variants. Each variant is memory-mapped
+    once (with gunicorn --preload the pages are shared by every worker), decoded into
+    an ImageReader once, and its dimensions come from the manifest, so no request
+    opens an asset file. Missing or stale variants are built on first use.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._data = {}
+        self._readers = {}
+
+    def _entry(self, name):
+        if name not in ASSETS:
+            raise KeyError(f"Unknown asset '{name}'")
+        # Sources are checked for changes once per process, when the manifest is loaded
+        manifest = self._manifest
+        if manifest is None or name not in manifest:
+            with self._lock:
+                if self._manifest is None or name not in self._manifest:
+                    stale = [n for n, (_, rebuilt) in build_assets().items() if rebuilt]
+                    if stale:
+                        logger.info(f"Built asset variants: {', '.join(stale)}")
+                    self._manifest = _read_manifest()
+                    for rebuilt in stale:
+                        self._data.pop(rebuilt, None)
+                        self._readers.pop(rebuilt, None)
+                manifest = self._manifest
+        return manifest[name]
+
+    def path(self, name):
+        self._entry(name)
+        return cache_path('assets', f'{name}.png')
+
+    def size(self, name):
+        """(width, height) in pixels of the asset variant."""
+        entry = self._entry(name)
+        return entry['width'], entry['height']
+
+    def data(self, name):
+        """Read-only memory map of the encoded variant."""
+        data = self._data.get(name)
+        if data is None:
+            path = self.path(name)
+            with self._lock:
+                data = self._data.get(name)
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = self._data[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return data
+
+    def reader(self, name):
+        """
+        Decoded ImageReader for the variant, shared by all requests. Its pixel data is
+        decoded up front so concurrent drawImage calls only read it.
+        """
+        reader = self._readers.get(name)
+        if reader is None:
+            data = self.data(name)
+            with self._lock:
+                reader = self._readers.get(name)
+                if reader is None:
+                    reader = ImageReader(BytesIO(data))
+                    reader.getRGBData()
+                    if reader._dataA:
+                        reader._dataA.getRGBData()
+                    self._readers[name] = reader
+        return reader
+
+    def warm(self):
+        """Build any stale variants and map them all, ahead of the first report."""
+        for name in ASSETS:
+            self.data(name)
+
+asset_registry = AssetRegistry()
@@ -0,0 +1,12 @@
+import os
+from django.conf import settings
+
+def cache_path(*parts):
+    """
+    Path inside the local cache directory (PERIWATCH_CACHE_DIR), creating the
+    parent directories on first use.
+    """
+    base = getattr(settings, 'PERIWATCH_CACHE_DIR', None) or os.path.join(settings.BASE_DIR, 'cache')
+    path = os.path.join(base, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
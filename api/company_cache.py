@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from .cache_paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = 'company_intelligence.sqlite3'
+COMPANY_INFO_FRESH_SECONDS = int(os.environ.get('COMPANY_INFO_FRESH_SECONDS', 7 * 24 * 3600))
+# After going stale an entry is still served (and refreshed in the background) for this long
+COMPANY_INFO_STALE_SECONDS = int(os.environ.get('COMPANY_INFO_STALE_SECONDS', 30 * 24 * 3600))
+
+_local = threading.local()
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+def normalize_company_name(company_name):
+    """Cache key for a company: lowercase, punctuation dropped, whitespace collapsed."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', company_name.lower()).split())
+
+def _connect():
+    connection = getattr(_local, 'connection', None)
+    if connection is None or getattr(_local, 'pid', None) != os.getpid():
+        connection = sqlite3.connect(cache_path(CACHE_FILENAME), timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS company_info ("
+            " name_key TEXT PRIMARY KEY,"
+            " company_name TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        connection.commit()
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return connection
+
+def get_cached_company_info(company_name):
+    """Return (info, age in seconds) from the cache, or (None, None) on a miss."""
+    row = _connect().execute(
+        "SELECT data, fetched_at FROM company_info WHERE name_key = ?",
+        (normalize_company_name(company_name),)
+    ).fetchone()
+    if row is None:
+        return None, None
+    return json.loads(row[0]), time.time() - row[1]
+
+def is_company_info_fresh(company_name):
+    """True when a cached entry will be served without fetching (or refreshing) it."""
+    try:
+        info, age = get_cached_company_info(company_name)
+    except sqlite3.Error:
+        return False
+    return info is not None and age < COMPANY_INFO_FRESH_SECONDS
+
+def store_company_info(company_name, info):
+    connection = _connect()
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO company_info (name_key, company_name, data, fetched_at) VALUES (?, ?, ?, ?)",
+            (normalize_company_name(company_name), company_name, json.dumps(info), time.time())
+        )
+
+def _fetch_and_store(company_name, fetch):
+    info = fetch(company_name)
+    # Empty results mean the LLM answer could not be parsed; don't pin those in the cache
+    if info:
+        try:
+            store_company_info(company_name, info)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store company info for '{company_name}': {e}")
+    return info
+
+def _refresh_in_background(company_name, fetch):
+    """Refresh one entry on a daemon thread, at most one refresh per company at a time."""
+    key = normalize_company_name(company_name)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh_worker():
+        try:
+            _fetch_and_store(company_name, fetch)
+            logger.info(f"Refreshed cached company info for '{company_name}'")
+        except Exception as e:
+            logger.error(f"Background refresh of company info for '{company_name}' failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    refresh_thread = threading.Thread(target=refresh_worker)
+    refresh_thread.daemon = True
+    refresh_thread.start()
+
+def get_company_info(company_name, fetch):
+    """
+    Company intelligence for company_name, using fetch(company_name) -> dict on a miss.
+
+    Fresh entries are returned directly. Stale entries (older than COMPANY_INFO_FRESH_SECONDS
+    but within the stale window) are returned immediately while a refresh runs in the
+    background. Anything older, or a miss, is fetched synchronously.
+    """
+    try:
+        info, age = get_cached_company_info(company_name)
+    except sqlite3.Error as e:
+        logger.warning(f"Company info cache unavailable: {e}")
+        return fetch(company_name)
+
+    if info is not None:
+        if age < COMPANY_INFO_FRESH_SECONDS:
+            return info
+        if age < COMPANY_INFO_FRESH_SECONDS + COMPANY_INFO_STALE_SECONDS:
+            _refresh_in_background(company_name, fetch)
+            return info
+
+    return _fetch_and_store(company_name, fetch)
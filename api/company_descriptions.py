@@ -0,0 +1,96 @@
+import os
+import re
+import bisect
+import json
+import mmap
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset", "companiesDesc.json")
+
+# companiesDesc.json is a flat {"TICKER.JK": "description", ...} object
+_ENTRY_PATTERN = re.compile(rb'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"', re.DOTALL)
+
+class DescriptionStore:
+    """
+    Read-only ticker -> description lookup over a memory-mapped companiesDesc.json.
+
+    The file is scanned once to record the byte span of every value; lookups slice the
+    mapping and decode only that one string, so nothing is parsed on the request path.
+    Tickers are also kept sorted for prefix lookups (e.g. "BBCA" -> "BBCA.JK").
+    """
+    def __init__(self, path=DESCRIPTIONS_PATH):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = {}
+        for match in _ENTRY_PATTERN.finditer(self._data):
+            ticker = self._decode(match.group(1))
+            # (start, end, has_escapes) of the value, without the quotes
+            self._offsets[ticker] = (match.start(2), match.end(2), b'\\' in match.group(2))
+        self._tickers = sorted(self._offsets)
+        logger.info(f"Indexed {len(self._tickers)} company descriptions from {os.path.basename(path)}")
+
+    @staticmethod
+    def _decode(raw, has_escapes=True):
+        if not has_escapes:
+            return raw.decode('utf-8')
+        return json.loads(b'"' + raw + b'"')
+
+    def __len__(self):
+        return len(self._tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._offsets
+
+    def tickers(self):
+        """All tickers, sorted."""
+        return list(self._tickers)
+
+    def get(self, ticker, default=None):
+        """Description for an exact ticker such as "BBCA.JK"."""
+        entry = self._offsets.get(ticker)
+        if entry is None:
+            return default
+        start, end, has_escapes = entry
+        return self._decode(self._data[start:end], has_escapes)
+
+    def find_by_prefix(self, prefix):
+        """Tickers starting with prefix, in sorted order."""
+        start = bisect.bisect_left(self._tickers, prefix)
+        end = bisect.bisect_left(self._tickers, prefix + '\uffff')
+        return self._tickers[start:end]
+
+    def lookup(self, ticker, default=None):
+        """
+        Description for a ticker, accepting either the full symbol or its bare code.
+        Falls back to the code plus an exchange suffix ("BBCA" -> "BBCA.JK") when the
+        exact symbol is unknown; a code is never matched against a longer one.
+        """
+        if ticker in self._offsets:
+            return self.get(ticker)
+        code = ticker.split('.')[0].strip().upper()
+        if not code:
+            return default
+        matches = self.find_by_prefix(code + '.')
+        if matches:
+            return self.get(matches[0])
+        return default
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_description_store():
+    """Process-wide DescriptionStore, built lazily on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DescriptionStore()
+    return _store
+
+def get_description(ticker, default='-'):
+    """Description text for a ticker, or default when it is not in companiesDesc.json."""
+    return get_description_store().lookup(ticker, default)
@@ -0,0 +1,209 @@
+import math
+import zlib
+import logging
+from io import BytesIO
+import fitz  # PyMuPDF for compression
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_QUALITY = 90
+DEFAULT_ZOOM = 1.9  # Good balance between quality and size
+DEFAULT_IMAGE_DPI = 150  # Target resolution for embedded images in vector mode
+
+# Compression modes: 'raster' flattens every page to a JPEG, 'vector' keeps the ReportLab
+# text, links and drawing and only downsamples/re-encodes the embedded images
+COMPRESSION_RASTER = 'raster'
+COMPRESSION_VECTOR = 'vector'
+COMPRESSION_MODES = (COMPRESSION_RASTER, COMPRESSION_VECTOR)
+
+# Quality profiles: starting JPEG quality, raster zoom and vector-mode image DPI.
+# 'balanced' is the historical default.
+COMPRESSION_PROFILES = {
+    'fast': {'image_quality': 80, 'zoom': 1.5, 'dpi': 120},
+    'balanced': {'image_quality': DEFAULT_IMAGE_QUALITY, 'zoom': DEFAULT_ZOOM, 'dpi': DEFAULT_IMAGE_DPI},
+    'smallest': {'image_quality': 65, 'zoom': 1.3, 'dpi': 100},
+}
+DEFAULT_PROFILE = 'balanced'
+
+# Byte-budget search: JPEG quality is searched down to this floor at each scale
+# (fraction of the profile's zoom) before the page is downscaled to the next one
+BUDGET_QUALITY_FLOOR = 40
+BUDGET_SCALES = (1.0, 0.8, 0.65, 0.5)
+
+def _render_page(page, zoom):
+    """
+    Render a page to an alpha-free RGB pixmap and a PIL image over its samples.
+    frombuffer over samples_mv shares MuPDF's memory instead of copying it, so the
+    pixmap must outlive the image.
+    """
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+    return pix, Image.frombuffer('RGB', (pix.width, pix.height), pix.samples_mv, 'raw', 'RGB', pix.stride, 1)
+
+def _encode_jpeg(image, image_quality):
+    img_buffer = BytesIO()
+    image.save(img_buffer,
+                format='JPEG',
+                quality=image_quality,
+                optimize=True,
+                progressive=True)
+    return img_buffer.getvalue()
+
+def rasterize_page(page, image_quality=DEFAULT_IMAGE_QUALITY, zoom=DEFAULT_ZOOM):
+    """
+    Render a PyMuPDF page to an RGB pixmap and encode it as an optimized JPEG.
+    Returns the JPEG bytes.
+
+    The pixmap is rendered without alpha (onto white), so PIL can wrap its samples
+    in place and the only full-page work left is the single JPEG encode.
+    """
+    pix, pil_image = _render_page(page, zoom)
+    jpeg = _encode_jpeg(pil_image, image_quality)
+    # The image only borrows the pixmap's buffer; release it before the pixmap
+    del pil_image
+    del pix
+    return jpeg
+
+def rasterize_page_to_budget(page, max_bytes, image_quality=DEFAULT_IMAGE_QUALITY, zoom=DEFAULT_ZOOM):
+    """
+    Rasterize a page to a JPEG of at most max_bytes, keeping as much quality as possible.
+    Returns (JPEG bytes, quality, zoom) for the chosen parameters.
+
+    The page is rendered once; each attempt re-encodes (and, past the quality floor,
+    downscales) that same pixmap. Quality is binary-searched at each scale, and the
+    search stops at the first setting that fits. If nothing fits, the smallest attempt
+    is returned.
+    """
+    pix, image = _render_page(page, zoom)
+    smallest = None
+    for scale in BUDGET_SCALES:
+        if scale == 1.0:
+            scaled = image
+        else:
+            scaled = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+        scaled_zoom = round(zoom * scale, 3)
+
+        found = None
+        low, high = BUDGET_QUALITY_FLOOR, image_quality
+        quality = image_quality  # try the profile's quality first: most pages fit as-is
+        while low <= high:
+            jpeg = _encode_jpeg(scaled, quality)
+            if len(jpeg) <= max_bytes:
+                found = (jpeg, quality, scaled_zoom)
+                low = quality + 1
+            else:
+                high = quality - 1
+                if smallest is None or len(jpeg) < len(smallest[0]):
+                    smallest = (jpeg, quality, scaled_zoom)
+            quality = (low + high) // 2
+        if found:
+            return found
+    return smallest
+
+def insert_image_page(new_doc, rect, image_bytes):
+    """Append a page of the given size to new_doc showing image_bytes full-bleed."""
+    new_page = new_doc.new_page(width=rect.width, height=rect.height)
+    new_page.insert_image(new_page.rect, stream=image_bytes)
+    return new_page
+
+def _displayed_images(doc, page_numbers):
+    """
+    Map each image xref used on the given pages to (width pt, height pt, smask xref),
+    using the largest size the image is drawn at.
+    """
+    images = {}
+    for page_num in page_numbers:
+        page = doc[page_num]
+        smasks = {image[0]: image[1] for image in page.get_images(full=True)}
+        for info in page.get_image_info(xrefs=True):
+            xref = info['xref']
+            if not xref:
+                continue  # inline image
+            a, b, c, d = info['transform'][:4]
+            width, height = math.hypot(a, b), math.hypot(c, d)
+            previous = images.get(xref)
+            if previous is None or width * height > previous[0] * previous[1]:
+                images[xref] = (width, height, smasks.get(xref, 0))
+    return images
+
+def _pixmap_image(pix, mode):
+    """PIL view over a pixmap's samples (no copy while the pixmap is alive)."""
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, 'raw', mode, pix.stride, 1)
+
+def _raw_size(doc, xref):
+    return len(doc.xref_stream_raw(xref) or b'') if xref else 0
+
+def replace_image_stream(doc, xref, jpeg, size, mode='RGB'):
+    """Rewrite an image object in place as the given JPEG (its soft mask is left as is)."""
+    doc.update_stream(xref, jpeg, compress=False)
+    doc.xref_set_key(xref, 'Filter', '/DCTDecode')
+    doc.xref_set_key(xref, 'DecodeParms', 'null')
+    doc.xref_set_key(xref, 'Width', str(size[0]))
+    doc.xref_set_key(xref, 'Height', str(size[1]))
+    doc.xref_set_key(xref, 'ColorSpace', '/DeviceGray' if mode == 'L' else '/DeviceRGB')
+    doc.xref_set_key(xref, 'BitsPerComponent', '8')
+
+def recompress_images(doc, page_numbers, target_dpi=DEFAULT_IMAGE_DPI, image_quality=DEFAULT_IMAGE_QUALITY, skip_xrefs=()):
+    """
+    Downsample the embedded images of the given pages to target_dpi at the size they are
+    displayed, and re-encode them as JPEG (soft masks stay lossless, Flate-compressed).
+    The image objects are rewritten in place, so page content, text and links are untouched.
+    An image is only replaced when the result is smaller, and images in skip_xrefs are
+    left alone. Returns the number replaced.
+    """
+    replaced = 0
+    for xref, (width_pt, height_pt, smask) in _displayed_images(doc, page_numbers).items():
+        if xref in skip_xrefs:
+            continue
+        kind, _ = doc.xref_get_key(xref, 'Decode')
+        if kind != 'null' or doc.xref_get_key(xref, 'ImageMask')[1] == 'true':
+            continue  # unusual encodings are left alone
+
+        pix = fitz.Pixmap(doc, xref)
+        if pix.colorspace is None:
+            continue
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)
+        if pix.colorspace.n not in (1, 3):
+            pix = fitz.Pixmap(fitz.csRGB, pix)
+        mode = 'L' if pix.n == 1 else 'RGB'
+
+        target_width = math.ceil(width_pt / 72 * target_dpi)
+        target_height = math.ceil(height_pt / 72 * target_dpi)
+        scale = min(1.0, max(target_width / pix.width, target_height / pix.height))
+        size = (max(1, round(pix.width * scale)), max(1, round(pix.height * scale)))
+
+        image = _pixmap_image(pix, mode)
+        if size != image.size:
+            image = image.resize(size, Image.LANCZOS)
+        jpeg_buffer = BytesIO()
+        image.save(jpeg_buffer, format='JPEG', quality=image_quality, optimize=True)
+        jpeg = jpeg_buffer.getvalue()
+
+        # Soft masks are only rewritten when they need resizing (or can be dropped);
+        # otherwise the existing (already Flate-compressed) mask stays as it is
+        mask_data = None
+        if smask:
+            # The view borrows the pixmap's memory, so the pixmap must outlive it
+            mask_pix = fitz.Pixmap(doc, smask)
+            mask = _pixmap_image(mask_pix, 'L')
+            if mask.getextrema() == (255, 255):
+                mask_data = b''  # fully opaque
+            elif mask.size != size:
+                mask_data = zlib.compress(mask.resize(size, Image.LANCZOS).tobytes())
+
+        old_size = _raw_size(doc, xref) + (_raw_size(doc, smask) if mask_data is not None else 0)
+        if len(jpeg) + len(mask_data or b'') >= old_size:
+            continue
+
+        replace_image_stream(doc, xref, jpeg, size, mode)
+        if mask_data == b'':
+            doc.xref_set_key(xref, 'SMask', 'null')
+        elif mask_data is not None:
+            doc.update_stream(smask, mask_data, compress=False)
+            doc.xref_set_key(smask, 'Filter', '/FlateDecode')
+            doc.xref_set_key(smask, 'DecodeParms', 'null')
+            doc.xref_set_key(smask, 'Width', str(size[0]))
+            doc.xref_set_key(smask, 'Height', str(size[1]))
+        replaced += 1
+    return replaced
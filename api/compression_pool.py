@@ -0,0 +1,118 @@
+import os
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import fitz
+from .compression import rasterize_page, rasterize_page_to_budget, DEFAULT_IMAGE_QUALITY, DEFAULT_ZOOM
+
+logger = logging.getLogger(__name__)
+
+# Rasterizing and JPEG-encoding are CPU-bound and hold the GIL, so pages are spread
+# across processes. 1 (or 0) keeps all compression in the request thread.
+COMPRESSION_WORKERS = int(os.environ.get('COMPRESSION_WORKERS', os.cpu_count() or 1))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_warmed_pool = None
+
+def get_compression_pool():
+    """
+    Process pool shared by every request in this gunicorn worker, created on first use
+    (and again after a fork). Workers come from a forkserver rather than fork(), since
+    the web worker is multi-threaded by the time the pool is needed.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['api.compression'])
+                _pool = ProcessPoolExecutor(max_workers=COMPRESSION_WORKERS, mp_context=context)
+                _pool_pid = os.getpid()
+                logger.info(f"Started compression pool with {COMPRESSION_WORKERS} processes")
+    return _pool
+
+def warm_compression_pool():
+    """
+    Start the pool's processes without waiting for them. Called when a report starts, so
+    process start-up overlaps the data fetch instead of delaying the first compression.
+    Each pool is warmed once; later calls return straight away.
+    """
+    global _warmed_pool
+    if COMPRESSION_WORKERS > 1:
+        pool = get_compression_pool()
+        with _pool_lock:
+            if _warmed_pool is pool:
+                return
+            _warmed_pool = pool
+        for _ in range(COMPRESSION_WORKERS):
+            pool.submit(os.getpid)
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _rasterize_shared(shm_name, size, page_numbers, image_quality, zoom, max_page_bytes):
+    """Pool task: open the PDF from shared memory once and rasterize its share of the pages."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        pdf_data = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    return _rasterize_in_thread(pdf_data, page_numbers, image_quality, zoom, max_page_bytes)
+
+def _rasterize_in_thread(pdf_data, page_numbers, image_quality, zoom, max_page_bytes=None):
+    doc = fitz.open(stream=pdf_data, filetype="pdf")
+    try:
+        images = {}
+        for page_num in page_numbers:
+            if max_page_bytes:
+                images[page_num] = rasterize_page_to_budget(doc[page_num], max_page_bytes, image_quality, zoom)
+            else:
+                images[page_num] = (rasterize_page(doc[page_num], image_quality, zoom), image_quality, zoom)
+        return images
+    finally:
+        doc.close()
+
+def rasterize_pages(pdf_data, page_numbers, image_quality=DEFAULT_IMAGE_QUALITY, zoom=DEFAULT_ZOOM, max_page_bytes=None):
+    """
+    Rasterize the given pages of a PDF (bytes) to JPEG, each within max_page_bytes if given.
+    Returns {page number: (JPEG bytes, quality, zoom)} with the parameters chosen per page.
+
+    With more than one page and COMPRESSION_WORKERS > 1 the pages are split across the
+    compression pool; the PDF is placed in shared memory once rather than pickled to
+    every task. Single pages (e.g. the partial cover PDF) are rendered in-thread, where
+    the round trip to another process would cost more than it saves.
+    """
+    page_numbers = list(page_numbers)
+    if len(page_numbers) <= 1 or COMPRESSION_WORKERS <= 1:
+        return _rasterize_in_thread(pdf_data, page_numbers, image_quality, zoom, max_page_bytes)
+
+    shm = shared_memory.SharedMemory(create=True, size=len(pdf_data))
+    try:
+        shm.buf[:len(pdf_data)] = pdf_data
+        pool = get_compression_pool()
+        # One task per worker, so each process parses the PDF only once
+        chunks = min(COMPRESSION_WORKERS, len(page_numbers))
+        futures = [
+            pool.submit(_rasterize_shared, shm.name, len(pdf_data), page_numbers[i::chunks], image_quality, zoom, max_page_bytes)
+            for i in range(chunks)
+        ]
+        images = {}
+        for future in futures:
+            images.update(future.result())
+        return images
+    except BrokenProcessPool as e:
+        logger.error(f"Compression pool failed ({e}); rasterizing in-thread")
+        _reset_pool()
+        return _rasterize_in_thread(pdf_data, page_numbers, image_quality, zoom, max_page_bytes)
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,177 @@
+import os
+import logging
+import threading
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+REPORT_FETCH_WORKERS = int(os.environ.get('REPORT_FETCH_WORKERS', 16))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def get_fetch_executor():
+    """Thread pool shared by every report in this process (recreated after a fork)."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=REPORT_FETCH_WORKERS, thread_name_prefix='report-fetch')
+                _executor_pid = os.getpid()
+    return _executor
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+def _then(future, fn):
+    """
+    Future for fn(future.result()), submitted to the pool only once `future` is done,
+    so dependent steps never tie up a pool thread while they wait.
+    """
+    chained = Future()
+
+    def run(result):
+        try:
+            chained.set_result(fn(result))
+        except Exception as e:
+            chained.set_exception(e)
+
+    def on_done(done):
+        if done.exception() is not None:
+            chained.set_exception(done.exception())
+        else:
+            get_fetch_executor().submit(run, done.result())
+
+    future.add_done_callback(on_done)
+    return chained
+
+def _or_else(future, fallback):
+    """
+    Future for future's result, or, when that is None (or failed), for the future returned by
+    fallback(). The fallback is only started once it is actually needed.
+    """
+    chained = Future()
+
+    def copy(done):
+        if done.exception() is not None:
+            chained.set_exception(done.exception())
+        else:
+            chained.set_result(done.result())
+
+    def on_done(done):
+        if done.exception() is None and done.result() is not None:
+            chained.set_result(done.result())
+        else:
+            try:
+                fallback().add_done_callback(copy)
+            except Exception as e:
+                chained.set_exception(e)
+
+    future.add_done_callback(on_done)
+    return chained
+
+class SharedCall:
+    """
+    fn(*args) run at most once and shared by every consumer. Whoever needs it first runs
+    it: result() runs it inline in the calling thread, future() hands it to the pool. A
+    caller never waits on a call that is only queued, so pool threads cannot deadlock.
+    """
+    def __init__(self, fn, *args):
+        self._fn = fn
+        self._args = args
+        self._future = Future()
+        self._lock = threading.Lock()
+        self._started = False
+        self._submitted = False
+
+    def _run_once(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        try:
+            self._future.set_result(self._fn(*self._args))
+        except Exception as e:
+            self._future.set_exception(e)
+
+    def future(self):
+        with self._lock:
+            submit = not (self._started or self._submitted)
+            self._submitted = True
+        if submit:
+            get_fetch_executor().submit(self._run_once)
+        return self._future
+
+    def result(self):
+        self._run_once()
+        return self._future.result()
+
+class ReportFetch:
+    """
+    All independent I/O for one report, started together as soon as the request arrives:
+    ticker profile, ticker logo and description, company search/summary and the company
+    logo. When the summary has to be fetched, the logo is raced speculatively from the
+    first Tavily search (shared with the summary) and the post-Gemini lookup only runs if
+    that race finds nothing; cached logos, or a cached "no logo", skip both. Rendering blocks
+    only on the results it needs, so report latency follows the slowest chain instead of
+    the sum of every call.
+    """
+    def __init__(self, ticker, company):
+        # Imported here: pdf_generator imports this module
+        from .pdf_generator import fetch_company_info, resolve_company_logo, search_company_with_tavily, LogoUnavailable
+        from .company_cache import get_company_info, is_company_info_fresh
+        from .logo_race import start_logo_race, remember_company_logo, cached_company_logo
+        from .company_descriptions import get_description
+        from .logo_cache import get_ticker_logo
+        from .ticker_profiles import get_ticker_profile
+
+        executor = get_fetch_executor()
+        self.ticker = ticker
+        self.company = company
+
+        if ticker:
+            self.profile = executor.submit(get_ticker_profile, ticker)
+            self.ticker_logo = executor.submit(get_ticker_logo, ticker)
+            self.description = executor.submit(get_description, ticker)
+        else:
+            self.profile = self.ticker_logo = self.description = _resolved(None)
+
+        if company:
+            self.company_search = SharedCall(search_company_with_tavily, company)
+            self.company_info = executor.submit(
+                get_company_info, company, partial(fetch_company_info, search=self.company_search.result)
+            )
+
+            def fallback_logo(info):
+                try:
+                    image = resolve_company_logo(info)
+                except LogoUnavailable as e:
+                    # Not remembered, so the next report looks again instead of going without for days
+                    logger.warning(f"Company logo for '{company}' is unavailable for now: {e}")
+                    return None
+                return remember_company_logo(company, image)
+
+            known, cached_logo = cached_company_logo(company)
+            if known:
+                self.company_logo = _resolved(cached_logo)
+            elif is_company_info_fresh(company):
+                # The summary is a cache hit, so the search the race feeds on would only
+                # run for the logo; look it up from the cached info instead
+                self.company_logo = _then(self.company_info, fallback_logo)
+            else:
+                self.company_logo = _or_else(
+                    start_logo_race(company, self.company_search),
+                    lambda: _then(self.company_info, fallback_logo),
+                )
+        else:
+            self.company_search = None
+            self.company_info = self.company_logo = _resolved(None)
+
+def start_report_fetch(ticker, company):
+    """Kick off every data fetch for a report and return the in-flight ReportFetch."""
+    logger.info(f"Starting report data fetch (ticker={ticker!r}, company={company!r})")
+    return ReportFetch(ticker, company)
@@ -0,0 +1,67 @@
+import os
+import logging
+import threading
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+logger = logging.getLogger(__name__)
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset", "font")
+
+# ReportLab font name -> TTF file. Inter/Inter-Bold are what the report pages use,
+# the italics complete the family so <i>/<b> mapping works in paragraphs.
+INTER_FAMILY = {
+    'Inter': 'Inter-Regular.ttf',
+    'Inter-Bold': 'Inter-Bold.ttf',
+    'Inter-Italic': 'Inter-Italic.ttf',
+    'Inter-BoldItalic': 'Inter-BoldItalic.ttf',
+}
+
+# Parsed fonts and their width tables, filled once by register_fonts()
+FONTS = {}
+FONT_METRICS = {}
+
+_register_lock = threading.Lock()
+
+def register_fonts():
+    """
+    Parse the Inter family and register it with ReportLab exactly once per process.
+
+    The TTFont objects keep their subsetting state per document, so every request
+    thread can draw with them concurrently once they are registered. Calling this
+    again is a cheap no-op.
+    """
+    if FONTS:
+        return FONTS
+    with _register_lock:
+        if FONTS:
+            return FONTS
+        fonts = {}
+        for name, filename in INTER_FAMILY.items():
+            font = TTFont(name, os.path.join(FONT_PATH, filename))
+            pdfmetrics.registerFont(font)
+            fonts[name] = font
+        pdfmetrics.registerFontFamily('Inter', normal='Inter', bold='Inter-Bold',
+                                      italic='Inter-Italic', boldItalic='Inter-BoldItalic')
+        for name, font in fonts.items():
+            FONT_METRICS[name] = (font.face.charWidths, font.face.defaultWidth)
+        # Publish last so readers never see a half-built registry
+        FONTS.update(fonts)
+        logger.info(f"Registered fonts: {', '.join(FONTS)}")
+    return FONTS
+
+def get_font(font_name):
+    """Return the preparsed TTFont registered under font_name."""
+    return register_fonts()[font_name]
+
+def string_width(text, font_name, font_size):
+    """Width of text in points using the preparsed metrics (same result as pdfmetrics.stringWidth)."""
+    if font_name not in FONT_METRICS:
+        return pdfmetrics.stringWidth(text, font_name, font_size)
+    char_widths, default_width = FONT_METRICS[font_name]
+    get = char_widths.get
+    return 0.001 * font_size * sum(get(ord(char), default_width) for char in text)
+
+# Load at import so gunicorn --preload parses the fonts once in the master
+# and workers share the pages copy-on-write.
+register_fonts()
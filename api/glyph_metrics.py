@@ -0,0 +1,73 @@
+import threading
+import numpy as np
+from reportlab.pdfbase import pdfmetrics
+from .fonts import FONT_METRICS, register_fonts
+
+# Font name -> float64 array of advance widths (in 1/1000 em) indexed by code point.
+# Code points past the end of the table use the font's default width.
+_advance_tables = {}
+_tables_lock = threading.Lock()
+
+def advance_table(font_name):
+    """Return (advances, default_width) for a registered TrueType font, built once per process."""
+    table = _advance_tables.get(font_name)
+    if table is None:
+        register_fonts()
+        char_widths, default_width = FONT_METRICS[font_name]
+        with _tables_lock:
+            table = _advance_tables.get(font_name)
+            if table is None:
+                advances = np.full(max(char_widths) + 1, default_width, dtype=np.float64)
+                advances[np.fromiter(char_widths.keys(), dtype=np.int64)] = np.fromiter(char_widths.values(), dtype=np.float64)
+                advances.setflags(write=False)
+                table = _advance_tables[font_name] = (advances, default_width)
+    return table
+
+def _code_points(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+def glyph_advances(text, font_name):
+    """Per-character advance widths of text at font size 1 as a NumPy array."""
+    advances, default_width = advance_table(font_name)
+    codes = _code_points(text)
+    in_table = codes < len(advances)
+    return np.where(in_table, advances[np.where(in_table, codes, 0)], default_width) * 0.001
+
+def measure(strings, font_name, font_size=1):
+    """
+    Widths of many strings in one vectorized pass. Returns a float64 array with one width
+    per string, identical (to floating point rounding) to pdfmetrics.stringWidth.
+    """
+    if font_name not in FONT_METRICS:
+        return np.array([pdfmetrics.stringWidth(s, font_name, font_size) for s in strings], dtype=np.float64)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    if not len(lengths):
+        return np.zeros(0, dtype=np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(glyph_advances(''.join(strings), font_name))))
+    ends = np.cumsum(lengths)
+    return (cumulative[ends] - cumulative[ends - lengths]) * font_size
+
+def string_width(text, font_name, font_size):
+    """Width of a single string in points."""
+    if font_name not in FONT_METRICS:
+        return pdfmetrics.stringWidth(text, font_name, font_size)
+    return float(glyph_advances(text, font_name).sum()) * font_size
+
+def break_lines(widths, space_width, max_width):
+    """
+    Greedy line breaking over word widths (all at the same font size), vectorized with a
+    prefix sum: each line end is found with one binary search instead of a per-word loop.
+    Returns a list of (start, end) word index ranges, one per line.
+    """
+    count = len(widths)
+    # prefix[i] is the width of words [0, i) with a trailing space after each word
+    prefix = np.concatenate(([0.0], np.cumsum(np.asarray(widths, dtype=np.float64) + space_width)))
+    lines = []
+    start = 0
+    while start < count:
+        # Words [start, end) fit when prefix[end] - prefix[start] - space_width <= max_width
+        end = int(np.searchsorted(prefix, prefix[start] + max_width + space_width, side='right')) - 1
+        end = min(max(end, start + 1), count)
+        lines.append((start, end))
+        start = end
+    return lines
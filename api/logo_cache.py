@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from io import BytesIO
+import requests
+from requests.adapters import HTTPAdapter
+from cachetools import LRUCache
+from PIL import Image
+from reportlab.graphics import renderPM
+from svglib.svglib import svg2rlg
+from .cache_paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+TICKER_LOGO_URL = "https://storage.googleapis.com/sectorsapp/logo/{code}.webp"
+
+LOGO_MAX_SIZE = 256                                                        # px, longest side
+LOGO_MEMORY_CACHE_SIZE = int(os.environ.get('LOGO_MEMORY_CACHE_SIZE', 256))  # entries
+LOGO_FRESH_SECONDS = int(os.environ.get('LOGO_FRESH_SECONDS', 7 * 24 * 3600))  # before revalidating
+LOGO_NEGATIVE_SECONDS = int(os.environ.get('LOGO_NEGATIVE_SECONDS', 24 * 3600))  # remember 404s this long
+LOGO_TIMEOUT = (5, 10)                                                     # connect, read seconds
+
+def normalize_logo(content, content_type='', url=''):
+    """
+    Decode a downloaded logo (SVG, WebP, PNG, JPEG, ...) and return it resized to at most
+    LOGO_MAX_SIZE px as PNG (when it has transparency) or JPEG bytes.
+    """
+    if 'svg' in content_type or url.lower().endswith('.svg'):
+        # Convert SVG to a raster (PNG) image in memory
+        drawing = svg2rlg(BytesIO(content))
+        png_io = BytesIO()
+        renderPM.drawToFile(drawing, png_io, fmt='PNG')
+        png_io.seek(0)
+        image = Image.open(png_io)
+    else:
+        image = Image.open(BytesIO(content))
+
+    image.thumbnail((LOGO_MAX_SIZE, LOGO_MAX_SIZE), Image.LANCZOS)
+    output = BytesIO()
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image.convert('RGBA').save(output, format='PNG', optimize=True)
+    else:
+        image.convert('RGB').save(output, format='JPEG', quality=90, optimize=True)
+    return output.getvalue()
+
+class LogoCache:
+    """
+    Logo cache keyed by ticker or URL.
+
+    Normalized images are stored on disk content-addressed (blobs/<sha256>), with one small
+    JSON record per key holding the digest and the ETag/Last-Modified validators. An
+    in-memory LRU sits in front of the disk. Expired entries are revalidated with a
+    conditional GET, and 404s are remembered for LOGO_NEGATIVE_SECONDS.
+    """
+    def __init__(self):
+        self._memory = LRUCache(maxsize=LOGO_MEMORY_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = 'CompanyReportGenerator/1.0 (contact@example.com)'
+            self._session = session
+        return self._session
+
+    def _record_path(self, key):
+        return cache_path('logos', 'index', hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _blob_path(self, digest):
+        return cache_path('logos', 'blobs', digest)
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    def _load(self, key):
+        """Return (record, image bytes) from memory or disk, or (None, None)."""
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+
+        try:
+            with open(self._record_path(key), 'r') as file:
+                record = json.load(file)
+            image = None
+            if record.get('digest'):
+                with open(self._blob_path(record['digest']), 'rb') as file:
+                    image = file.read()
+        except (OSError, ValueError):
+            return None, None
+
+        with self._lock:
+            self._memory[key] = (record, image)
+        return record, image
+
+    def _store(self, key, record, image):
+        if image is not None:
+            digest = hashlib.sha256(image).hexdigest()
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                self._write_atomic(blob_path, image)
+            record['digest'] = digest
+        else:
+            record['digest'] = None
+        self._write_atomic(self._record_path(key), json.dumps(record).encode('utf-8'))
+        with self._lock:
+            self._memory[key] = (record, image)
+
+    def fetch(self, url, key=None, force=False):
+        """
+        Return (status, image bytes) for a logo, where status is one of 'cached', 'revalidated',
+        'downloaded', 'missing' (negative cache or 404) or 'error'. Image bytes are None when
+        no logo is available.
+        """
+        key = key or f"url:{url}"
+        record, image = self._load(key)
+        now = time.time()
+
+        if record is not None and not force:
+            age = now - record.get('fetched_at', 0)
+            if record.get('digest') is None and age < LOGO_NEGATIVE_SECONDS:
+                return 'missing', None
+            if record.get('digest') is not None and age < LOGO_FRESH_SECONDS:
+                return 'cached', image
+
+        headers = {}
+        if record is not None and image is not None:
+            if record.get('etag'):
+                headers['If-None-Match'] = record['etag']
+            if record.get('last_modified'):
+                headers['If-Modified-Since'] = record['last_modified']
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=LOGO_TIMEOUT, allow_redirects=True)
+            if response.status_code == 304 and image is not None:
+                record['fetched_at'] = now
+                self._store(key, record, image)
+                return 'revalidated', image
+            if response.status_code in (404, 410):
+                self._store(key, {'url': url, 'fetched_at': now, 'status': response.status_code}, None)
+                return 'missing', None
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Logo download failed for {url}: {e}")
+            # Serve a stale copy rather than nothing; transient errors are not negative-cached
+            return 'error', image
+
+        try:
+            image = normalize_logo(response.content, response.headers.get('Content-Type', ''), url)
+        except Exception as e:
+            # The same bytes would fail again on every report; remember it like a 404
+            logger.warning(f"Logo at {url} could not be decoded: {e}")
+            self._store(key, {'url': url, 'fetched_at': now, 'status': 'undecodable'}, None)
+            return 'missing', None
+
+        self._store(key, {
+            'url': url,
+            'fetched_at': now,
+            'status': response.status_code,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }, image)
+        return 'downloaded', image
+
+    def lookup(self, key, negative_seconds=LOGO_NEGATIVE_SECONDS):
+        """
+        (status, image bytes) stored under key, without touching the network: ('cached',
+        image) while fresh, ('missing', None) for a "no logo" record younger than
+        negative_seconds, and (None, None) when nothing usable is known.
+        """
+        record, image = self._load(key)
+        if record is None:
+            return None, None
+        age = time.time() - record.get('fetched_at', 0)
+        if image is None:
+            return ('missing', None) if age < negative_seconds else (None, None)
+        return ('cached', image) if age < LOGO_FRESH_SECONDS else (None, None)
+
+    def peek(self, key):
+        """Image bytes stored under key if they are still fresh, without touching the network."""
+        return self.lookup(key)[1]
+
+    def remember(self, key, image, url=None):
+        """
+        Store an already normalized image under an extra key (e.g. a company name).
+        image None records that there is no logo (see lookup).
+        """
+        self._store(key, {'url': url, 'fetched_at': time.time(), 'status': 'alias' if image is not None else 'none'}, image)
+
+    def get(self, url, key=None):
+        """Normalized logo bytes for url, or None if there is no usable logo."""
+        return self.fetch(url, key)[1]
+
+    def get_ticker_logo(self, ticker, force=False):
+        """Normalized logo bytes for an IDX ticker ("BBCA" or "BBCA.JK"), or None."""
+        code = ticker[:4].upper()
+        return self.fetch(TICKER_LOGO_URL.format(code=code), key=f"ticker:{code}", force=force)
+
+logo_cache = LogoCache()
+
+def get_ticker_logo(ticker):
+    return logo_cache.get_ticker_logo(ticker)[1]
+
+def get_logo(url):
+    return logo_cache.get(url)
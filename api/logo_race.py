@@ -0,0 +1,227 @@
+import os
+import logging
+import threading
+from io import BytesIO
+from functools import partial
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import Future
+from bs4 import BeautifulSoup
+from PIL import Image
+from .company_cache import normalize_company_name
+from .fetch_stage import get_fetch_executor
+from .logo_cache import logo_cache
+
+logger = logging.getLogger(__name__)
+
+LOGO_MIN_SIZE = 32               # px, shortest side; smaller images are favicons, not logos
+PAGE_TIMEOUT = (3, 5)            # connect, read seconds
+PAGE_MAX_BYTES = 512 * 1024      # <head> is all we need
+# A company found to have no logo is not searched for again for this long
+COMPANY_LOGO_NEGATIVE_SECONDS = int(os.environ.get('COMPANY_LOGO_NEGATIVE_SECONDS', 7 * 24 * 3600))
+# Search result hosts that are never the company's own website
+AGGREGATOR_HOSTS = ('linkedin.com', 'licdn.com', 'bloomberg.com', 'idnfinancials.com')
+
+def company_logo_key(company_name):
+    return f"company:{normalize_company_name(company_name)}"
+
+def cached_company_logo(company_name):
+    """
+    (known, image) from the logo cache: known is True when a logo, or the fact that the
+    company has none, is cached, so no search is needed.
+    """
+    status, image = logo_cache.lookup(company_logo_key(company_name), COMPANY_LOGO_NEGATIVE_SECONDS)
+    return status is not None, image
+
+def remember_company_logo(company_name, image):
+    """
+    Cache the final logo lookup for a company under its name, including "no logo" (None),
+    so later reports skip both the race and the fallback search. Returns image.
+    """
+    try:
+        logo_cache.remember(company_logo_key(company_name), image)
+    except OSError as e:
+        logger.warning(f"Could not cache logo for '{company_name}': {e}")
+    return image
+
+def is_valid_logo(image):
+    if not image:
+        return False
+    try:
+        with Image.open(BytesIO(image)) as img:
+            return min(img.size) >= LOGO_MIN_SIZE
+    except Exception:
+        return False
+
+def _host(url):
+    return (urlparse(url).hostname or '').lower()
+
+def _is_aggregator(url):
+    host = _host(url)
+    return any(host == domain or host.endswith('.' + domain) for domain in AGGREGATOR_HOSTS)
+
+def _image_urls(search_results):
+    # Tavily returns plain URLs, or dicts when image descriptions are requested
+    for image in search_results.get('images', []):
+        url = image.get('url') if isinstance(image, dict) else image
+        if url:
+            yield url
+
+def page_image_urls(page_url):
+    """og:image, apple-touch-icon and icon URLs declared by an HTML page, best first."""
+    response = logo_cache.session.get(page_url, timeout=PAGE_TIMEOUT, stream=True)
+    try:
+        response.raise_for_status()
+        html = response.raw.read(PAGE_MAX_BYTES, decode_content=True)
+        base_url = response.url
+    finally:
+        response.close()
+
+    soup = BeautifulSoup(html, 'html.parser')
+    urls = []
+    for name in ('og:image', 'og:image:secure_url', 'twitter:image'):
+        tag = soup.find('meta', attrs={'property': name}) or soup.find('meta', attrs={'name': name})
+        if tag and tag.get('content'):
+            urls.append(tag['content'])
+    for rel in ('apple-touch-icon', 'icon'):
+        for tag in soup.find_all('link', href=True):
+            if rel in [value.lower() for value in tag.get('rel', [])]:
+                urls.append(tag['href'])
+    urls.append('/favicon.ico')
+
+    resolved = []
+    for url in urls:
+        url = urljoin(base_url, url.strip())
+        if url not in resolved:
+            resolved.append(url)
+    return resolved
+
+def _first_valid(urls, cancelled):
+    """(url, image) for the first URL that yields a usable logo, or None."""
+    for url in urls:
+        if cancelled.is_set():
+            return None
+        image = logo_cache.get(url)
+        if is_valid_logo(image):
+            return url, image
+    return None
+
+def linkedin_candidate(search_results, cancelled):
+    """LinkedIn `company-logo` images from the search, then the og:image of the company page."""
+    found = _first_valid([url for url in _image_urls(search_results) if 'company-logo' in url], cancelled)
+    if found:
+        return found
+    for result in search_results.get('results', []):
+        url = result.get('url', '')
+        if 'linkedin.com/company/' in url and not cancelled.is_set():
+            found = _first_valid([u for u in page_image_urls(url) if 'company-logo' in u], cancelled)
+            if found:
+                return found
+    return None
+
+def site_candidate(search_results, cancelled):
+    """og:image / touch icon / favicon of the company's own website among the search results."""
+    sites = []
+    for result in search_results.get('results', []):
+        url = result.get('url', '')
+        if url and not _is_aggregator(url):
+            parsed = urlparse(url)
+            site = f"{parsed.scheme}://{parsed.netloc}/"
+            if site not in sites:
+                sites.append(site)
+    for site in sites:
+        if cancelled.is_set():
+            return None
+        found = _first_valid(page_image_urls(site), cancelled)
+        if found:
+            return found
+    return None
+
+CANDIDATES = (
+    ('linkedin', linkedin_candidate),
+    ('site', site_candidate),
+)
+
+class LogoRace:
+    """
+    Races the candidate logo sources for one company on the fetch pool. The first candidate
+    to produce a valid image wins; the others are cancelled (queued ones never start, running
+    ones stop before their next download). `result` resolves to the winning image bytes, or
+    None once every candidate has come up empty.
+    """
+    def __init__(self, company_name):
+        self.company_name = company_name
+        self.result = Future()
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._futures = []
+        self._remaining = 0
+        self._finished = False
+
+    def _finish(self, image):
+        with self._lock:
+            if self._finished:
+                return False
+            self._finished = True
+        self.cancelled.set()
+        for future in self._futures:
+            future.cancel()
+        self.result.set_result(image)
+        return True
+
+    def start(self, search_results):
+        candidates = CANDIDATES if search_results else ()
+        if not candidates:
+            self._finish(None)
+            return
+        self._remaining = len(candidates)
+        executor = get_fetch_executor()
+        futures = [(name, executor.submit(candidate, search_results, self.cancelled)) for name, candidate in candidates]
+        self._futures = [future for _, future in futures]
+        # Callbacks are attached last: they may run straight away for futures that are already done
+        for name, future in futures:
+            future.add_done_callback(partial(self._on_done, name))
+
+    def _on_done(self, name, future):
+        outcome = None
+        if not future.cancelled():
+            try:
+                outcome = future.result()
+            except Exception as e:
+                logger.info(f"Logo candidate '{name}' for '{self.company_name}' failed: {e}")
+
+        with self._lock:
+            self._remaining -= 1
+            exhausted = self._remaining == 0
+
+        if outcome is not None:
+            url, image = outcome
+            if self._finish(image):
+                remember_company_logo(self.company_name, image)
+                logger.info(f"Logo for '{self.company_name}' resolved speculatively via {name}: {url}")
+        elif exhausted and self._finish(None):
+            logger.info(f"No speculative logo for '{self.company_name}'; falling back to the post-summary lookup")
+
+def start_logo_race(company_name, search):
+    """
+    Start resolving a company logo before the company summary exists. `search` is the
+    report's SharedCall for the first Tavily search. A cached logo (or cached absence of
+    one) answers immediately without touching the network. Returns a Future of image
+    bytes or None.
+    """
+    known, cached = cached_company_logo(company_name)
+    if known:
+        future = Future()
+        future.set_result(cached)
+        return future
+
+    race = LogoRace(company_name)
+
+    def on_search(done):
+        if done.exception() is not None:
+            logger.info(f"Logo race for '{company_name}' has no search results: {done.exception()}")
+            race.start(None)
+        else:
+            race.start(done.result())
+
+    search.future().add_done_callback(on_search)
+    return race.result
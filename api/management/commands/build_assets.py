@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api.assets import build_assets, ASSET_DPI
+
+class Command(BaseCommand):
+    help = "Build the page-resolution variants of the report images in api/asset"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dpi', type=int, default=ASSET_DPI, help=f"Target resolution at the drawn size (default: {ASSET_DPI})")
+        parser.add_argument('--force', action='store_true', help="Rebuild even if a variant is up to date")
+
+    def handle(self, *args, **options):
+        results = build_assets(force=options['force'], dpi=options['dpi'])
+        for name, (entry, rebuilt) in results.items():
+            state = 'built' if rebuilt else 'up to date'
+            self.stdout.write(f"  {name}: {entry['width']}x{entry['height']} ({state})")
+        self.stdout.write(self.style.SUCCESS(f"{sum(rebuilt for _, rebuilt in results.values())} of {len(results)} asset variants rebuilt"))
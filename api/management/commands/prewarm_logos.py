@@ -0,0 +1,30 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from api.company_descriptions import get_description_store
+from api.logo_cache import logo_cache
+
+class Command(BaseCommand):
+    help = "Download, normalize and cache the logo of every ticker in companiesDesc.json"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent downloads (default: 8)")
+        parser.add_argument('--force', action='store_true', help="Re-download even if a fresh copy is cached")
+
+    def handle(self, *args, **options):
+        codes = sorted({ticker[:4] for ticker in get_description_store().tickers()})
+        self.stdout.write(f"Prewarming logos for {len(codes)} tickers...")
+
+        def prewarm(code):
+            status, _ = logo_cache.get_ticker_logo(code, force=options['force'])
+            return code, status
+
+        counts = Counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for code, status in executor.map(prewarm, codes):
+                counts[status] += 1
+                if status == 'error':
+                    self.stderr.write(f"  {code}: download failed")
+
+        summary = ', '.join(f"{status}: {count}" for status, count in sorted(counts.items()))
+        self.stdout.write(self.style.SUCCESS(f"Logo prewarm finished ({summary})"))
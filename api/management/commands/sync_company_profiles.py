@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.profile_snapshot import sync_snapshot, snapshot_path, SYNC_PAGE_SIZE
+
+class Command(BaseCommand):
+    help = "Bulk-copy idx_active_company_profile from Supabase into the local SQLite snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=SYNC_PAGE_SIZE,
+                            help=f"Rows fetched per Supabase request (default: {SYNC_PAGE_SIZE})")
+
+    def handle(self, *args, **options):
+        try:
+            count = sync_snapshot(page_size=options['page_size'])
+        except Exception as e:
+            raise CommandError(f"Company profile sync failed: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Synced {count} company profiles into {snapshot_path()}"))
@@ -0,0 +1,56 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.webhooks import SIGNATURE_HEADER, EVENT_HEADER, DELIVERY_HEADER, verify_signature, webhook_allowed_hosts
+
+class Command(BaseCommand):
+    help = "Run a local stand-in that receives completion webhooks, checks their signature and prints them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help="Port to listen on (default: 8765)")
+        parser.add_argument('--fail', type=int, default=0, help="Answer 503 to the first N deliveries, to exercise retries")
+
+    def handle(self, *args, **options):
+        secret = getattr(settings, 'PDF_WEBHOOK_SECRET', '')
+        if not secret:
+            self.stderr.write(self.style.WARNING("PDF_WEBHOOK_SECRET is not set; signatures cannot be checked"))
+        if '127.0.0.1' not in webhook_allowed_hosts():
+            self.stderr.write(self.style.WARNING("Add 127.0.0.1 to PDF_WEBHOOK_ALLOWED_HOSTS, or the server will refuse this callback URL"))
+        command = self
+        failures = {'left': options['fail']}
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                valid = bool(secret) and verify_signature(body, self.headers.get(SIGNATURE_HEADER, ''), secret)
+                with lock:
+                    fail = failures['left'] > 0
+                    failures['left'] -= fail
+                status = 401 if secret and not valid else 503 if fail else 200
+                command.stdout.write(
+                    f"{self.headers.get(EVENT_HEADER)} {self.headers.get(DELIVERY_HEADER)} "
+                    f"signature={'ok' if valid else 'INVALID'} -> {status}"
+                )
+                command.stdout.write(json.dumps(json.loads(body or b'null'), indent=2))
+                self.send_response(status)
+                if status == 503:
+                    self.send_header('Retry-After', '1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Listening on http://127.0.0.1:{options['port']}/ - pass it as callback_url (Ctrl-C to stop)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
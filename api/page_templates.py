@@ -0,0 +1,124 @@
+import copy
+import logging
+import threading
+from io import BytesIO
+import fitz
+from PIL import Image
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
+from .assets import asset_registry, PAGE_SIZE
+from .compression import rasterize_page, replace_image_stream, DEFAULT_IMAGE_QUALITY, DEFAULT_ZOOM
+
+logger = logging.getLogger(__name__)
+
+
+# Full-page backgrounds the dynamic pages are drawn over. Each is decoded and encoded
+# into a PDF image object once per process; a report only adds its text on top.
+TEMPLATES = ('cover', 'ticker', 'company', 'company_blank')
+
+# XObject name prefix; the compressor recognises template backgrounds by it
+TEMPLATE_PREFIX = 'PeriwatchTemplate_'
+
+_xobjects = {}
+_rasters = {}
+_template_lock = threading.Lock()
+_raster_lock = threading.Lock()
+
+def get_template_xobject(name):
+    """Return the encoded image XObject for a template, built once per process."""
+    xobject = _xobjects.get(name)
+    if xobject is None:
+        with _template_lock:
+            xobject = _xobjects.get(name)
+            if xobject is None:
+                xobject = PDFImageXObject(TEMPLATE_PREFIX + name, asset_registry.path(name))
+                _xobjects[name] = xobject
+    return xobject
+
+def warm_page_templates():
+    """Build every template and its default-quality raster ahead of the first report."""
+    for name in TEMPLATES:
+        get_template_xobject(name)
+        get_template_raster(name)
+
+def draw_page_template(pdf, name, width, height):
+    """
+    Draw a template as the page background, like drawImage(path, 0, 0, width, height)
+    but without re-reading and re-compressing the PNG for every report.
+    """
+    xobject_name = TEMPLATE_PREFIX + name
+    # canvas.beginForm() + drawImage() would re-encode the PNG for every canvas, so the
+    # prebuilt object is registered through the document's internals (addForm,
+    # getXObjectName, idToObject) instead. Checked against the pinned ReportLab by
+    # PageTemplateTests; re-run them when upgrading it.
+    doc = pdf._doc
+    if doc.getXObjectName(xobject_name) not in doc.idToObject:
+        # Registering tags the object with its name in this document, so each
+        # canvas gets its own shallow copy; the encoded stream is shared
+        doc.addForm(xobject_name, copy.copy(get_template_xobject(name)))
+    pdf.saveState()
+    pdf.scale(width, height)
+    pdf.doForm(xobject_name)
+    pdf.restoreState()
+
+def template_name(image_name):
+    """Return the template an image resource name refers to, or None."""
+    prefix = 'FormXob.' + TEMPLATE_PREFIX
+    if image_name.startswith(prefix):
+        return image_name[len(prefix):]
+    return None
+
+def template_pages(doc, page_numbers):
+    """Return the given pages that are drawn over a page template."""
+    return [
+        page_num for page_num in page_numbers
+        if any(template_name(image[7]) in TEMPLATES for image in doc[page_num].get_images(full=True))
+    ]
+
+def _build_template_raster(name, image_quality, zoom):
+    width, height = PAGE_SIZE
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    draw_page_template(pdf, name, width, height)
+    pdf.save()
+    doc = fitz.open(stream=buffer.getvalue(), filetype="pdf")
+    try:
+        jpeg = rasterize_page(doc[0], image_quality, zoom)
+    finally:
+        doc.close()
+    with Image.open(BytesIO(jpeg)) as image:
+        return jpeg, image.size
+
+def get_template_raster(name, image_quality=DEFAULT_IMAGE_QUALITY, zoom=DEFAULT_ZOOM):
+    """
+    Return (JPEG bytes, pixel size) of a template background rasterized the way the
+    compressor rasterizes pages. Built once per process per setting.
+    """
+    key = (name, image_quality, zoom)
+    raster = _rasters.get(key)
+    if raster is None:
+        with _raster_lock:
+            raster = _rasters.get(key)
+            if raster is None:
+                raster = _rasters[key] = _build_template_raster(name, image_quality, zoom)
+                logger.info(f"Template '{name}' rasterized (quality {image_quality}%, zoom {zoom}): {len(raster[0]):,} bytes")
+    return raster
+
+def swap_template_rasters(doc, page_numbers, image_quality=DEFAULT_IMAGE_QUALITY, zoom=DEFAULT_ZOOM):
+    """
+    Replace the template backgrounds used on the given pages with their cached raster,
+    leaving the text drawn over them untouched. Returns {xref: template name} of the
+    images replaced.
+    """
+    swapped = {}
+    for page_num in page_numbers:
+        for image in doc[page_num].get_images(full=True):
+            xref, smask, name = image[0], image[1], template_name(image[7])
+            if name not in TEMPLATES or xref in swapped:
+                continue
+            jpeg, size = get_template_raster(name, image_quality, zoom)
+            replace_image_stream(doc, xref, jpeg, size)
+            if smask:
+                doc.xref_set_key(xref, 'SMask', 'null')
+            swapped[xref] = name
+    return swapped
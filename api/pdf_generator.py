@@ -1,26 +1,34 @@
 import re
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib import colors
 from io import BytesIO
 import os
+import fitz
 import json
+import logging
+from concurrent import futures
 from dotenv import load_dotenv
-from supabase import create_client
 from datetime import datetime
 from reportlab.lib.utils import ImageReader
-import requests
 import re
 from PIL import Image
 from google import genai
 from tavily import TavilyClient
-from reportlab.graphics import renderPM
 from reportlab.lib.utils import ImageReader
-from svglib.svglib import svg2rlg
+from .static_pages import insert_static_pages
+from .fonts import register_fonts
+from .ticker_profiles import PROFILE_TABLE
+from .logo_cache import logo_cache
+from .fetch_stage import start_report_fetch
+from .page_templates import draw_page_template
+from .assets import asset_registry
+from .glyph_metrics import measure, string_width
+from .text_layout import TextLayout, draw_justified_lines, shrink_to_fit
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSET_PATH = os.path.join(BASE_DIR, "asset")
 tavily = TavilyClient(api_key=os.getenv('TAVILY_API_KEY'))
@@ -39,7 +47,7 @@ def draw_name_tag(c, text, x, y, padding_x=10, padding_y=6, fill_color=colors.wh
     """
     # Measure text width
     c.setFont(font_name, font_size)
-    text_width = c.stringWidth(text, font_name, font_size)
+    text_width = string_width(text, font_name, font_size)
 
     # Total width and height with padding
     rect_width = text_width + 2 * padding_x
@@ -83,7 +91,8 @@ def cover_text_generator(pdf, height, ticker, email_text, title_text, company):
         y = height - 646 - 18
 
         company = company.replace('-', ' ').title()
-        for name in [company, 'Goliath Obe Tabuni', 'Rueb Vincent']:
+        names = [company, 'Goliath Obe Tabuni', 'Rueb Vincent']
+        for name, text_width in zip(names, measure(names, "Inter", 10).tolist()):
             draw_name_tag(
                 pdf, name, x, y,
                 padding_x=10, padding_y=6,
@@ -92,14 +101,14 @@ def cover_text_generator(pdf, height, ticker, email_text, title_text, company):
                 corner_radius=5,
                 font_name="Inter", font_size=10
             )
-            text_width = pdfmetrics.stringWidth(name, "Inter", 10)
             x += text_width + 2 * 10 + 10  # tag width + spacing
     
     elif ticker != '' and company != '':
         x = 64
         y = height - 646 - 18
         company = company.replace('-', ' ').title()
-        for name in [ticker[:4], company, 'Goliath Obe Tabuni', 'Rueb Vincent']:
+        names = [ticker[:4], company, 'Goliath Obe Tabuni', 'Rueb Vincent']
+        for name, text_width in zip(names, measure(names, "Inter", 10).tolist()):
             draw_name_tag(
                 pdf, name, x, y,
                 padding_x=10, padding_y=6,
@@ -108,7 +117,6 @@ def cover_text_generator(pdf, height, ticker, email_text, title_text, company):
                 corner_radius=5,
                 font_name="Inter", font_size=10
             )
-            text_width = pdfmetrics.stringWidth(name, "Inter", 10)
             x += text_width + 2 * 10 + 10  # tag width + spacing
     
     title_text = title_text.title()
@@ -137,14 +145,8 @@ def draw_shrinking_text(pdf, text, max_width, x, y, font_name='Inter-Bold', init
     - min_font_size: Minimum font size allowed (default: 5)
     - color: Text color (default: white)
     """
-    font_size = initial_font_size
+    font_size, text_width = shrink_to_fit(text, font_name, max_width, initial_font_size, min_font_size)
     pdf.setFont(font_name, font_size)
-    text_width = pdf.stringWidth(text, font_name, font_size)
-
-    while text_width > max_width and font_size > min_font_size:
-        font_size -= 1
-        pdf.setFont(font_name, font_size)
-        text_width = pdf.stringWidth(text, font_name, font_size)
 
     pdf.setFillColor(color)
     pdf.drawString(x, y, text)
@@ -164,22 +166,15 @@ def draw_hyperlink_text(pdf, text, url, max_width, x, y, font_name='Inter-Bold',
     - min_font_size: Minimum font size allowed (default: 5)
     - color: Text color (default: white)
     """
-    font_size = initial_font_size
+    font_size, text_width = shrink_to_fit(text, font_name, max_width, initial_font_size, min_font_size)
     pdf.setFont(font_name, font_size)
-    text_width = pdf.stringWidth(text, font_name, font_size)
-
-    while text_width > max_width and font_size > min_font_size:
-        font_size -= 1
-        pdf.setFont(font_name, font_size)
-        text_width = pdf.stringWidth(text, font_name, font_size)
 
     # Draw the text
     pdf.setFillColor(color)
     pdf.drawString(x, y, text)
     
-    # Calculate the actual text width for the link area
-    actual_text_width = pdf.stringWidth(text, font_name, font_size)
-    pdf.linkURL(url, (x, y, x + actual_text_width, y + font_size))
+    # The link area covers the text at its final size
+    pdf.linkURL(url, (x, y, x + text_width, y + font_size))
 
 def draw_justified_hyperlink_text(c, text, url, x, y, max_width, max_height, font_name="Inter-Bold", initial_font_size=10, min_font_size=5, line_spacing=2):
     """
@@ -198,61 +193,11 @@ def draw_justified_hyperlink_text(c, text, url, x, y, max_width, max_height, fon
     - min_font_size: Minimum font size allowed
     - line_spacing: Additional space between lines
     """
-    font_size = initial_font_size
-
-    while font_size >= min_font_size:
-        c.setFont(font_name, font_size)
-        words = text.split()
-        line = ""
-        lines = []
-
-        # Split text into lines based on max_width
-        for word in words:
-            test_line = f"{line} {word}".strip()
-            if c.stringWidth(test_line, font_name, font_size) <= max_width:
-                line = test_line
-            else:
-                lines.append(line)
-                line = word
-        if line:
-            lines.append(line)
-
-        line_height = font_size + line_spacing
-        total_height = line_height * len(lines)
-
-        # Check if total height fits within max_height
-        if total_height <= max_height:
-            break
-        else:
-            font_size -= 1  # Shrink font and try again
+    layout = TextLayout(text, font_name)
+    font_size, lines = layout.fit(max_width, max_height, initial_font_size, min_font_size, line_spacing)
 
     # Draw lines with justification and add hyperlinks
-    current_y = y
-    for i, line in enumerate(lines):
-        line_words = line.split()
-
-        if i == len(lines) - 1 or len(line_words) == 1:
-            c.drawString(x, current_y, line)
-            # Add hyperlink for the entire line
-            line_width = c.stringWidth(line, font_name, font_size)
-            c.linkURL(url, (x, current_y, x + line_width, current_y + font_size))
-        else:
-            total_word_width = sum(c.stringWidth(word, font_name, font_size) for word in line_words)
-            space_count = len(line_words) - 1
-            if space_count > 0:
-                extra_space = (max_width - total_word_width) / space_count
-            else:
-                extra_space = 0
-
-            word_x = x
-            for word in line_words:
-                c.drawString(word_x, current_y, word)
-                word_x += c.stringWidth(word, font_name, font_size) + extra_space
-            
-            # Add hyperlink for the entire justified line
-            c.linkURL(url, (x, current_y, x + max_width, current_y + font_size))
-
-        current_y -= line_height
+    draw_justified_lines(c, layout, lines, x, y, max_width, font_size, line_spacing, url=url)
 
 def draw_justified_text(c, text, x, y, max_width, max_height, font_name="Inter-Bold", initial_font_size=10, min_font_size=5, line_spacing=2):
     """
@@ -269,107 +214,72 @@ def draw_justified_text(c, text, x, y, max_width, max_height, font_name="Inter-B
     - min_font_size: Minimum font size allowed
     - line_spacing: Additional space between lines
     """
-    font_size = initial_font_size
-
-    while font_size >= min_font_size:
-        c.setFont(font_name, font_size)
-        words = text.split()
-        line = ""
-        lines = []
-
-        # Split text into lines based on max_width
-        for word in words:
-            test_line = f"{line} {word}".strip()
-            if c.stringWidth(test_line, font_name, font_size) <= max_width:
-                line = test_line
-            else:
-                lines.append(line)
-                line = word
-        if line:
-            lines.append(line)
-
-        line_height = font_size + line_spacing
-        total_height = line_height * len(lines)
-
-        # Check if total height fits within max_height
-        if total_height <= max_height:
-            break
-        else:
-            font_size -= 1  # Shrink font and try again
+    layout = TextLayout(text, font_name)
+    font_size, lines = layout.fit(max_width, max_height, initial_font_size, min_font_size, line_spacing)
 
     # Draw lines with justification
-    for i, line in enumerate(lines):
-        line_words = line.split()
-
-        if i == len(lines) - 1 or len(line_words) == 1:
-            c.drawString(x, y, line)
-        else:
-            total_word_width = sum(c.stringWidth(word, font_name, font_size) for word in line_words)
-            space_count = len(line_words) - 1
-            if space_count > 0:
-                extra_space = (max_width - total_word_width) / space_count
-            else:
-                extra_space = 0
-
-            word_x = x
-            for word in line_words:
-                c.drawString(word_x, y, word)
-                word_x += c.stringWidth(word, font_name, font_size) + extra_space
-
-        y -= line_height
+    draw_justified_lines(c, layout, lines, x, y, max_width, font_size, line_spacing)
 
-def generate_ticker_page(pdf, ticker, height):
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_KEY")
-    supabase = create_client(url, key)
+def generate_ticker_page(pdf, ticker, height, fetch=None):
+    if fetch is None:
+        fetch = start_report_fetch(ticker, '')
 
-    ticker_profile = supabase.table("idx_active_company_profile").select("*").eq('symbol', ticker).execute()
+    profile = fetch.profile.result()
+    if profile is None:
+        raise ValueError(f"Ticker {ticker} not found in {PROFILE_TABLE}")
 
-    with open(os.path.join(ASSET_PATH,'companiesDesc.json'), 'r') as file:
-        data = json.load(file)
+    draw_shrinking_text(pdf, profile['company_name'].title(), 500, 51, 725, font_name='Inter-Bold', initial_font_size=30, min_font_size=5, color=colors.white)
 
-    draw_shrinking_text(pdf, ticker_profile.data[0]['company_name'].title(), 500, 51, 725, font_name='Inter-Bold', initial_font_size=30, min_font_size=5, color=colors.white)
+    logo = fetch.ticker_logo.result()
+    if logo is not None:
+        pdf.drawImage(ImageReader(BytesIO(logo)), 104, height-188-54, 54, 54, mask="auto")
 
-    image = ImageReader(BytesIO(requests.get(f"https://storage.googleapis.com/sectorsapp/logo/{ticker[0:4]}.webp").content))
-    pdf.drawImage(image, 104, height-188-54, 54, 54, mask="auto")
-
-    website_url = ticker_profile.data[0]['website']
+    website_url = profile['website']
     draw_hyperlink_text(pdf, website_url, website_url, 117, 251, height-217-12, font_name='Inter-Bold', initial_font_size=10, min_font_size=5, color=colors.white)
 
     pdf.setFont('Inter-Bold', 10)
-    pdf.drawString(401, height-217-12, ticker_profile.data[0]['phone'])
+    pdf.drawString(401, height-217-12, profile['phone'])
 
-    draw_justified_text(pdf, ticker_profile.data[0]['address'], 72, height-286-12, 147, 36, font_name="Inter-Bold", initial_font_size=10, min_font_size=5, line_spacing=2)
+    draw_justified_text(pdf, profile['address'], 72, height-286-12, 147, 36, font_name="Inter-Bold", initial_font_size=10, min_font_size=5, line_spacing=2)
 
-    draw_shrinking_text(pdf, ticker_profile.data[0]['industry'].title(), 117, 251, height-286-12, font_name='Inter-Bold', initial_font_size=10, min_font_size=5, color=colors.white)
+    draw_shrinking_text(pdf, profile['industry'].title(), 117, 251, height-286-12, font_name='Inter-Bold', initial_font_size=10, min_font_size=5, color=colors.white)
 
-    pdf.drawString(401, height-286-12, datetime.strptime(ticker_profile.data[0]['listing_date'], '%Y-%m-%d').strftime('%d %B %Y').title())
+    pdf.drawString(401, height-286-12, datetime.strptime(profile['listing_date'], '%Y-%m-%d').strftime('%d %B %Y').title())
 
-    draw_justified_text(pdf, data[ticker], 64, height-396-12, 464, 140, font_name="Inter", initial_font_size=14, min_font_size=5, line_spacing=2)
+    draw_justified_text(pdf, fetch.description.result(), 64, height-396-12, 464, 140, font_name="Inter", initial_font_size=14, min_font_size=5, line_spacing=2)
 
     pdf.setFont('Inter-Bold', 10)
     pdf.drawString(64, height-611-12, "Major Shareholders")
-    draw_justified_text(pdf, ', '.join(f"{s['name']} ({s['share_percentage']*100:.2f}%)" for s in ticker_profile.data[0]['shareholders']), 191, height-611-12, 348, 45, font_name="Inter", initial_font_size=10, min_font_size=5, line_spacing=2)
+    draw_justified_text(pdf, ', '.join(f"{s['name']} ({s['share_percentage']*100:.2f}%)" for s in profile['shareholders']), 191, height-611-12, 348, 45, font_name="Inter", initial_font_size=10, min_font_size=5, line_spacing=2)
 
     pdf.setFont('Inter-Bold', 10)
     pdf.drawString(64, height-668-12, "Directors")
-    draw_justified_text(pdf, ', '.join(f"{s['name']} ({s['position']})" for s in ticker_profile.data[0]['directors']), 191, height-668-12, 348, 45, font_name="Inter", initial_font_size=10, min_font_size=5, line_spacing=2)
+    draw_justified_text(pdf, ', '.join(f"{s['name']} ({s['position']})" for s in profile['directors']), 191, height-668-12, 348, 45, font_name="Inter", initial_font_size=10, min_font_size=5, line_spacing=2)
 
     pdf.setFont('Inter-Bold', 10)
     pdf.drawString(64, height-725-12, "Commissioner")
-    draw_justified_text(pdf, ', '.join(f"{s['name']} ({s['position']})" for s in ticker_profile.data[0]['comissioners']), 191, height-725-12, 348, 45, font_name="Inter", initial_font_size=10, min_font_size=5, line_spacing=2)
+    draw_justified_text(pdf, ', '.join(f"{s['name']} ({s['position']})" for s in profile['comissioners']), 191, height-725-12, 348, 45, font_name="Inter", initial_font_size=10, min_font_size=5, line_spacing=2)
 
-def get_company_info_with_tavily(company_name, model='gemini-2.5-flash'):
-    # First, search for company information using Tavily
-    search_results = tavily.search(
+def search_company_with_tavily(company_name):
+    """
+    The first Tavily search for a company. Its results feed both the Gemini summary
+    and the speculative logo race, so it is run once per report and shared.
+    """
+    return tavily.search(
         query=f"{company_name} Indonesia company or organization information (the name maybe is an abreviation, SEARCH INTENSIVELY IN INDONESIA FIRST. If not found in Indonesia, search in Southeast Asia, then globally.",
         search_depth="advanced",
         include_answer="advanced",
+        include_images=True,
+        include_image_descriptions=True,
         topic="general",
         include_domains=["linkedin.com", "bloomberg.com", f"{company_name}.com", "idnfinancials.com"],
         max_results=7,
         country="indonesia"
     )
+
+def get_company_info_with_tavily(company_name, model='gemini-2.5-flash', search=None):
+    # First, search for company information using Tavily
+    search_results = search() if search else search_company_with_tavily(company_name)
     # print("DEBUG: search_results", search_results)
     # Extract search context from Tavily results
     context = ""
@@ -444,12 +354,32 @@ def extract_company_info(response_text):
             return {}
     return {}
 
+def fetch_company_info(company_name, search=None):
+    """
+    Search and summarize a company with Tavily + Gemini. `search` returns the (shared)
+    first Tavily search results. This is the slow path; callers go through
+    company_cache.get_company_info. The logo is resolved separately by logo_race.
+    """
+    return extract_company_info(get_company_info_with_tavily(company_name, search=search))
+
 def safe_get(json, key, default='-'):
     value = json.get(key, default)
     if value is None:
         return default
     return value
 
+def company_source_links(json):
+    """Links handed to the Tavily logo search, built from the company info."""
+    website = safe_get(json, 'website')
+    social_media = safe_get(json, 'social_media', {})
+    sources = safe_get(json, 'sources', [])
+
+    if website != '-' or website != 'None':
+        source_links = website + ', ' + str(sources)
+    elif isinstance(social_media, dict) and social_media.get('linkedin'):
+        source_links = 'https://www.linkedin.com/company/' + str(social_media.get('linkedin')) + ', ' + str(sources)
+    return source_links[:291]
+
 def get_company_image_with_tavily(links):
     search_results = tavily.search(
         query=f"From '{links}'. It's about company in Indonesia (or Southeast Asia), provide its official logo URL from the links.",
@@ -466,10 +396,39 @@ def get_company_image_with_tavily(links):
             return url
     return '-'
 
-def generate_company_page(pdf, height, json):
+class LogoUnavailable(Exception):
+    """The logo lookup failed in a way that may not last (network error, timeout, 5xx)."""
+
+def resolve_company_logo(json):
+    """
+    Normalized logo image bytes for a company, or None when it has no logo (nothing
+    found, or the image is gone or undecodable). Raises LogoUnavailable when the search
+    or download failed transiently, so that is never remembered as "no logo".
+    Uses a logo URL cached with the company info, falling back to a Tavily search.
+    This runs after Gemini, only when the speculative logo race found nothing.
+    """
+    logo = json.get('logo_url')
+    if logo is None:
+        try:
+            logo = get_company_image_with_tavily(company_source_links(json))
+        except Exception as e:
+            raise LogoUnavailable(f"Logo search failed: {e}") from e
+    # print("DEBUG: logo link ", logo)
+    if not logo or logo == '-':
+        return None
+    # Downloaded, normalized and resized once, then served from the logo cache
+    status, image = logo_cache.fetch(logo)
+    if status == 'error' and image is None:
+        raise LogoUnavailable(f"Logo download failed for {logo}")
+    return image
+
+# Default of generate_company_page's logo_image: None means "no logo was found"
+_UNSET = object()
+
+def generate_company_page(pdf, height, json, logo_image=_UNSET):
     # print("DEBUG: json finished")
     # print(json)
-    pdf.drawImage(os.path.join(ASSET_PATH, 'company.png'), 0, 0, 595, 842)
+    draw_page_template(pdf, 'company', 595, 842)
     
     company_name = safe_get(json, 'company_name')
     summary = safe_get(json, 'summary')
@@ -490,78 +449,48 @@ def generate_company_page(pdf, height, json):
     sources = safe_get(json, 'sources', [])
     # print("DEBUG: get all data finished")
 
-    if website != '-' or website != 'None':
-        source_links = website + ', ' + str(sources)
-    elif isinstance(social_media, dict) and social_media.get('linkedin'):
-        source_links = 'https://www.linkedin.com/company/' + str(social_media.get('linkedin')) + ', ' + str(sources)
-    source_links = source_links[:291]
-    
-    # print("DEBUG: source_links", source_links)
-
-    logo = get_company_image_with_tavily(source_links)
-    # print("DEBUG: logo link ", logo)
+    # The fetch stage normally resolves the logo alongside the other data
+    if logo_image is _UNSET:
+        try:
+            logo_image = resolve_company_logo(json)
+        except LogoUnavailable as e:
+            logger.warning(f"The image cannot be loaded: {e}")
+            logo_image = None
 
     draw_shrinking_text(pdf, company_name, 500, 51, 725, font_name='Inter-Bold', initial_font_size=30, min_font_size=5, color=colors.white)
 
     # Draw logo if available
-    if logo and logo != '-':
-        image_url = logo
-
+    if logo_image is not None:
         try:
-            headers = {'User-Agent': 'CompanyReportGenerator/1.0 (contact@example.com)'}
-            img_resp = requests.get(image_url, allow_redirects=True, stream=True, timeout=10, headers=headers)
-            
-            if img_resp.status_code == 200:
-                content_type = img_resp.headers.get('Content-Type', '')
-                image_content = img_resp.content
-
-                if 'svg' in content_type or logo.lower().endswith('.svg'):
-                    # Convert SVG to ReportLab Drawing
-                    svg_io = BytesIO(image_content)
-                    drawing = svg2rlg(svg_io)
-
-                    # Render drawing to a raster (PNG) image in memory
-                    png_io = BytesIO()
-                    renderPM.drawToFile(drawing, png_io, fmt='PNG')
-                    png_io.seek(0)
-
-                    # Load PNG into reportlab and PIL
-                    image = ImageReader(png_io)
-                    img_for_size = Image.open(png_io)
-                else:
-                    image = ImageReader(BytesIO(image_content))
-                    img_for_size = Image.open(BytesIO(image_content))
+            image = ImageReader(BytesIO(logo_image))
 
-                # Calculate dimensions for the image
-                original_width, original_height = img_for_size.size
-                max_width = 100
-                max_height = 100
-                ratio = min(max_width / original_width, max_height / original_height)
-                new_width = original_width * ratio
-                new_height = original_height * ratio
-                x_pos = 100 + (max_width - new_width) / 2
-                y_pos = (height - 248 - 54) + (max_height - new_height) / 2
+            # Calculate dimensions for the image
+            original_width, original_height = image.getSize()
+            max_width = 100
+            max_height = 100
+            ratio = min(max_width / original_width, max_height / original_height)
+            new_width = original_width * ratio
+            new_height = original_height * ratio
+            x_pos = 100 + (max_width - new_width) / 2
+            y_pos = (height - 248 - 54) + (max_height - new_height) / 2
 
-                pdf.drawImage(image, x_pos, y_pos, new_width, new_height, mask="auto")
+            pdf.drawImage(image, x_pos, y_pos, new_width, new_height, mask="auto")
 
         except Exception as e:
             print(f"The image cannot be loaded: {e}")
     else:
         # Draw periwatch logo if company logo isn't available
-        img_path = os.path.join(ASSET_PATH, 'periwatch.png')
-        if os.path.exists(img_path):
-            image = ImageReader(img_path)
-            img_for_size = Image.open(img_path)
-            original_width, original_height = img_for_size.size
-            max_width = 90
-            max_height = 90
-            ratio = min(max_width / original_width, max_height / original_height)
-            new_width = original_width * ratio
-            new_height = original_height * ratio
-            x_pos = 105 + (max_width - new_width) / 2
-            y_pos = (height - 242 - 54) + (max_height - new_height) / 2
-
-            pdf.drawImage(image, x_pos, y_pos, new_width, new_height, mask="auto")
+        image = asset_registry.reader('periwatch')
+        original_width, original_height = asset_registry.size('periwatch')
+        max_width = 90
+        max_height = 90
+        ratio = min(max_width / original_width, max_height / original_height)
+        new_width = original_width * ratio
+        new_height = original_height * ratio
+        x_pos = 105 + (max_width - new_width) / 2
+        y_pos = (height - 242 - 54) + (max_height - new_height) / 2
+
+        pdf.drawImage(image, x_pos, y_pos, new_width, new_height, mask="auto")
 
     # Website
     if website != 'None' and website != '-':
@@ -644,20 +573,10 @@ def generate_company_page(pdf, height, json):
             # Set font for bullet point and text
             pdf.setFont("Inter", 10)
             
-            # Calculate text width to wrap it
+            # Wrap the text using the shared layout engine
             max_width = 464
-            lines = []
-            words = fact.split()
-            current_line = ""
-            
-            for word in words:
-                test_line = f"{current_line} {word}".strip()
-                if pdf.stringWidth(test_line, "Inter", 10) <= max_width:
-                    current_line = test_line
-                else:
-                    lines.append(current_line)
-                    current_line = word
-            lines.append(current_line)
+            layout = TextLayout(fact, "Inter")
+            lines = [layout.line_text(line) for line in layout.lines_at(10, max_width)]
             
             # Draw the lines
             for i, line in enumerate(lines):
@@ -670,47 +589,79 @@ def generate_company_page(pdf, height, json):
             
             y_position -= 6 # Add extra space between facts
 
-def generate_pdf(title_text, email_text, ticker, company):
+def render_data_pages(ticker, company, on_stage=None):
+    """
+    Fetch the report data and render the ticker and company pages. These depend only on
+    (ticker, company), so concurrent reports for the same inputs can share them (see
+    report_flights in tasks). on_stage, if given, is called with 'fetching' and then
+    'rendering'. Returns the pages as PDF bytes, or None if there are none.
+    """
+    if ticker == '' and company == '':
+        return None
+
+    # Start every independent fetch now; the pages below wait only for what they draw
+    if on_stage:
+        on_stage('fetching')
+    fetch = start_report_fetch(ticker, company)
+    if on_stage:
+        # 'rendering' starts once the first page has its data; later pages still wait
+        # only for their own fetches
+        futures.wait([fetch.profile if ticker != '' else fetch.company_info])
+        on_stage('rendering')
+
     buffer = BytesIO()
     width, height = 595, 842
 
-    pdfmetrics.registerFont(TTFont('Inter', os.path.join(ASSET_PATH, "font/Inter-Regular.ttf")))
-    pdfmetrics.registerFont(TTFont('Inter-Bold', os.path.join(ASSET_PATH, "font/Inter-Bold.ttf")))
+    register_fonts()
     pdf = canvas.Canvas(buffer, pagesize=(width, height))
 
-    # Cover Page
-    pdf.drawImage(os.path.join(ASSET_PATH,'cover.png'), 0, 0, width, height)
-    
-    if company != '':
-        cover_text_generator(pdf, height, ticker, email_text, title_text, company)
-    else:
-        cover_text_generator(pdf, height, ticker, email_text, title_text, '')
-    pdf.showPage()
-
     # Ticker page
     if ticker != '':
-        pdf.drawImage(f'api/asset/ticker.png', 0, 0, width, height)
-        generate_ticker_page(pdf, ticker, height)
+        draw_page_template(pdf, 'ticker', width, height)
+        generate_ticker_page(pdf, ticker, height, fetch)
         pdf.showPage()
 
     if company != '':
-        generate_company_page(pdf, 842, extract_company_info(get_company_info_with_tavily(company)))
+        generate_company_page(pdf, 842, fetch.company_info.result(), logo_image=fetch.company_logo.result())
         # json_dummy = {'company_name': 'The Audit Board of Indonesia (BPK RI)', 'summary': "The Audit Board of Indonesia (BPK RI) is a prominent government administration body responsible for independently auditing state financial management and accountability. Its core mission is to implement good governance by upholding integrity, independence, and professionalism in its operations. The organization specializes in crucial areas such as audit, investigation, finance, government, and performance evaluations, playing a vital role in ensuring transparency and accountability in national financial affairs. BPK RI acts as a critical oversight mechanism for public funds.\n\nFounded in 1947, BPK RI has established itself as a cornerstone of Indonesia's financial governance, aiming to be a driving force in state financial management to achieve national goals through high-quality and value-added audits. With a significant workforce of over 10,001 employees, it is one of the largest government bodies in Indonesia, demonstrating its extensive reach and impact. The institution's commitment to its vision ensures that state financial practices are scrutinized to foster national development and uphold public trust. Its influence extends across all levels of government finance.", 'website': None, 'address': 'Jakarta Pusat, DKI Jakarta', 'industry': 'Government Administration', 'sector': 'Government', 'inception': '1947', 'primary_product_service': {'product': None, 'service': 'Audit, Investigation, Financial Oversight'}, 'main_target_market': 'Indonesian government entities and public financial management', 'social_media': {'linkedin': 'the-audit-board-of-indonesia-bpk-ri-', 'x': None}, 'ceo_or_key_person': None, 'interesting_facts': ['It is the supreme audit institution of Indonesia, responsible for auditing the financial management of the state.', 'Established in 1947, BPK RI has a long-standing history that predates the formal independence of many modern nations, highlighting its foundational role in Indonesian governance.', 'Its core values of integrity, independence, and professionalism are explicitly stated as integral to its mission, ensuring unbiased financial oversight.'], 'is_company': False, 'sources': ['https://ca.linkedin.com/company/the-audit-board-of-indonesia-bpk-ri-?trk=public_profile_experience-item_profile-section-card_subtitle-click', 'https://si.linkedin.com/company/the-audit-board-of-indonesia-bpk-ri-', 'https://za.linkedin.com/company/the-audit-board-of-indonesia-bpk-ri-?trk=similar-pages_result-card_full-click']}
         # generate_company_page(pdf, 842, json_dummy)
         pdf.showPage()
 
-    # Page 1
-    pdf.drawImage(os.path.join(ASSET_PATH,'goliath.png'), 0, 0, width, height)
-    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
 
-    # Page 2
-    pdf.drawImage(os.path.join(ASSET_PATH,'vincent.png'), 0, 0, width, height)
-    pdf.showPage()
+def stamp_report(title_text, email_text, ticker, company, data_pages):
+    """
+    Assemble one recipient's report: their cover, the shared data pages from
+    render_data_pages and the precompiled static pages. Returns a PDF buffer.
+    """
+    buffer = BytesIO()
+    width, height = 595, 842
 
-    # CTA
-    pdf.drawImage(os.path.join(ASSET_PATH,'cta.png'), 0, 0, width, height)
-    pdf.showPage()
+    register_fonts()
+    pdf = canvas.Canvas(buffer, pagesize=(width, height))
 
+    # Cover Page
+    draw_page_template(pdf, 'cover', width, height)
+    
+    if company != '':
+        cover_text_generator(pdf, height, ticker, email_text, title_text, company)
+    else:
+        cover_text_generator(pdf, height, ticker, email_text, title_text, '')
+    pdf.showPage()
     pdf.save()
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+
+    doc = fitz.open(stream=buffer.getvalue(), filetype="pdf")
+    try:
+        if data_pages:
+            with fitz.open(stream=data_pages, filetype="pdf") as data:
+                doc.insert_pdf(data)
+        # Profile pages and CTA come from the precompiled static bundle
+        insert_static_pages(doc)
+        report = BytesIO(doc.tobytes())
+    finally:
+        doc.close()
+    return report
+
+def generate_pdf(title_text, email_text, ticker, company):
+    return stamp_report(title_text, email_text, ticker, company, render_data_pages(ticker, company))
\ No newline at end of file
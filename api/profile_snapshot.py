@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from django.conf import settings
+from .cache_paths import cache_path
+from .ticker_profiles import get_supabase_client, clear_profile_cache, PROFILE_TABLE, TICKER_PROFILE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILENAME = 'company_profiles.sqlite3'
+SYNC_PAGE_SIZE = 500
+
+_local = threading.local()
+_refresher_lock = threading.Lock()
+_refresher_pid = None
+
+def snapshot_path():
+    return cache_path(SNAPSHOT_FILENAME)
+
+def _connect():
+    """One SQLite connection per thread; WAL lets readers continue during a sync."""
+    connection = getattr(_local, 'connection', None)
+    if connection is None or getattr(_local, 'pid', None) != os.getpid():
+        connection = sqlite3.connect(snapshot_path(), timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " symbol TEXT PRIMARY KEY,"  # the primary key doubles as the symbol index
+            " data TEXT NOT NULL,"
+            " synced_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        connection.commit()
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return connection
+
+def get_snapshot_profile(symbol, max_age=None):
+    """
+    Profile row from the local snapshot, or None when the symbol is not in it or its row
+    was synced more than max_age seconds ago (default PROFILE_SNAPSHOT_MAX_AGE_SECONDS;
+    0 accepts any age).
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'PROFILE_SNAPSHOT_MAX_AGE_SECONDS', 24 * 3600)
+    row = _connect().execute("SELECT data, synced_at FROM profiles WHERE symbol = ?", (symbol,)).fetchone()
+    if row is None or (max_age and row[1] < time.time() - max_age):
+        return None
+    return json.loads(row[0])
+
+def store_snapshot_profile(profile):
+    """Insert or replace a single row, e.g. one fetched from Supabase after a snapshot miss."""
+    connection = _connect()
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO profiles (symbol, data, synced_at) VALUES (?, ?, ?)",
+            (profile['symbol'], json.dumps(profile), time.time())
+        )
+
+def last_synced_at():
+    row = _connect().execute("SELECT value FROM sync_meta WHERE key = 'last_sync'").fetchone()
+    return float(row[0]) if row else None
+
+def fetch_all_profiles(page_size=SYNC_PAGE_SIZE):
+    """Yield every profile row from Supabase in pages of page_size, ordered by symbol."""
+    table = get_supabase_client().table(PROFILE_TABLE)
+    start = 0
+    while True:
+        response = (
+            table.select(','.join(TICKER_PROFILE_COLUMNS))
+            .order('symbol')
+            .range(start, start + page_size - 1)
+            .execute()
+        )
+        rows = response.data or []
+        yield from rows
+        if len(rows) < page_size:
+            break
+        start += page_size
+
+def sync_snapshot(page_size=SYNC_PAGE_SIZE):
+    """
+    Replace the local snapshot with a full bulk copy of idx_active_company_profile.
+    The swap happens in one transaction, so readers see either the old or the new snapshot.
+    Returns the number of profiles stored.
+    """
+    started = time.time()
+    rows = [
+        (profile['symbol'], json.dumps(profile), started)
+        for profile in fetch_all_profiles(page_size)
+    ]
+    if not rows:
+        raise ValueError(f"Supabase returned no rows from {PROFILE_TABLE}; keeping the existing snapshot")
+
+    connection = _connect()
+    with connection:
+        connection.execute("DELETE FROM profiles")
+        connection.executemany("INSERT INTO profiles (symbol, data, synced_at) VALUES (?, ?, ?)", rows)
+        connection.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('last_sync', ?)", (str(started),))
+    # Let this process pick up the fresh rows straight away
+    clear_profile_cache()
+
+    logger.info(f"Synced {len(rows)} company profiles in {time.time() - started:.1f}s")
+    return len(rows)
+
+def _refresh_loop(interval):
+    while True:
+        try:
+            synced = last_synced_at()
+            # Several workers share the snapshot; skip if another one refreshed it recently
+            if synced is None or time.time() - synced >= interval:
+                sync_snapshot()
+        except Exception as e:
+            logger.error(f"Company profile snapshot refresh failed: {e}")
+        time.sleep(interval)
+
+def ensure_snapshot_refresher():
+    """
+    Start the periodic in-process snapshot refresh if PROFILE_SNAPSHOT_REFRESH_SECONDS is set.
+    Safe to call on every request: it starts at most one thread per process, and again
+    after a fork (threads started in a preloading gunicorn master do not survive forking).
+    """
+    global _refresher_pid
+    interval = getattr(settings, 'PROFILE_SNAPSHOT_REFRESH_SECONDS', 0)
+    if not interval or _refresher_pid == os.getpid():
+        return
+    with _refresher_lock:
+        if _refresher_pid == os.getpid():
+            return
+        thread = threading.Thread(target=_refresh_loop, args=(interval,), name='profile-snapshot-refresher')
+        thread.daemon = True
+        thread.start()
+        _refresher_pid = os.getpid()
+        logger.info(f"Started company profile snapshot refresher (every {interval}s)")
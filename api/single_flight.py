@@ -0,0 +1,71 @@
+import logging
+import threading
+from concurrent.futures import Future
+from .company_cache import normalize_company_name
+
+logger = logging.getLogger(__name__)
+
+def report_key(ticker, company):
+    """Key of the data a report is built from, ignoring case and punctuation."""
+    return (ticker.strip().upper(), normalize_company_name(company))
+
+class SingleFlight:
+    """
+    Coalesces concurrent work with the same key onto one shared Future. The first caller
+    to join a key is its leader and must run (or abandon) it; later callers only wait on
+    the Future. A key is released as soon as its work finishes, so results are shared by
+    overlapping callers only, never cached.
+
+    The work can report progress with progress(key, ...); every caller that joined with
+    on_progress hears it, late joiners starting from the latest report.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._listeners = {}
+        self._progress = {}
+
+    def join(self, key, on_progress=None):
+        """Return (Future for key, True if the caller is the leader)."""
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+                self._listeners[key] = []
+            if on_progress is not None:
+                self._listeners[key].append(on_progress)
+            latest = self._progress.get(key)
+        if latest is not None:
+            on_progress(*latest)
+        return future, leader
+
+    def progress(self, key, *args):
+        """Pass args to the on_progress callback of every caller joined to key."""
+        with self._lock:
+            self._progress[key] = args
+            listeners = list(self._listeners.get(key, ()))
+        for listener in listeners:
+            try:
+                listener(*args)
+            except Exception as e:
+                logger.warning(f"Progress listener for {key} failed: {e}")
+
+    def _release(self, key):
+        with self._lock:
+            self._listeners.pop(key, None)
+            self._progress.pop(key, None)
+            return self._flights.pop(key)
+
+    def run(self, key, fn, *args, **kwargs):
+        """Leader only: run fn and publish its result (or exception) to every caller."""
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._release(key).set_exception(e)
+        else:
+            self._release(key).set_result(result)
+
+    def abandon(self, key, error):
+        """Leader only: give up on a key that could not be started."""
+        self._release(key).set_exception(error)
@@ -0,0 +1,90 @@
+import logging
+import threading
+from io import BytesIO
+import fitz
+from .assets import asset_registry, PAGE_SIZE
+from .compression import rasterize_page, insert_image_page, DEFAULT_IMAGE_QUALITY, DEFAULT_ZOOM
+
+logger = logging.getLogger(__name__)
+
+
+# The goliath/vincent/cta pages never change between reports, so they are rendered
+# and compressed once per process and spliced into every report at the xref level.
+# Order matters: this is the order the pages appear at the end of every report
+STATIC_PAGES = ('goliath', 'vincent', 'cta')
+
+# Page dictionary key used to tag spliced pages so the compressor can recognise them
+STATIC_PAGE_KEY = 'PeriwatchStatic'
+
+_bundles = {}
+_bundle_lock = threading.Lock()
+
+def _build_static_bundle(image_quality, zoom):
+    """Render and compress the static pages into a standalone PDF."""
+    width, height = PAGE_SIZE
+    source = fitz.open()
+    bundle = fitz.open()
+    try:
+        for name in STATIC_PAGES:
+            page = source.new_page(width=width, height=height)
+            page.insert_image(page.rect, stream=asset_registry.data(name)[:])
+            new_page = insert_image_page(bundle, page.rect, rasterize_page(page, image_quality, zoom))
+            bundle.xref_set_key(new_page.xref, STATIC_PAGE_KEY, f'/{name}')
+        return bundle.tobytes(garbage=4, deflate=True, clean=True)
+    finally:
+        bundle.close()
+        source.close()
+
+def get_static_bundle(image_quality=DEFAULT_IMAGE_QUALITY, zoom=DEFAULT_ZOOM):
+    """
+    Return the compressed static-page bundle for the given compression settings.
+    Built once per process per setting and shared by all request threads.
+    """
+    key = (image_quality, zoom)
+    bundle = _bundles.get(key)
+    if bundle is None:
+        with _bundle_lock:
+            bundle = _bundles.get(key)
+            if bundle is None:
+                logger.info(f"Building static page bundle (quality {image_quality}%, zoom {zoom})")
+                bundle = _bundles[key] = _build_static_bundle(image_quality, zoom)
+                logger.info(f"Static page bundle ready: {len(bundle):,} bytes")
+    return bundle
+
+def open_static_bundle(image_quality=DEFAULT_IMAGE_QUALITY, zoom=DEFAULT_ZOOM):
+    """Open a private PyMuPDF document over the cached bundle bytes."""
+    return fitz.open(stream=get_static_bundle(image_quality, zoom), filetype="pdf")
+
+def static_page_name(doc, page):
+    """Return the static page name a page was tagged with, or None for dynamic pages."""
+    kind, value = doc.xref_get_key(page.xref, STATIC_PAGE_KEY)
+    if kind != 'name':
+        return None
+    return value.lstrip('/')
+
+def insert_static_pages(doc):
+    """Splice the precompiled static pages onto the end of an open document."""
+    bundle = open_static_bundle()
+    try:
+        first_static = len(doc)
+        doc.insert_pdf(bundle)
+        # insert_pdf only carries over the standard page keys, so re-tag the copies
+        for offset, name in enumerate(STATIC_PAGES):
+            doc.xref_set_key(doc[first_static + offset].xref, STATIC_PAGE_KEY, f'/{name}')
+    finally:
+        bundle.close()
+
+def append_static_pages(pdf_buffer):
+    """
+    Splice the precompiled static pages onto the end of a rendered report.
+    Returns a new buffer; the input buffer is left untouched.
+    """
+    pdf_buffer.seek(0)
+    doc = fitz.open(stream=pdf_buffer.read(), filetype="pdf")
+    try:
+        insert_static_pages(doc)
+        buffer = BytesIO(doc.tobytes())
+    finally:
+        doc.close()
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,23 @@
+import threading
+
+# Watchers re-read the task store at least this often, to see updates made by other
+# worker processes (updates from this process wake them immediately)
+STORE_POLL_SECONDS = 0.25
+
+class TaskEvents:
+    """
+    Wakes threads watching task records when one changes. A single condition serves
+    every task: watchers are few and re-checking a record is a primary-key read.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+
+    def notify(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait(self, timeout):
+        with self._condition:
+            self._condition.wait(min(timeout, STORE_POLL_SECONDS))
+
+task_events = TaskEvents()
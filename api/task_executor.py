@@ -0,0 +1,113 @@
+import os
+import math
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving averages of wait and run time
+AVERAGE_WEIGHT = 0.2
+# Assumed report duration until one has actually been timed
+DEFAULT_RUN_SECONDS = 30
+
+class ExecutorSaturated(Exception):
+    """Every worker is busy and the queue is full; retry after `retry_after` seconds."""
+    def __init__(self, retry_after, queue_depth):
+        super().__init__(f"Report queue is full ({queue_depth} waiting)")
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+class ExecutorUnavailable(Exception):
+    """The executor is shutting down and accepts no more work."""
+    def __init__(self, retry_after):
+        super().__init__("Report executor is shutting down")
+        self.retry_after = retry_after
+
+class BoundedExecutor:
+    """
+    Fixed-size thread pool with a bounded queue. submit() fails fast with
+    ExecutorSaturated instead of queueing without limit, and the executor keeps
+    running averages of queue wait and run time for status reporting and Retry-After.
+    """
+    def __init__(self, workers, queue_size, name='report'):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._avg_wait = 0.0
+        self._avg_run = None
+
+    def _retry_after(self):
+        # With every worker busy a slot frees up about once per (run time / workers)
+        return max(1, math.ceil((self._avg_run or DEFAULT_RUN_SECONDS) / self.workers))
+
+    def submit(self, fn, *args, on_start=None, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the pool and return its Future. on_start, if given, is
+        called in the worker with the seconds the task spent queued before it starts.
+        """
+        with self._lock:
+            if self._queued + self._running >= self.workers + self.queue_size:
+                raise ExecutorSaturated(self._retry_after(), self._queued)
+            self._queued += 1
+        queued_at = time.time()
+
+        def run():
+            started_at = time.time()
+            wait = started_at - queued_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._avg_wait += AVERAGE_WEIGHT * (wait - self._avg_wait)
+            try:
+                if on_start is not None:
+                    on_start(wait)
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.time() - started_at
+                with self._lock:
+                    self._running -= 1
+                    self._avg_run = elapsed if self._avg_run is None else self._avg_run + AVERAGE_WEIGHT * (elapsed - self._avg_run)
+
+        try:
+            return self._pool.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise ExecutorUnavailable(self._retry_after())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'running': self._running,
+                'queue_depth': self._queued,
+                'queue_size': self.queue_size,
+                'avg_wait_seconds': round(self._avg_wait, 3),
+                'avg_run_seconds': round(self._avg_run, 3) if self._avg_run is not None else None,
+            }
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def get_report_executor():
+    """
+    Executor that runs every report generated in this process (recreated after a fork).
+    Sized by PDF_WORKERS, with room for PDF_QUEUE_SIZE more reports waiting.
+    """
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                workers = max(1, getattr(settings, 'PDF_WORKERS', 4))
+                queue_size = max(0, getattr(settings, 'PDF_QUEUE_SIZE', 8))
+                _executor = BoundedExecutor(workers, queue_size)
+                _executor_pid = os.getpid()
+                logger.info(f"Started report executor with {workers} workers and {queue_size} queue slots")
+    return _executor
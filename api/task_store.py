@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import heapq
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from django.conf import settings
+from .cache_paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+TASK_STORE_FILENAME = 'tasks.sqlite3'
+# The SQLite store sweeps at most this often per process
+EVICT_INTERVAL_SECONDS = 1.0
+# Statuses after which a task is done; only these records are evicted to honour the
+# entry and byte bounds (the age limit applies to every record)
+FINISHED_STATUSES = ('completed', 'completed_and_sent', 'failed')
+
+def _record_size(record):
+    return len(json.dumps(record, default=str))
+
+class TaskStore(ABC):
+    """
+    Where task records live. Records are flat JSON-serializable dicts keyed by task id;
+    get() returns a copy, and update() merges fields into a record atomically.
+
+    Stores evict on their own as tasks are created, oldest start_time first: records
+    older than ttl seconds, then as many finished records as it takes to get back under
+    max_entries and max_bytes (0 disables a bound). Tasks still in progress only ever
+    expire by age. Evictions are counted by reason in `evictions`.
+    """
+    def __init__(self, ttl=0, max_entries=0, max_bytes=0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = {'expired': 0, 'entries': 0, 'bytes': 0}
+
+    @abstractmethod
+    def stats(self):
+        """Entry count, approximate size in bytes and eviction counters."""
+
+    @abstractmethod
+    def create(self, task_id, record):
+        pass
+
+    @abstractmethod
+    def get(self, task_id):
+        """Return a copy of the record, or None."""
+
+    @abstractmethod
+    def update(self, task_id, **fields):
+        """Merge fields into an existing record. Returns False if there is no such task."""
+
+    @abstractmethod
+    def delete(self, task_id):
+        pass
+
+    @abstractmethod
+    def remove_older_than(self, cutoff):
+        """Delete every record whose start_time is before cutoff. Returns the number removed."""
+
+class MemoryTaskStore(TaskStore):
+    """
+    Per-process store. Task ids are spread over `stripes` dicts, each with its own lock,
+    so concurrent updates to different tasks rarely contend. A min-heap ordered by
+    start_time finds the records to evict without scanning.
+    """
+    def __init__(self, stripes=16, **limits):
+        super().__init__(**limits)
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+        # Eviction bookkeeping, guarded by _expiry_lock (always taken before a stripe lock).
+        # Heap entries whose task was deleted or re-created are skipped when they surface.
+        self._expiry_lock = threading.Lock()
+        self._heap = []       # (start_time, task_id)
+        self._entries = {}    # task_id -> (start_time, size in bytes)
+        self._bytes = 0
+
+    def _stripe(self, task_id):
+        return self._stripes[hash(task_id) % len(self._stripes)]
+
+    def _forget(self, task_id):
+        entry = self._entries.pop(task_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _is_finished(self, task_id):
+        lock, tasks = self._stripe(task_id)
+        with lock:
+            record = tasks.get(task_id)
+            return record is None or record.get('status') in FINISHED_STATUSES
+
+    def _evict(self, now):
+        in_progress = []  # heap entries of unfinished tasks passed over for the size bounds
+        while self._heap:
+            start_time, task_id = self._heap[0]
+            entry = self._entries.get(task_id)
+            if entry is None or entry[0] != start_time:
+                heapq.heappop(self._heap)
+                continue
+            if self.ttl and start_time < now - self.ttl:
+                reason = 'expired'
+            elif self.max_entries and len(self._entries) > self.max_entries:
+                reason = 'entries'
+            elif self.max_bytes and self._bytes > self.max_bytes:
+                reason = 'bytes'
+            else:
+                break
+            heapq.heappop(self._heap)
+            if reason != 'expired' and not self._is_finished(task_id):
+                in_progress.append((start_time, task_id))
+                continue
+            self._forget(task_id)
+            lock, tasks = self._stripe(task_id)
+            with lock:
+                tasks.pop(task_id, None)
+            self.evictions[reason] += 1
+        for item in in_progress:
+            heapq.heappush(self._heap, item)
+        # Deleted tasks leave stale heap entries behind; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(start_time, task_id) for task_id, (start_time, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def create(self, task_id, record):
+        record = dict(record)
+        start_time = record.get('start_time', 0)
+        with self._expiry_lock:
+            lock, tasks = self._stripe(task_id)
+            with lock:
+                tasks[task_id] = record
+            self._forget(task_id)
+            size = _record_size(record)
+            self._entries[task_id] = (start_time, size)
+            self._bytes += size
+            heapq.heappush(self._heap, (start_time, task_id))
+            self._evict(time.time())
+
+    def get(self, task_id):
+        lock, tasks = self._stripe(task_id)
+        with lock:
+            record = tasks.get(task_id)
+            return dict(record) if record is not None else None
+
+    def update(self, task_id, **fields):
+        lock, tasks = self._stripe(task_id)
+        with lock:
+            record = tasks.get(task_id)
+            if record is None:
+                return False
+            record.update(fields)
+            size = _record_size(record)
+        with self._expiry_lock:
+            entry = self._entries.get(task_id)
+            if entry is not None:
+                self._bytes += size - entry[1]
+                self._entries[task_id] = (entry[0], size)
+        return True
+
+    def delete(self, task_id):
+        with self._expiry_lock:
+            lock, tasks = self._stripe(task_id)
+            with lock:
+                tasks.pop(task_id, None)
+            self._forget(task_id)
+
+    def remove_older_than(self, cutoff):
+        removed = 0
+        with self._expiry_lock:
+            while self._heap and self._heap[0][0] < cutoff:
+                start_time, task_id = heapq.heappop(self._heap)
+                entry = self._entries.get(task_id)
+                if entry is None or entry[0] != start_time:
+                    continue
+                self._forget(task_id)
+                lock, tasks = self._stripe(task_id)
+                with lock:
+                    tasks.pop(task_id, None)
+                removed += 1
+        return removed
+
+    def stats(self):
+        with self._expiry_lock:
+            return {'backend': 'memory', 'entries': len(self._entries), 'bytes': self._bytes, 'evictions': dict(self.evictions)}
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Store in a SQLite file shared by every process on the host, so any gunicorn worker
+    can answer for any task. Updates are a single json_patch statement, so concurrent
+    writers never lose each other's fields. Point several hosts at a shared volume, or
+    swap in a network store with the same interface. Evictions are range deletes on the
+    start_time index, run at most once a second per process.
+    """
+    def __init__(self, path, **limits):
+        super().__init__(**limits)
+        self.path = path
+        self._local = threading.local()
+        self._last_evicted = 0
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " task_id TEXT PRIMARY KEY,"
+                " start_time REAL NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS tasks_start_time ON tasks (start_time)")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def create(self, task_id, record):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO tasks (task_id, start_time, data) VALUES (?, ?, ?)",
+            (task_id, record.get('start_time', 0), json.dumps(record))
+        )
+        now = time.time()
+        if now - self._last_evicted >= EVICT_INTERVAL_SECONDS:
+            self._last_evicted = now
+            self._evict(now)
+
+    def _evict(self, now):
+        connection = self._connect()
+        finished = f"json_extract(data, '$.status') IN ({', '.join('?' * len(FINISHED_STATUSES))})"
+        if self.ttl:
+            self.evictions['expired'] += connection.execute(
+                "DELETE FROM tasks WHERE start_time < ?", (now - self.ttl,)
+            ).rowcount
+        if self.max_entries:
+            # The oldest finished records, as many as the table is over max_entries
+            self.evictions['entries'] += connection.execute(
+                "DELETE FROM tasks WHERE task_id IN ("
+                f" SELECT task_id FROM tasks WHERE {finished} ORDER BY start_time"
+                " LIMIT MAX(0, (SELECT COUNT(*) FROM tasks) - ?))",
+                (*FINISHED_STATUSES, self.max_entries)
+            ).rowcount
+        if self.max_bytes:
+            # Finished records past the newest ones that fit in max_bytes next to every
+            # unfinished record, which are always kept
+            self.evictions['bytes'] += connection.execute(
+                "DELETE FROM tasks WHERE task_id IN ("
+                " SELECT task_id FROM ("
+                f"  SELECT task_id, SUM(LENGTH(data)) OVER (ORDER BY start_time DESC) AS total FROM tasks WHERE {finished}"
+                f" ) WHERE total + (SELECT COALESCE(SUM(LENGTH(data)), 0) FROM tasks WHERE NOT {finished}) > ?)",
+                (*FINISHED_STATUSES, *FINISHED_STATUSES, self.max_bytes)
+            ).rowcount
+
+    def get(self, task_id):
+        row = self._connect().execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, task_id, **fields):
+        # json_patch drops keys patched to null; readers use .get(), so that reads as None
+        cursor = self._connect().execute(
+            "UPDATE tasks SET data = json_patch(data, ?) WHERE task_id = ?",
+            (json.dumps(fields), task_id)
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, task_id):
+        self._connect().execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def remove_older_than(self, cutoff):
+        return self._connect().execute("DELETE FROM tasks WHERE start_time < ?", (cutoff,)).rowcount
+
+    def stats(self):
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM tasks").fetchone()
+        # Counters are this process's evictions; the table is shared
+        return {'backend': 'sqlite', 'entries': entries, 'bytes': size, 'evictions': dict(self.evictions)}
+
+TASK_STORES = ('memory', 'sqlite')
+
+def create_task_store(backend=None):
+    """Build the store named by PDF_TASK_STORE ('memory' or 'sqlite')."""
+    backend = backend or getattr(settings, 'PDF_TASK_STORE', 'sqlite')
+    limits = {
+        'ttl': getattr(settings, 'PDF_TASK_TTL_SECONDS', 24 * 3600),
+        'max_entries': getattr(settings, 'PDF_TASK_MAX_ENTRIES', 10000),
+        'max_bytes': getattr(settings, 'PDF_TASK_STORE_MAX_BYTES', 16 * 1024 * 1024),
+    }
+    if backend == 'memory':
+        return MemoryTaskStore(getattr(settings, 'PDF_TASK_STORE_STRIPES', 16), **limits)
+    if backend == 'sqlite':
+        path = getattr(settings, 'PDF_TASK_STORE_PATH', None) or cache_path(TASK_STORE_FILENAME)
+        logger.info(f"Task records are kept in {path}")
+        return SQLiteTaskStore(path, **limits)
+    raise ValueError(f"Unknown PDF_TASK_STORE '{backend}' (expected one of: {', '.join(TASK_STORES)})")
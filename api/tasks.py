@@ -2,13 +2,13 @@ import os
 import time
 import threading
 from datetime import datetime
+from functools import partial
 from django.core.mail import send_mail, EmailMessage
 from django.conf import settings
-from .pdf_generator import generate_pdf
+from .pdf_generator import render_data_pages, stamp_report
 import logging
 from io import BytesIO
 import fitz  # PyMuPDF for compression
-from PIL import Image
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 from email.mime.base import MIMEBase
@@ -16,9 +16,33 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from email.mime.text import MIMEText
 import base64
+from .fonts import register_fonts
+from .compression import (
+    insert_image_page, recompress_images, COMPRESSION_RASTER, COMPRESSION_VECTOR,
+    COMPRESSION_PROFILES, DEFAULT_PROFILE,
+)
+from .compression_pool import rasterize_pages, warm_compression_pool
+from .task_executor import get_report_executor, ExecutorSaturated, ExecutorUnavailable
+from .single_flight import SingleFlight, report_key
+from .task_store import create_task_store, FINISHED_STATUSES
+from .task_events import task_events
+from .webhooks import get_webhook_dispatcher
+from .artifact_store import create_artifact_store
+from .page_templates import draw_page_template, swap_template_rasters, template_pages
+from .static_pages import STATIC_PAGES, append_static_pages, get_static_bundle, open_static_bundle, static_page_name
 
 logger = logging.getLogger(__name__)
 
+# Statuses after which a task record no longer changes
+FINAL_STATUSES = FINISHED_STATUSES + ('not_found',)
+
+# In-flight data pages by report_key, shared by concurrent reports for the same inputs
+report_flights = SingleFlight()
+
+# Byte-budget bookkeeping for rasterized documents
+PAGE_OVERHEAD_BYTES = 2048   # page object, resources and xref entries per page
+MIN_PAGE_BYTES = 20 * 1024   # never ask for less than this per page
+
 def format_email_with_display_name(email, display_name=None):
     """Format email address with display name: 'Display Name <email@domain.com>'"""
     if not display_name:
@@ -34,16 +58,39 @@ def format_email_with_display_name(email, display_name=None):
     return f"{display_name} <{email}>"
 
 class PDFGenerationTask:
-    def __init__(self):
-        self.active_tasks = {}
+    def __init__(self, task_store=None, artifact_store=None):
+        # Task records live in a store shared by every worker process (see task_store),
+        # finished reports in an artifact store for download (see artifact_store)
+        self.tasks = task_store or create_task_store()
+        self.artifacts = artifact_store or create_artifact_store()
     
-    def compress_pdf_buffer(self, pdf_buffer, image_quality=90):
+    def compress_pdf_buffer(self, pdf_buffer, image_quality=None, mode=COMPRESSION_RASTER, profile=DEFAULT_PROFILE, max_bytes=None):
         """
         Compress PDF buffer using PyMuPDF with image quality optimization.
-        Returns compressed PDF buffer.
+        Returns compressed PDF buffer. See compress_pdf for the parameters.
         """
+        return self.compress_pdf(pdf_buffer, image_quality, mode, profile, max_bytes)[0]
+    
+    def compress_pdf(self, pdf_buffer, image_quality=None, mode=COMPRESSION_RASTER, profile=DEFAULT_PROFILE, max_bytes=None):
+        """
+        Compress PDF buffer using PyMuPDF with image quality optimization.
+        mode 'raster' flattens each page to a JPEG (pages drawn over a page template
+        only get their background swapped for its cached raster); 'vector' keeps text
+        and links and only downsamples/re-encodes the embedded images. profile ('fast',
+        'balanced', 'smallest') sets the starting quality/zoom/DPI; image_quality
+        overrides the profile's quality. With max_bytes, raster pages are searched
+        down in quality and then resolution until the document fits, and a vector
+        result that is over budget is redone as raster.
+        Returns (compressed PDF buffer, dict of the parameters actually used).
+        """
+        settings_used = dict(COMPRESSION_PROFILES.get(profile) or COMPRESSION_PROFILES[DEFAULT_PROFILE])
+        if image_quality:
+            settings_used['image_quality'] = image_quality
+        params = {'mode': mode, 'profile': profile, 'max_bytes': max_bytes, **settings_used}
+        
         try:
-            logger.info(f"Starting PDF compression with quality {image_quality}%")
+            logger.info(f"Starting PDF compression with quality {settings_used['image_quality']}% "
+                        f"({mode} mode, {profile} profile{f', budget {max_bytes:,} bytes' if max_bytes else ''})")
             
             # Read original PDF from buffer
             pdf_buffer.seek(0)
@@ -53,140 +100,288 @@ class PDFGenerationTask:
             # Open PDF with PyMuPDF
             doc = fitz.open(stream=original_data, filetype="pdf")
             
-            # Create new document for compressed version
-            new_doc = fitz.open()
-            
             total_pages = len(doc)
             logger.info(f"Compressing {total_pages} pages...")
             
-            for page_num in range(total_pages):
-                page = doc[page_num]
-                
-                # Create high-quality pixmap
-                zoom = 1.9  # Good balance between quality and size
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat)
-                
-                # Convert to PIL Image for compression
-                img_data = pix.tobytes("png")
-                pil_image = Image.open(BytesIO(img_data))
-                
-                # Handle different image modes
-                if pil_image.mode in ('RGBA', 'LA', 'P'):
-                    rgb_image = Image.new('RGB', pil_image.size, (255, 255, 255))
-                    if pil_image.mode == 'RGBA':
-                        rgb_image.paste(pil_image, mask=pil_image.split()[-1])
-                    else:
-                        rgb_image.paste(pil_image)
-                    pil_image = rgb_image
-                
-                # Compress image
-                img_buffer = BytesIO()
-                pil_image.save(img_buffer,
-                            format='JPEG',
-                            quality=image_quality,
-                            optimize=True,
-                            progressive=True)
-                img_buffer.seek(0)
-                
-                # Create new page and insert compressed image
-                new_page = new_doc.new_page(width=page.rect.width, height=page.rect.height)
-                new_page.insert_image(page.rect, stream=img_buffer.read())
+            # Precompiled static pages are copied from the bundle instead of re-rasterized
+            static_names = {page_num: static_page_name(doc, doc[page_num]) for page_num in range(total_pages)}
+            dynamic_pages = [page_num for page_num, name in static_names.items() if name not in STATIC_PAGES]
+            
+            compressed_data = None
+            if mode == COMPRESSION_VECTOR:
+                # Keep text, links and drawing; static pages are already compressed rasters
+                swapped = swap_template_rasters(doc, dynamic_pages, settings_used['image_quality'], settings_used['zoom'])
+                replaced = recompress_images(doc, dynamic_pages, settings_used['dpi'], settings_used['image_quality'], skip_xrefs=swapped)
+                logger.info(f"Re-encoded {replaced} embedded images, reused {len(swapped)} template rasters")
+                compressed_data = doc.tobytes(garbage=4, deflate=True, clean=True)
+                if max_bytes and len(compressed_data) > max_bytes:
+                    logger.info(f"Vector output ({len(compressed_data):,} bytes) is over budget; rasterizing instead")
+                    compressed_data = None
+                    params['mode'] = COMPRESSION_RASTER
+                    doc.close()
+                    doc = fitz.open(stream=original_data, filetype="pdf")
+            
+            if compressed_data is None:
+                new_doc, params['pages'] = self._rasterize_document(
+                    doc, original_data, static_names, dynamic_pages,
+                    settings_used['image_quality'], settings_used['zoom'], settings_used['dpi'], max_bytes
+                )
+                compressed_data = new_doc.tobytes(
+                    garbage=4,      # Remove unused objects
+                    deflate=True,   # Compress streams
+                    clean=True      # Clean up structure
+                )
+                new_doc.close()
             
             # Save compressed PDF to buffer
             compressed_buffer = BytesIO()
-            compressed_data = new_doc.tobytes(
-                garbage=4,      # Remove unused objects
-                deflate=True,   # Compress streams
-                clean=True      # Clean up structure
-            )
             compressed_buffer.write(compressed_data)
             compressed_buffer.seek(0)
             
             # Clean up
-            new_doc.close()
             doc.close()
             
             # Log compression results
             compressed_size = len(compressed_data)
             compression_ratio = ((original_size - compressed_size) / original_size) * 100
+            params['size'] = compressed_size
+            if max_bytes:
+                params['within_budget'] = compressed_size <= max_bytes
             
             logger.info(f"PDF compression completed:")
             logger.info(f"  Original size: {original_size:,} bytes ({original_size/1024/1024:.2f} MB)")
             logger.info(f"  Compressed size: {compressed_size:,} bytes ({compressed_size/1024/1024:.2f} MB)")
             logger.info(f"  Space saved: {original_size - compressed_size:,} bytes ({(original_size - compressed_size)/1024/1024:.2f} MB)")
             logger.info(f"  Compression ratio: {compression_ratio:.1f}%")
+            if max_bytes and compressed_size > max_bytes:
+                logger.warning(f"  Over budget by {compressed_size - max_bytes:,} bytes even at the lowest settings")
             
-            return compressed_buffer
+            return compressed_buffer, params
             
         except Exception as e:
             logger.error(f"PDF compression failed: {str(e)}")
             logger.warning("Returning original PDF without compression")
             pdf_buffer.seek(0)
-            return pdf_buffer
+            return pdf_buffer, {'mode': None, 'error': str(e)}
+        
+    def _rasterize_document(self, doc, original_data, static_names, dynamic_pages, image_quality, zoom, dpi, max_bytes=None):
+        """
+        Build a new document with every page flattened to a JPEG, in the original order.
+        Without max_bytes, pages drawn over a page template are copied with their background
+        swapped for its cached raster instead, so they are never rendered. With max_bytes,
+        whatever the static pages and page structure leave of the budget is split evenly
+        between the dynamic pages. Returns (new document, {page: parameters}).
+        """
+        new_doc = fitz.open()
+        
+        overlay_pages = []
+        if not max_bytes:
+            overlay_pages = template_pages(doc, dynamic_pages)
+            swapped = swap_template_rasters(doc, overlay_pages, image_quality, zoom)
+            recompress_images(doc, overlay_pages, dpi, image_quality, skip_xrefs=swapped)
+            dynamic_pages = [page_num for page_num in dynamic_pages if page_num not in overlay_pages]
+        
+        max_page_bytes = None
+        if max_bytes and dynamic_pages:
+            static_page_bytes = len(get_static_bundle(image_quality, zoom)) / len(STATIC_PAGES)
+            fixed_bytes = (len(doc) - len(dynamic_pages)) * static_page_bytes + len(doc) * PAGE_OVERHEAD_BYTES
+            max_page_bytes = max(MIN_PAGE_BYTES, int((max_bytes - fixed_bytes) / len(dynamic_pages)))
         
+        # Rasterize the dynamic pages (in parallel on the compression pool when worthwhile)
+        images = rasterize_pages(original_data, dynamic_pages, image_quality, zoom, max_page_bytes)
+        
+        static_bundle = None
+        static_count = 0
+        for page_num in range(len(doc)):
+            static_name = static_names[page_num]
+            if static_name in STATIC_PAGES:
+                if static_bundle is None:
+                    static_bundle = open_static_bundle(image_quality, zoom)
+                bundle_page = STATIC_PAGES.index(static_name)
+                new_doc.insert_pdf(static_bundle, from_page=bundle_page, to_page=bundle_page)
+                static_count += 1
+                continue
+            if page_num in overlay_pages:
+                new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+                continue
+            
+            # Insert compressed image as a new page
+            insert_image_page(new_doc, doc[page_num].rect, images[page_num][0])
+        
+        if static_bundle is not None:
+            static_bundle.close()
+        if static_count:
+            logger.info(f"Reused {static_count} precompiled static pages")
+        if overlay_pages:
+            logger.info(f"Reused template rasters for {len(overlay_pages)} pages")
+        
+        pages = {page_num: {'quality': quality, 'zoom': page_zoom} for page_num, (_, quality, page_zoom) in images.items()}
+        pages.update({page_num: {'quality': image_quality, 'zoom': zoom, 'template': True} for page_num in overlay_pages})
+        return new_doc, pages
+        
+    def _compress_for_channel(self, task_id, channel, pdf_buffer):
+        """
+        Compress a PDF for delivery over `channel` ('download' or 'email'). The task's own
+        mode/profile win over the channel defaults (PDF_COMPRESSION_<CHANNEL>,
+        PDF_<CHANNEL>_PROFILE); a byte budget is the tighter of the task's max_bytes and
+        PDF_<CHANNEL>_MAX_BYTES. The parameters used are recorded on the task.
+        """
+        task = self.tasks.get(task_id) or {}
+        name = channel.upper()
+        mode = task.get('compression') or getattr(settings, f'PDF_COMPRESSION_{name}', COMPRESSION_RASTER)
+        profile = task.get('compression_profile') or getattr(settings, f'PDF_{name}_PROFILE', DEFAULT_PROFILE)
+        budgets = [budget for budget in (task.get('max_bytes'), getattr(settings, f'PDF_{name}_MAX_BYTES', 0)) if budget]
+        
+        compressed_pdf, params = self.compress_pdf(pdf_buffer, mode=mode, profile=profile, max_bytes=min(budgets) if budgets else None)
+        self.tasks.update(task_id, compression_params={**task.get('compression_params', {}), channel: params})
+        return compressed_pdf
+    
     def generate_pdf_with_timeout(self, task_id, title_text, email_text, ticker, company, 
-                                  timeout_seconds=15, recipient_email=None):
+                                  timeout_seconds=15, recipient_email=None, compression=None,
+                                  compression_profile=None, max_bytes=None, callback_url=None,
+                                  download_url=None):
         """
         Generate PDF with timeout. Returns partial PDF if timeout, continues in background.
+        compression ('raster' or 'vector'), compression_profile and max_bytes override the
+        per-channel defaults (see _compress_for_channel). callback_url, if given, receives
+        a signed completion webhook once the task finishes (see _send_webhook).
+        download_url is where the stored report can be fetched once it is finished.
         """
         start_time = time.time()
+        executor = get_report_executor()
         
-        self.active_tasks[task_id] = {
-            'status': 'running',
+        self.tasks.create(task_id, {
+            'status': 'queued',
+            'stage': 'queued',
             'start_time': start_time,
+            'updated_at': start_time,
             'title_text': title_text,
             'email_text': email_text,
             'ticker': ticker,
             'company': company,
-            'recipient_email': recipient_email or email_text
-        }
+            'recipient_email': recipient_email or email_text,
+            'compression': compression,
+            'compression_profile': compression_profile,
+            'max_bytes': max_bytes,
+            'callback_url': callback_url,
+            'download_url': download_url
+        })
         
-        # Container for the result
-        result_container = {'pdf_buffer': None, 'completed': False, 'error': None}
+        # Container for the result. The worker notifies `handoff` when the result or error
+        # is in; once the request stops waiting ('detached'), the worker itself compresses
+        # and emails the finished report.
+        result_container = {'pdf_buffer': None, 'completed': False, 'error': None, 'rejected': None, 'detached': False}
+        handoff = threading.Condition()
+        
+        def on_start(queue_wait):
+            with handoff:
+                if result_container['detached']:
+                    self._update(task_id, queue_wait=round(queue_wait, 3))
+                else:
+                    self._update(task_id, queue_wait=round(queue_wait, 3), status='running')
         
-        def generate_pdf_worker():
+        def finish(flight):
+            # Only the cover is per task; the data pages are the flight's shared result
             try:
-                logger.info(f"Starting PDF generation for task {task_id}")
-                pdf_buffer = generate_pdf(title_text, email_text, ticker, company)
-                result_container['pdf_buffer'] = pdf_buffer
-                result_container['completed'] = True
+                pdf_buffer = stamp_report(title_text, email_text, ticker, company, flight.result())
+                with handoff:
+                    result_container['pdf_buffer'] = pdf_buffer
+                    result_container['completed'] = True
+                    detached = result_container['detached']
+                    handoff.notify_all()
                 logger.info(f"PDF generation completed for task {task_id}")
             except Exception as e:
-                result_container['error'] = str(e)
+                with handoff:
+                    result_container['error'] = str(e)
+                    detached = result_container['detached']
+                    handoff.notify_all()
                 logger.error(f"PDF generation failed for task {task_id}: {str(e)}")
+            if detached:
+                self._finish_in_background(task_id, result_container)
         
-        # Start PDF generation in a separate thread
-        worker_thread = threading.Thread(target=generate_pdf_worker)
-        worker_thread.daemon = True
-        worker_thread.start()
+        def deliver(flight):
+            # Runs in whichever thread finished the shared data pages: the leader's own
+            # worker, or the request thread if the flight was already done. A follower's
+            # cover, compression and delivery go back through the executor so they count
+            # against the pool instead of piling up on the leader's thread.
+            if leader:
+                finish(flight)
+                return
+            rejection = flight.exception()
+            if isinstance(rejection, (ExecutorSaturated, ExecutorUnavailable)):
+                # The leader was turned away before anything ran. That is admission control,
+                # not a failed report, so a follower still waiting gets the same answer
+                with handoff:
+                    if not result_container['detached']:
+                        result_container['rejected'] = rejection
+                        handoff.notify_all()
+                        return
+            try:
+                executor.submit(finish, flight)
+            except (ExecutorSaturated, ExecutorUnavailable) as e:
+                # The request was already accepted; finishing it here beats dropping it
+                logger.warning(f"Finishing coalesced task {task_id} inline: {e}")
+                finish(flight)
+        
+        # Concurrent reports for the same data share one fetch-and-render; only the
+        # leader takes a worker, followers wait on its flight
+        key = report_key(ticker, company)
+        flight, leader = report_flights.join(key, on_progress=partial(self._set_stage, task_id))
+        if leader:
+            # Admission control: rejected requests leave no task behind
+            try:
+                executor.submit(
+                    report_flights.run, key, render_data_pages, ticker, company,
+                    on_stage=partial(report_flights.progress, key), on_start=on_start
+                )
+            except Exception as e:
+                report_flights.abandon(key, e)
+                self.tasks.delete(task_id)
+                raise
+            logger.info(f"Starting PDF generation for task {task_id}")
+        else:
+            self._update(task_id, status='running', coalesced=True)
+            logger.info(f"Task {task_id} joined an in-flight report for {key}")
+        flight.add_done_callback(deliver)
+        warm_compression_pool()
         
-        # Wait for timeout or completion
-        elapsed_time = 0
-        while elapsed_time < timeout_seconds and not result_container['completed'] and not result_container['error']:
-            time.sleep(0.5)
-            elapsed_time = time.time() - start_time
+        # Wait for completion, failure or the deadline, whichever comes first
+        with handoff:
+            finished = handoff.wait_for(
+                lambda: result_container['completed'] or result_container['error'] or result_container['rejected'],
+                timeout=max(0, start_time + timeout_seconds - time.time())
+            )
+            if not finished:
+                result_container['detached'] = True
+                self._update(task_id, status='processing_background')
+        
+        if result_container['rejected']:
+            # Same as a rejected leader: no task is left behind and the view answers 429/503
+            self.tasks.delete(task_id)
+            raise result_container['rejected']
         
         if result_container['completed']:
             # PDF completed within timeout - compress before returning
-            self.active_tasks[task_id]['status'] = 'completed'
+            self._update(task_id, status='completed', stage='compressing')
             logger.info(f"Task {task_id} completed within timeout, compressing PDF...")
             
             # Compress the completed PDF
-            compressed_pdf = self.compress_pdf_buffer(result_container['pdf_buffer'], image_quality=90)
+            compressed_pdf = self._compress_for_channel(task_id, 'download', result_container['pdf_buffer'])
+            self._store_artifact(task_id, compressed_pdf)
+            self._update(task_id, stage='done')
+            self._send_webhook(task_id)
             
             logger.info(f"Task {task_id} compression completed")
             return compressed_pdf, 'completed'
             
         elif result_container['error']:
             # PDF generation failed
-            self.active_tasks[task_id]['status'] = 'failed'
-            self.active_tasks[task_id]['error'] = result_container['error']
+            self._update(task_id, status='failed', stage='failed', error=result_container['error'])
+            self._send_webhook(task_id)
             logger.error(f"Task {task_id} failed: {result_container['error']}")
             return None, 'failed'
         else:
-            # Timeout reached, return partial PDF and continue in background
-            self.active_tasks[task_id]['status'] = 'processing_background'
+            # Timeout reached, return partial PDF; the worker finishes the report in the background
             logger.info(f"Task {task_id} timed out, generating partial PDF and continuing in background")
             
             # Generate partial PDF (cover page only)
@@ -195,18 +390,14 @@ class PDFGenerationTask:
             # Compress partial PDF before returning
             if partial_pdf:
                 logger.info(f"Compressing partial PDF for task {task_id}")
-                partial_pdf = self.compress_pdf_buffer(partial_pdf, image_quality=90)
+                partial_pdf = self._compress_for_channel(task_id, 'download', partial_pdf)
             
-            # Continue full generation in background
-            self._continue_in_background(task_id, worker_thread, result_container)
             return partial_pdf, 'partial'
     
     def _generate_partial_pdf(self, title_text, email_text, ticker, company):
         """Generate a partial PDF with cover page and processing info"""
         try:
             from reportlab.pdfgen import canvas
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
             from reportlab.lib import colors
             from io import BytesIO
             import os
@@ -217,11 +408,8 @@ class PDFGenerationTask:
             buffer = BytesIO()
             width, height = 595, 842
             
-            try:
-                pdfmetrics.registerFont(TTFont('Inter', os.path.join(ASSET_PATH, "font/Inter-Regular.ttf")))
-                pdfmetrics.registerFont(TTFont('Inter-Bold', os.path.join(ASSET_PATH, "font/Inter-Bold.ttf")))
-            except Exception as font_error:
-                logger.warning(f"Font registration failed: {font_error}. Using default fonts.")
+            # Fonts are parsed once per process; this is a no-op after startup
+            register_fonts()
             
             pdf = canvas.Canvas(buffer, pagesize=(width, height))
             
@@ -229,7 +417,7 @@ class PDFGenerationTask:
             try:
                 cover_image_path = os.path.join(ASSET_PATH, 'cover.png')
                 if os.path.exists(cover_image_path):
-                    pdf.drawImage(cover_image_path, 0, 0, width, height)
+                    draw_page_template(pdf, 'cover', width, height)
                     
                     if company != '':
                         cover_text_generator(pdf, height, ticker, email_text, title_text, company)
@@ -254,7 +442,7 @@ class PDFGenerationTask:
             pdf.showPage()
             
             # Processing page
-            pdf.drawImage(os.path.join(ASSET_PATH,'company_blank.png'), 0, 0, width, height)
+            draw_page_template(pdf, 'company_blank', width, height)
             try:
                 title_font = 'Inter-Bold'
                 body_font = 'Inter'
@@ -349,21 +537,11 @@ class PDFGenerationTask:
             timestamp_width = pdf.stringWidth(timestamp, body_font, 10)
             pdf.drawString((width - timestamp_width) / 2, 40, timestamp)
             pdf.showPage()
-            
-            # Page 1
-            pdf.drawImage(os.path.join(ASSET_PATH,'goliath.png'), 0, 0, width, height)
-            pdf.showPage()
-
-            # Page 2
-            pdf.drawImage(os.path.join(ASSET_PATH,'vincent.png'), 0, 0, width, height)
-            pdf.showPage()
-
-            # CTA
-            pdf.drawImage(os.path.join(ASSET_PATH,'cta.png'), 0, 0, width, height)
-            pdf.showPage()
 
             pdf.save()
-            buffer.seek(0)
+
+            # Profile pages and CTA come from the precompiled static bundle
+            buffer = append_static_pages(buffer)
             
             logger.info(f"Partial PDF generated successfully for {title_text}")
             return buffer
@@ -396,41 +574,91 @@ class PDFGenerationTask:
                 logger.error(f"Even fallback PDF generation failed: {fallback_error}")
                 return None
     
-    def _continue_in_background(self, task_id, worker_thread, result_container):
-        """Continue PDF generation in background and send email when complete"""
-        def background_worker():
-            try:
-                # Wait for the original worker thread to complete
-                worker_thread.join()
+    def _finish_in_background(self, task_id, result_container):
+        """
+        Compress and email a report whose request stopped waiting for it. Runs on the
+        report's own executor worker, so background delivery counts against the pool.
+        """
+        try:
+            if result_container['completed'] and result_container['pdf_buffer']:
+                # Compress full PDF before sending email
+                task_info = self.tasks.get(task_id) or {}
+                logger.info(f"Compressing full PDF for task {task_id} before email")
+                self._update(task_id, stage='compressing')
                 
-                if result_container['completed'] and result_container['pdf_buffer']:
-                    # Compress full PDF before sending email
-                    task_info = self.active_tasks.get(task_id, {})
-                    logger.info(f"Compressing full PDF for task {task_id} before email")
-                    
-                    compressed_pdf = self.compress_pdf_buffer(result_container['pdf_buffer'], image_quality=90)
-                    
-                    # Send email with compressed complete PDF
-                    self._send_pdf_email(
-                        task_info.get('recipient_email'),
-                        task_info.get('title_text', 'Periwatch Report'),
-                        compressed_pdf
-                    )
-                    self.active_tasks[task_id]['status'] = 'completed_and_sent'
-                    logger.info(f"Task {task_id} completed and email sent")
-                elif result_container['error']:
-                    self.active_tasks[task_id]['status'] = 'failed'
-                    self.active_tasks[task_id]['error'] = result_container['error']
-                    logger.error(f"Background task {task_id} failed: {result_container['error']}")
-                    
-            except Exception as e:
-                logger.error(f"Background worker failed for task {task_id}: {str(e)}")
-                self.active_tasks[task_id]['status'] = 'failed'
-                self.active_tasks[task_id]['error'] = str(e)
-        
-        background_thread = threading.Thread(target=background_worker)
-        background_thread.daemon = True
-        background_thread.start()
+                compressed_pdf = self._compress_for_channel(task_id, 'email', result_container['pdf_buffer'])
+                self._store_artifact(task_id, compressed_pdf)
+                
+                # Send email with compressed complete PDF
+                self._update(task_id, stage='emailing')
+                self._send_pdf_email(
+                    task_info.get('recipient_email'),
+                    task_info.get('title_text', 'Periwatch Report'),
+                    compressed_pdf
+                )
+                self._update(task_id, status='completed_and_sent', stage='done')
+                logger.info(f"Task {task_id} completed and email sent")
+            elif result_container['error']:
+                self._update(task_id, status='failed', stage='failed', error=result_container['error'])
+                logger.error(f"Background task {task_id} failed: {result_container['error']}")
+            else:
+                # Finished without a PDF or an error; fail it so the webhook matches the record
+                self._update(task_id, status='failed', stage='failed', error='Report generation produced no PDF')
+                logger.error(f"Background task {task_id} produced no PDF")
+
+        except Exception as e:
+            logger.error(f"Background worker failed for task {task_id}: {str(e)}")
+            self._update(task_id, status='failed', stage='failed', error=str(e))
+        self._send_webhook(task_id)
+    
+    def _store_artifact(self, task_id, pdf_buffer):
+        """
+        Keep a finished report in the artifact store so download/<task_id>/ can serve it.
+        A failure here is logged and does not fail the task; the report is still delivered.
+        """
+        try:
+            meta = self.artifacts.put(task_id, pdf_buffer)
+        except Exception as e:
+            logger.warning(f"Could not store report artifact for task {task_id}: {e}")
+            return
+        task = self.tasks.get(task_id) or {}
+        self.tasks.update(
+            task_id,
+            artifact={'sha256': meta['sha256'], 'size': meta['size']},
+            artifact_url=task.get('download_url')
+        )
+    
+    def _send_webhook(self, task_id):
+        """
+        Queue the signed completion webhook of a finished task, if it asked for one. The
+        delivery state is kept on the task under 'webhook'.
+        """
+        task = self.tasks.get(task_id)
+        if not task or not task.get('callback_url'):
+            return
+        finished_at = task.get('updated_at') or time.time()
+        payload = {
+            'event': 'report.failed' if task['status'] == 'failed' else 'report.completed',
+            'task_id': task_id,
+            'status': task['status'],
+            'error': task.get('error'),
+            'title': task.get('title_text'),
+            'ticker': task.get('ticker'),
+            'company': task.get('company'),
+            'recipient_email': task.get('recipient_email'),
+            'timings': {
+                'start_time': task.get('start_time'),
+                'queue_wait': task.get('queue_wait'),
+                'finished_at': finished_at,
+                'duration': round(finished_at - task.get('start_time', finished_at), 3),
+            },
+            'artifact_url': task.get('artifact_url'),
+        }
+        self.tasks.update(task_id, webhook={'status': 'pending', 'attempts': 0})
+        get_webhook_dispatcher().send(
+            task['callback_url'], payload['event'], payload, task_id,
+            on_result=lambda result: self.tasks.update(task_id, webhook=result)
+        )
     
     def _send_pdf_email(self, recipient_email, title, pdf_buffer):
         """Send PDF via email using AWS SES first, then Django fallback if SES fails."""
@@ -729,22 +957,53 @@ class PDFGenerationTask:
         email.send()
         logger.info(f"Fallback email sent successfully to {recipient_email} (PDF size: {len(pdf_data)} bytes)")
     
+    def _update(self, task_id, **fields):
+        """Update a task record, stamp it with updated_at and wake anyone watching it."""
+        updated = self.tasks.update(task_id, updated_at=time.time(), **fields)
+        task_events.notify()
+        return updated
+    
+    def _set_stage(self, task_id, stage):
+        self._update(task_id, stage=stage)
+    
     def get_task_status(self, task_id):
         """Get status of a specific task"""
-        return self.active_tasks.get(task_id, {'status': 'not_found'})
+        return self.tasks.get(task_id) or {'status': 'not_found'}
+    
+    def wait_for_task_change(self, task_id, since=None, timeout=0):
+        """
+        Return the task record as soon as it has changed since `since` (an updated_at
+        value), or once it is finished, or when timeout seconds pass without a change.
+        """
+        deadline = time.time() + timeout
+        while True:
+            task = self.get_task_status(task_id)
+            if since is None or task['status'] in FINAL_STATUSES or task.get('updated_at', 0) > since:
+                return task
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return task
+            task_events.wait(remaining)
+    
+    def get_queue_stats(self):
+        """Worker pool occupancy, queue depth and average wait/run times of this process."""
+        return get_report_executor().stats()
+    
+    def get_store_stats(self):
+        """Size of the task store and how many records it has evicted, by reason."""
+        return self.tasks.stats()
     
     def cleanup_old_tasks(self, hours=24):
         """Remove old task records"""
-        current_time = time.time()
-        tasks_to_remove = []
-        
-        for task_id, task_info in self.active_tasks.items():
-            if current_time - task_info.get('start_time', 0) > hours * 3600:
-                tasks_to_remove.append(task_id)
-        
-        for task_id in tasks_to_remove:
-            del self.active_tasks[task_id]
-        
-        logger.info(f"Cleaned up {len(tasks_to_remove)} old tasks")
+        removed = self.tasks.remove_older_than(time.time() - hours * 3600)
+        logger.info(f"Cleaned up {removed} old tasks")
+        return removed
+    
+    def cleanup_old_artifacts(self, hours=24):
+        """Remove stored reports older than `hours`. They also expire on their own."""
+        return self.artifacts.remove_older_than(time.time() - hours * 3600)
+    
+    def get_artifact_stats(self):
+        return self.artifacts.stats()
 
 pdf_task_manager = PDFGenerationTask()
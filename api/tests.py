@@ -1,3 +1,378 @@
-from django.test import TestCase
+import os
+import io
+import json
+import time
+import random
+import tempfile
+import threading
+from unittest import mock
+import fitz
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+from django.test import Client, RequestFactory, SimpleTestCase
+from django.utils.http import http_date
+from .artifact_store import LocalArtifactStore
+from .assets import PAGE_SIZE
+from .glyph_metrics import break_lines, measure, string_width
+from . import task_store, tasks
+from .task_store import MemoryTaskStore, SQLiteTaskStore
+from .single_flight import SingleFlight, report_key
+from .task_executor import BoundedExecutor, ExecutorSaturated, ExecutorUnavailable
+from .page_templates import draw_page_template, get_template_xobject, template_pages, template_name
+from .views import PDFDownloadView
 
-# Create your tests here.
+ETAG = '"abc123"'
+LAST_MODIFIED = 1700000000
+
+class RequestedRangeTests(SimpleTestCase):
+    def requested_range(self, **headers):
+        request = RequestFactory().get('/api/download/task/', headers=headers)
+        return PDFDownloadView._requested_range(request, ETAG, LAST_MODIFIED)
+
+    def test_no_range_header(self):
+        self.assertIsNone(self.requested_range())
+
+    def test_single_ranges(self):
+        self.assertEqual(self.requested_range(Range='bytes=0-99'), (0, 99))
+        self.assertEqual(self.requested_range(Range='bytes=100-'), (100, None))
+        self.assertEqual(self.requested_range(Range='bytes=-500'), (None, 500))
+        self.assertEqual(self.requested_range(Range='bytes = 5 - 9'), (5, 9))
+
+    def test_unsupported_ranges_send_the_whole_file(self):
+        for header in ('bytes=-', 'bytes=9-5', 'bytes=0-1,5-9', 'items=0-9', 'bytes=a-b'):
+            self.assertIsNone(self.requested_range(Range=header), header)
+
+    def test_if_range(self):
+        self.assertEqual(self.requested_range(Range='bytes=0-9', **{'If-Range': ETAG}), (0, 9))
+        self.assertEqual(self.requested_range(Range='bytes=0-9', **{'If-Range': http_date(LAST_MODIFIED)}), (0, 9))
+        self.assertIsNone(self.requested_range(Range='bytes=0-9', **{'If-Range': '"stale"'}))
+        self.assertIsNone(self.requested_range(Range='bytes=0-9', **{'If-Range': http_date(LAST_MODIFIED - 60)}))
+
+class LocalArtifactStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.store = LocalArtifactStore(self.tempdir.name)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def age(self, task_id, seconds):
+        """Backdate an artifact's record and blob by seconds."""
+        index_path = self.store._index_path(task_id)
+        with open(index_path, 'r') as file:
+            meta = json.load(file)
+        meta['created_at'] -= seconds
+        with open(index_path, 'w') as file:
+            json.dump(meta, file)
+        blob_path = self.store._blob_path(meta['sha256'])
+        os.utime(blob_path, (meta['created_at'], meta['created_at']))
+        return meta
+
+    def test_remove_older_than(self):
+        old = self.store.put('old', io.BytesIO(b'old report'))
+        self.age('old', 3600)
+        fresh = self.store.put('fresh', io.BytesIO(b'fresh report'))
+
+        self.assertEqual(self.store.remove_older_than(time.time() - 60), 1)
+        self.assertIsNone(self.store.get('old'))
+        self.assertFalse(os.path.exists(self.store._blob_path(old['sha256'])))
+        self.assertEqual(self.store.get('fresh')['sha256'], fresh['sha256'])
+        self.assertTrue(os.path.exists(self.store._blob_path(fresh['sha256'])))
+
+    def test_remove_older_than_keeps_shared_blobs(self):
+        self.store.put('old', io.BytesIO(b'same report'))
+        self.age('old', 3600)
+        shared = self.store.put('fresh', io.BytesIO(b'same report'))
+
+        self.assertEqual(self.store.remove_older_than(time.time() - 60), 1)
+        self.assertTrue(os.path.exists(self.store._blob_path(shared['sha256'])))
+        with self.store.open(self.store.get('fresh')) as file:
+            self.assertEqual(file.read(), b'same report')
+
+    def test_remove_older_than_skips_recent_unreferenced_blobs(self):
+        # A blob written by a put that has not recorded its index entry yet
+        os.makedirs(os.path.join(self.tempdir.name, 'blobs'))
+        pending = self.store._blob_path('pending')
+        open(pending, 'wb').close()
+
+        self.assertEqual(self.store.remove_older_than(time.time() - 60), 0)
+        self.assertTrue(os.path.exists(pending))
+        os.utime(pending, (time.time() - 3600, time.time() - 3600))
+        self.store.remove_older_than(time.time() - 60)
+        self.assertFalse(os.path.exists(pending))
+
+    def test_put_rejects_empty_reports(self):
+        with self.assertRaises(ValueError):
+            self.store.put('empty', io.BytesIO())
+        self.assertIsNone(self.store.get('empty'))
+
+class PageTemplateTests(SimpleTestCase):
+    def render(self, pages=2):
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+        for page in range(pages):
+            draw_page_template(pdf, 'cover', *PAGE_SIZE)
+            pdf.drawString(72, 72, f'Page {page + 1}')
+            pdf.showPage()
+        pdf.save()
+        return fitz.open(stream=buffer.getvalue(), filetype='pdf')
+
+    def test_template_is_one_xobject_shared_by_every_page(self):
+        doc = self.render()
+        images = [doc[page_num].get_images(full=True) for page_num in range(len(doc))]
+        self.assertEqual([len(page_images) for page_images in images], [1, 1])
+        self.assertEqual(images[0][0][0], images[1][0][0])
+        self.assertEqual(template_name(images[0][0][7]), 'cover')
+        self.assertEqual(template_pages(doc, range(len(doc))), [0, 1])
+
+    def test_template_stream_is_the_prebuilt_encoding(self):
+        encoded = get_template_xobject('cover').streamContent.encode('latin-1')
+        for _ in range(2):  # every canvas reuses it, none re-encodes the PNG
+            doc = self.render(pages=1)
+            xref = doc[0].get_images(full=True)[0][0]
+            self.assertEqual(doc.xref_stream_raw(xref), encoded)
+
+class GlyphMetricsTests(SimpleTestCase):
+    STRINGS = ['', 'Periwatch', 'PT Bank Central Asia Tbk.', 'Rp 1.234.567,89 (±3%)', 'naïve café – “quoted”', 'emoji 📈 and 中文']
+
+    def test_measure_matches_string_width(self):
+        for font_name in ('Inter', 'Inter-Bold', 'Helvetica'):
+            widths = measure(self.STRINGS, font_name, 11)
+            for text, width in zip(self.STRINGS, widths):
+                expected = pdfmetrics.stringWidth(text, font_name, 11)
+                self.assertAlmostEqual(width, expected, places=6, msg=(font_name, text))
+                self.assertAlmostEqual(string_width(text, font_name, 11), expected, places=6, msg=(font_name, text))
+
+    def test_measure_empty_list(self):
+        self.assertEqual(len(measure([], 'Inter', 11)), 0)
+
+    @staticmethod
+    def greedy_lines(widths, space_width, max_width):
+        lines, start, line_width = [], 0, None
+        for index, width in enumerate(widths):
+            if line_width is not None and line_width + space_width + width > max_width:
+                lines.append((start, index))
+                start, line_width = index, None
+            line_width = width if line_width is None else line_width + space_width + width
+        if widths:
+            lines.append((start, len(widths)))
+        return lines
+
+    def test_break_lines_matches_greedy_breaking(self):
+        rng = random.Random(4)
+        words = ['a', 'report', 'on', 'Indonesian', 'listed', 'companies', 'with', 'supercalifragilistic', 'data']
+        space_width = pdfmetrics.stringWidth(' ', 'Inter', 10)
+        for _ in range(200):
+            text = [rng.choice(words) for _ in range(rng.randint(0, 40))]
+            widths = [pdfmetrics.stringWidth(word, 'Inter', 10) for word in text]
+            max_width = rng.choice([20, 60, 150, 400])
+            self.assertEqual(break_lines(widths, space_width, max_width), self.greedy_lines(widths, space_width, max_width))
+
+    def test_break_lines_gives_an_overlong_word_its_own_line(self):
+        self.assertEqual(break_lines([5, 50, 5], 1, 10), [(0, 1), (1, 2), (2, 3)])
+
+class TaskStoreContract:
+    """Behaviour every TaskStore must have; subclasses provide make_store(**limits)."""
+    def task(self, status='running', age=0, **fields):
+        return {'status': status, 'start_time': time.time() - age, **fields}
+
+    def test_create_get_update_delete(self):
+        store = self.make_store()
+        store.create('t1', self.task(title_text='Report'))
+        record = store.get('t1')
+        record['status'] = 'changed'
+        self.assertEqual(store.get('t1')['status'], 'running')  # get returns a copy
+
+        self.assertTrue(store.update('t1', status='completed', stage='done'))
+        self.assertEqual(store.get('t1')['status'], 'completed')
+        self.assertEqual(store.get('t1')['title_text'], 'Report')
+        self.assertFalse(store.update('missing', status='failed'))
+
+        store.delete('t1')
+        self.assertIsNone(store.get('t1'))
+        self.assertEqual(store.stats()['entries'], 0)
+
+    def test_ttl_expires_every_record(self):
+        store = self.make_store(ttl=60)
+        store.create('old-running', self.task('running', age=120))
+        store.create('old-done', self.task('completed', age=120))
+        store.create('new', self.task('running'))
+        self.assertIsNone(store.get('old-running'))
+        self.assertIsNone(store.get('old-done'))
+        self.assertIsNotNone(store.get('new'))
+        self.assertEqual(store.stats()['evictions']['expired'], 2)
+
+    def test_entry_bound_evicts_oldest_finished_only(self):
+        store = self.make_store(max_entries=3)
+        for index in range(5):
+            store.create(f'running-{index}', self.task('running', age=100 - index))
+        for index in range(3):
+            store.create(f'done-{index}', self.task('completed', age=50 - index))
+        for index in range(5):
+            self.assertIsNotNone(store.get(f'running-{index}'))
+        self.assertEqual([store.get(f'done-{index}') is not None for index in range(3)], [False, False, False])
+
+        # Once tasks finish they become evictable, oldest first
+        for index in range(5):
+            store.update(f'running-{index}', status='failed')
+        store.create('newest', self.task('running'))
+        remaining = [task_id for task_id in [f'running-{index}' for index in range(5)] if store.get(task_id)]
+        self.assertEqual(remaining, ['running-3', 'running-4'])
+        self.assertIsNotNone(store.get('newest'))
+
+    def test_byte_bound_evicts_finished_only(self):
+        payload = 'x' * 1000
+        store = self.make_store(max_bytes=3500)
+        for index in range(4):
+            store.create(f'running-{index}', self.task('running', age=100 - index, payload=payload))
+        store.create('done', self.task('completed', age=10, payload=payload))
+        for index in range(4):
+            self.assertIsNotNone(store.get(f'running-{index}'))
+        self.assertIsNone(store.get('done'))
+        self.assertGreater(store.stats()['evictions']['bytes'], 0)
+
+    def test_remove_older_than(self):
+        store = self.make_store()
+        store.create('old', self.task('running', age=3600))
+        store.create('new', self.task('running'))
+        self.assertEqual(store.remove_older_than(time.time() - 60), 1)
+        self.assertIsNone(store.get('old'))
+        self.assertIsNotNone(store.get('new'))
+
+class MemoryTaskStoreTests(TaskStoreContract, SimpleTestCase):
+    def make_store(self, **limits):
+        return MemoryTaskStore(stripes=4, **limits)
+
+class SQLiteTaskStoreTests(TaskStoreContract, SimpleTestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        # Sweep on every create instead of at most once a second
+        patcher = mock.patch.object(task_store, 'EVICT_INTERVAL_SECONDS', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_store(self, **limits):
+        return SQLiteTaskStore(os.path.join(self.tempdir.name, 'tasks.sqlite3'), **limits)
+
+class SingleFlightTests(SimpleTestCase):
+    def test_followers_share_the_leaders_result(self):
+        flights = SingleFlight()
+        leader_future, leader = flights.join('key')
+        follower_future, follower_leads = flights.join('key')
+        self.assertTrue(leader)
+        self.assertFalse(follower_leads)
+        self.assertIs(follower_future, leader_future)
+
+        flights.run('key', lambda value: value * 2, 21)
+        self.assertEqual(follower_future.result(), 42)
+        # The key is released once the work is done: results are never cached
+        self.assertTrue(flights.join('key')[1])
+
+    def test_errors_and_abandon_reach_every_caller(self):
+        flights = SingleFlight()
+        future, _ = flights.join('key')
+        flights.join('key')
+        flights.run('key', lambda: 1 / 0)
+        self.assertIsInstance(future.exception(), ZeroDivisionError)
+
+        future, _ = flights.join('key')
+        error = ExecutorSaturated(5, 3)
+        flights.abandon('key', error)
+        self.assertIs(future.exception(), error)
+        self.assertTrue(flights.join('key')[1])
+
+    def test_late_joiners_hear_the_latest_progress(self):
+        flights = SingleFlight()
+        heard = []
+        flights.join('key', on_progress=lambda stage: heard.append(('first', stage)))
+        flights.progress('key', 'fetching')
+        flights.join('key', on_progress=lambda stage: heard.append(('late', stage)))
+        flights.progress('key', 'rendering')
+        self.assertEqual(heard, [
+            ('first', 'fetching'), ('late', 'fetching'), ('first', 'rendering'), ('late', 'rendering'),
+        ])
+
+    def test_report_key_ignores_case_and_spacing(self):
+        self.assertEqual(report_key(' bbca.jk ', ''), report_key('BBCA.JK', ''))
+
+class BoundedExecutorTests(SimpleTestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def test_rejects_beyond_workers_and_queue(self):
+        executor = BoundedExecutor(1, 1, name='test')
+        running = executor.submit(self.release.wait)
+        queued = executor.submit(lambda: 'done')
+        with self.assertRaises(ExecutorSaturated) as raised:
+            executor.submit(lambda: 'rejected')
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.release.set()
+        self.assertEqual(queued.result(timeout=5), 'done')
+        self.assertTrue(running.result(timeout=5))
+        self.assertEqual(executor.submit(lambda: 'accepted again').result(timeout=5), 'accepted again')
+
+    def test_shut_down_executor_is_unavailable(self):
+        executor = BoundedExecutor(1, 1, name='test')
+        executor._pool.shutdown()
+        with self.assertRaises(ExecutorUnavailable):
+            executor.submit(lambda: None)
+        self.assertEqual(executor.stats()['queue_depth'], 0)
+
+@mock.patch.dict(os.environ, {'PASSWORD': 'test-password'})
+class ReportAdmissionTests(SimpleTestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(tasks.pdf_task_manager, 'tasks', MemoryTaskStore()),
+            mock.patch.object(tasks, 'warm_compression_pool'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION='Bearer test-password')
+
+    def generate(self, executor):
+        with mock.patch.object(tasks, 'get_report_executor', return_value=executor):
+            return self.client.get('/api/generate-pdf/', {'ticker': 'TEST.JK', 'email': 'reader@example.com'})
+
+    def test_saturated_executor_answers_429(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        executor = BoundedExecutor(1, 0, name='test')
+        executor.submit(release.wait)
+        response = self.generate(executor)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], str(executor._retry_after()))
+        self.assertEqual(tasks.pdf_task_manager.tasks.stats()['entries'], 0)
+
+    def test_stopped_executor_answers_503(self):
+        executor = BoundedExecutor(1, 0, name='test')
+        executor._pool.shutdown()
+        response = self.generate(executor)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    def test_follower_of_a_rejected_leader_is_rejected_too(self):
+        store = tasks.pdf_task_manager.tasks
+        key = report_key('TEST.JK', '')
+        _, leader = tasks.report_flights.join(key)
+        self.assertTrue(leader)
+        outcome = {}
+
+        def follow():
+            try:
+                tasks.pdf_task_manager.generate_pdf_with_timeout('follower', 'Title', 'reader@example.com', 'TEST.JK', '', timeout_seconds=5)
+            except Exception as e:
+                outcome['error'] = e
+
+        follower = threading.Thread(target=follow)
+        follower.start()
+        deadline = time.time() + 5
+        while not (store.get('follower') or {}).get('coalesced') and time.time() < deadline:
+            time.sleep(0.01)
+        rejection = ExecutorSaturated(7, 8)
+        tasks.report_flights.abandon(key, rejection)
+        follower.join(5)
+
+        self.assertIs(outcome.get('error'), rejection)
+        self.assertIsNone(store.get('follower'))
@@ -0,0 +1,90 @@
+from .glyph_metrics import measure, string_width, break_lines
+
+def shrink_to_fit(text, font_name, max_width, initial_font_size, min_font_size):
+    """
+    Count the font size down one point at a time until text fits within max_width,
+    stopping at min_font_size. The text is measured once and scaled per size.
+    Returns (font_size, text_width).
+    """
+    unit_width = string_width(text, font_name, 1)
+    font_size = initial_font_size
+    while unit_width * font_size > max_width and font_size > min_font_size:
+        font_size -= 1
+    return font_size, unit_width * font_size
+
+class TextLayout:
+    """
+    Word widths for one piece of text, measured once and reused for every font size tried.
+    """
+    def __init__(self, text, font_name):
+        self.font_name = font_name
+        self.words = text.split()
+        # Unit-size widths for every word in one vectorized call
+        self.widths = measure(self.words, font_name)
+        self.space_width = float(measure([' '], font_name)[0])
+
+    def lines_at(self, font_size, max_width):
+        """Line ranges for the text at font_size within max_width."""
+        # Dividing the limit instead of multiplying every width keeps this a single pass
+        return break_lines(self.widths, self.space_width, max_width / font_size)
+
+    def fit(self, max_width, max_height, initial_font_size, min_font_size, line_spacing):
+        """
+        Find the largest integer font size between min_font_size and initial_font_size whose
+        wrapped text fits within max_height. Line count only grows as the font grows, so the
+        size is found by binary search. Falls back to min_font_size when nothing fits.
+        Returns (font_size, lines).
+        """
+        def fits(font_size):
+            lines = self.lines_at(font_size, max_width)
+            return (font_size + line_spacing) * len(lines) <= max_height, lines
+
+        low, high = int(min_font_size), int(initial_font_size)
+        best_size, best_lines = low, None
+        while low <= high:
+            mid = (low + high) // 2
+            ok, lines = fits(mid)
+            if ok:
+                best_size, best_lines = mid, lines
+                low = mid + 1
+            else:
+                high = mid - 1
+        if best_lines is None:
+            best_lines = self.lines_at(best_size, max_width)
+        return best_size, best_lines
+
+    def line_text(self, line):
+        start, end = line
+        return ' '.join(self.words[start:end])
+
+    def line_width(self, line, font_size):
+        start, end = line
+        return (float(self.widths[start:end].sum()) + self.space_width * (end - start - 1)) * font_size
+
+def draw_justified_lines(c, layout, lines, x, y, max_width, font_size, line_spacing, url=None):
+    """
+    Draw wrapped lines with full justification (the last line and single-word lines are
+    left aligned). When url is given every line is also made a clickable link.
+    """
+    c.setFont(layout.font_name, font_size)
+    line_height = font_size + line_spacing
+    for i, line in enumerate(lines):
+        start, end = line
+
+        if i == len(lines) - 1 or end - start == 1:
+            c.drawString(x, y, layout.line_text(line))
+            link_width = layout.line_width(line, font_size)
+        else:
+            total_word_width = float(layout.widths[start:end].sum()) * font_size
+            extra_space = (max_width - total_word_width) / (end - start - 1)
+
+            word_x = x
+            for word, width in zip(layout.words[start:end], layout.widths[start:end].tolist()):
+                c.drawString(word_x, y, word)
+                word_x += width * font_size + extra_space
+            link_width = max_width
+
+        if url:
+            c.linkURL(url, (x, y, x + link_width, y + font_size))
+
+        y -= line_height
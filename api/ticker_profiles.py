@@ -0,0 +1,116 @@
+import os
+import logging
+import threading
+from cachetools import TTLCache
+from supabase import create_client, ClientOptions
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TABLE = "idx_active_company_profile"
+
+# Only the columns generate_ticker_page renders
+TICKER_PROFILE_COLUMNS = (
+    'symbol',
+    'company_name',
+    'website',
+    'phone',
+    'address',
+    'industry',
+    'listing_date',
+    'shareholders',
+    'directors',
+    'comissioners',
+)
+
+PROFILE_CACHE_SIZE = int(os.environ.get('TICKER_PROFILE_CACHE_SIZE', 512))
+PROFILE_CACHE_TTL = int(os.environ.get('TICKER_PROFILE_CACHE_TTL', 6 * 3600))  # seconds
+SUPABASE_TIMEOUT = int(os.environ.get('SUPABASE_TIMEOUT', 10))  # seconds
+
+_client = None
+_client_lock = threading.Lock()
+
+# TTLCache evicts least recently used entries once full and expires them after the TTL
+_profile_cache = TTLCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+def get_supabase_client():
+    """
+    Process-wide Supabase client. Its PostgREST session keeps HTTP connections
+    alive, so every request reuses the same connection pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client(
+                    os.environ.get("SUPABASE_URL"),
+                    os.environ.get("SUPABASE_KEY"),
+                    options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT),
+                )
+    return _client
+
+def fetch_ticker_profile(ticker):
+    """Fetch one profile row from Supabase, projecting only the rendered columns."""
+    response = (
+        get_supabase_client()
+        .table(PROFILE_TABLE)
+        .select(','.join(TICKER_PROFILE_COLUMNS))
+        .eq('symbol', ticker)
+        .limit(1)
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+def _load_ticker_profile(ticker):
+    """
+    Local snapshot first, Supabase when the snapshot misses or its row is older than
+    PROFILE_SNAPSHOT_MAX_AGE_SECONDS. If Supabase is down, an outdated row still beats
+    no profile at all.
+    """
+    from .profile_snapshot import ensure_snapshot_refresher, get_snapshot_profile, store_snapshot_profile
+
+    try:
+        ensure_snapshot_refresher()
+        profile = get_snapshot_profile(ticker)
+        if profile is not None:
+            return profile
+    except Exception as e:
+        logger.warning(f"Company profile snapshot unavailable, querying Supabase: {e}")
+
+    try:
+        profile = fetch_ticker_profile(ticker)
+    except Exception as e:
+        try:
+            stale = get_snapshot_profile(ticker, max_age=0)
+        except Exception:
+            stale = None
+        if stale is None:
+            raise
+        logger.warning(f"Supabase lookup for {ticker} failed, serving the outdated snapshot row: {e}")
+        return stale
+    if profile is not None:
+        try:
+            store_snapshot_profile(profile)
+        except Exception as e:
+            logger.warning(f"Could not store {ticker} in the company profile snapshot: {e}")
+    return profile
+
+def get_ticker_profile(ticker):
+    """
+    Profile row for a ticker, served from the in-process TTL cache when possible,
+    then the local snapshot, then Supabase. Returns None if the ticker does not exist.
+    """
+    with _cache_lock:
+        profile = _profile_cache.get(ticker)
+    if profile is not None:
+        return profile
+
+    profile = _load_ticker_profile(ticker)
+    if profile is not None:
+        with _cache_lock:
+            _profile_cache[ticker] = profile
+    return profile
+
+def clear_profile_cache():
+    with _cache_lock:
+        _profile_cache.clear()
@@ -1,9 +1,21 @@
 from rest_framework.views import APIView
-from django.http import HttpResponse, JsonResponse
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse, FileResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from .pdf_generator import generate_pdf  # Adjust import path accordingly
-from .tasks import pdf_task_manager
+from .tasks import pdf_task_manager, FINAL_STATUSES
+from .task_executor import ExecutorSaturated, ExecutorUnavailable
+from .compression import COMPRESSION_MODES, COMPRESSION_PROFILES
+from .webhooks import check_callback_url
 import jwt
+import re
+import json
+import time
 import datetime
+import threading
 import uuid
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -16,6 +28,65 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Longest a task-status request may hold on to wait for a change (?wait=)
+MAX_STATUS_WAIT_SECONDS = 30
+# An event stream closes after this long, inside gunicorn's request timeout; clients reconnect
+EVENT_STREAM_SECONDS = 50
+# Comment lines sent on an idle event stream so proxies keep it open
+EVENT_KEEPALIVE_SECONDS = 15
+# Reconnect delay suggested to EventSource-style clients, in milliseconds
+EVENT_RETRY_MS = 1000
+# Long-poll and event-stream requests each hold a worker thread for their whole wait, so
+# only PDF_MAX_STATUS_STREAMS of them run at once per process; the rest get 503
+MAX_STATUS_STREAMS = max(1, getattr(settings, 'PDF_MAX_STATUS_STREAMS', 4))
+STATUS_STREAM_RETRY_SECONDS = 5
+_status_streams = threading.BoundedSemaphore(MAX_STATUS_STREAMS)
+
+def _streams_busy():
+    response = Response({'detail': 'Too many status streams open, retry later or poll task-status'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(STATUS_STREAM_RETRY_SECONDS)
+    return response
+
+class _HeldStream:
+    """Event stream iterator that holds a status-stream slot until the response is closed."""
+    def __init__(self, events):
+        self.events = events
+        self.released = False
+    
+    def __iter__(self):
+        return self.events
+    
+    def close(self):
+        # Django closes the response even when the stream was never iterated
+        if not self.released:
+            self.released = True
+            self.events.close()
+            _status_streams.release()
+
+# Single byte range of a Range header: "bytes=<start>-<end>", "bytes=<start>-" or "bytes=-<suffix>"
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def _parse_since(value):
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+def _task_status_payload(task_id, task_status):
+    return {
+        'task_id': task_id,
+        'status': task_status['status'],
+        'stage': task_status.get('stage'),
+        'updated_at': task_status.get('updated_at'),
+        'start_time': task_status.get('start_time'),
+        'error': task_status.get('error'),
+        'recipient_email': task_status.get('recipient_email'),
+        'queue_wait': task_status.get('queue_wait'),
+        'webhook': task_status.get('webhook'),
+        'artifact_url': task_status.get('artifact_url'),
+        'queue': pdf_task_manager.get_queue_stats()
+    }
+
 class SupertypeTokenView(APIView):
     def post(self, request):
         email = request.data.get('email')
@@ -52,6 +123,33 @@ class PDFReportAPIView(APIView):
         ticker = request.GET.get('ticker', '')
         company = request.GET.get('company', '')
         timeout_seconds = int(request.GET.get('timeout', 10))  # Default 30 seconds
+        compression = request.GET.get('compression') or None  # 'raster' or 'vector'; default per channel
+        
+        compression_profile = request.GET.get('profile') or None  # 'fast', 'balanced' or 'smallest'
+        max_bytes = request.GET.get('max_bytes') or None  # byte budget for the compressed PDF
+        callback_url = request.GET.get('callback_url') or None  # receives a signed webhook when the task finishes
+        
+        if compression and compression not in COMPRESSION_MODES:
+            return Response({'detail': f"compression must be one of: {', '.join(COMPRESSION_MODES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if compression_profile and compression_profile not in COMPRESSION_PROFILES:
+            return Response({'detail': f"profile must be one of: {', '.join(COMPRESSION_PROFILES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if max_bytes is not None:
+            if not max_bytes.isdigit() or int(max_bytes) <= 0:
+                return Response({'detail': 'max_bytes must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+            max_bytes = int(max_bytes)
+        if callback_url:
+            try:
+                URLValidator(schemes=['http', 'https'])(callback_url)
+            except ValidationError:
+                return Response({'detail': 'callback_url must be an http(s) URL'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                check_callback_url(callback_url)
+            except ValueError as e:
+                return Response({'detail': f'callback_url is not allowed: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+            except OSError:
+                return Response({'detail': 'callback_url host does not resolve'}, status=status.HTTP_400_BAD_REQUEST)
+            if not getattr(settings, 'PDF_WEBHOOK_SECRET', ''):
+                return Response({'detail': 'Webhooks are not configured on this server'}, status=status.HTTP_400_BAD_REQUEST)
         
         if company:
             company = company.strip()
@@ -69,7 +167,12 @@ class PDFReportAPIView(APIView):
                 ticker=ticker,
                 company=company,
                 timeout_seconds=timeout_seconds,
-                recipient_email=email_text
+                recipient_email=email_text,
+                compression=compression,
+                compression_profile=compression_profile,
+                max_bytes=max_bytes,
+                callback_url=callback_url,
+                download_url=request.build_absolute_uri(reverse('pdf-download', args=[task_id]))
             )
             
             if status_result == 'completed':
@@ -105,6 +208,18 @@ class PDFReportAPIView(APIView):
                     'error': pdf_task_manager.get_task_status(task_id).get('error', 'Unknown error')
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
                 
+        except ExecutorSaturated as e:
+            logger.warning(f"Rejected report for {email_text}: {e}")
+            response = Response({
+                'detail': 'Too many reports in progress, retry later',
+                'queue': pdf_task_manager.get_queue_stats()
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        except ExecutorUnavailable as e:
+            response = Response({'detail': 'Report service is restarting, retry later'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = str(e.retry_after)
+            return response
         except Exception as e:
             logger.error(f"PDF generation error: {str(e)}")
             return Response({
@@ -114,7 +229,12 @@ class PDFReportAPIView(APIView):
 
 
 class PDFTaskStatusView(APIView):
-    """Endpoint to check PDF generation task status"""
+    """
+    Endpoint to check PDF generation task status. With ?wait=<seconds> (up to 30) it
+    long-polls: the response is held until the task changes after ?since=<updated_at>
+    or finishes, so a client can pass back each updated_at and see every stage at once.
+    Long-polls share the per-worker status stream cap with task-events (503 when full).
+    """
     
     def get(self, request, task_id):
         auth_header = request.headers.get('Authorization', '')
@@ -123,22 +243,194 @@ class PDFTaskStatusView(APIView):
         if token != os.environ.get('PASSWORD'):
             return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        task_status = pdf_task_manager.get_task_status(task_id)
+        try:
+            wait = min(max(float(request.GET.get('wait', 0)), 0), MAX_STATUS_WAIT_SECONDS)
+        except ValueError:
+            return Response({'detail': 'wait must be a number of seconds'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if wait:
+            if not _status_streams.acquire(blocking=False):
+                return _streams_busy()
+            try:
+                task_status = pdf_task_manager.wait_for_task_change(task_id, _parse_since(request.GET.get('since')), wait)
+            finally:
+                _status_streams.release()
+        else:
+            task_status = pdf_task_manager.get_task_status(task_id)
         
         if task_status['status'] == 'not_found':
             return Response({'detail': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        return Response({
-            'task_id': task_id,
-            'status': task_status['status'],
-            'start_time': task_status.get('start_time'),
-            'error': task_status.get('error'),
-            'recipient_email': task_status.get('recipient_email')
-        })
+        return Response(_task_status_payload(task_id, task_status))
+
+
+class PDFTaskEventsView(APIView):
+    """
+    Server-Sent Events stream of a task's status. Sends a `status` event (same body as
+    task-status) right away and on every change, and ends once the task finishes or
+    after 50 seconds; Last-Event-ID or ?since= resumes after a given updated_at. At most
+    PDF_MAX_STATUS_STREAMS streams run per worker; beyond that it answers 503.
+    """
+    
+    def get(self, request, task_id):
+        auth_header = request.headers.get('Authorization', '')
+        token = auth_header.replace('Bearer ', '')
+        
+        if token != os.environ.get('PASSWORD'):
+            return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        if pdf_task_manager.get_task_status(task_id)['status'] == 'not_found':
+            return Response({'detail': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        since = _parse_since(request.headers.get('Last-Event-ID') or request.GET.get('since'))
+        if not _status_streams.acquire(blocking=False):
+            return _streams_busy()
+        response = StreamingHttpResponse(_HeldStream(self._events(task_id, since)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def _events(self, task_id, since):
+        yield f"retry: {EVENT_RETRY_MS}\n\n"
+        deadline = time.time() + EVENT_STREAM_SECONDS
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            task_status = pdf_task_manager.wait_for_task_change(task_id, since, min(remaining, EVENT_KEEPALIVE_SECONDS))
+            if task_status['status'] == 'not_found':
+                yield f"event: not_found\ndata: {json.dumps({'task_id': task_id})}\n\n"
+                return
+            updated_at = task_status.get('updated_at')
+            finished = task_status['status'] in FINAL_STATUSES
+            if since is None or (updated_at or 0) > since or finished:
+                since = updated_at or time.time()
+                payload = json.dumps(_task_status_payload(task_id, task_status), default=str)
+                yield f"id: {since!r}\nevent: status\ndata: {payload}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if finished:
+                return
+
+
+class _FileRange:
+    """
+    Read-only view of `length` bytes of an open file from its current position. It keeps
+    fileno(), so a WSGI server with sendfile() support still sends the range zero-copy.
+    """
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+    
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+    
+    def fileno(self):
+        return self.file.fileno()
+    
+    def close(self):
+        self.file.close()
+
+
+class PDFDownloadView(APIView):
+    """
+    Download the stored report of a finished task. Supports ETag / Last-Modified
+    conditional requests and single HTTP byte ranges (If-Range aware). The file is
+    streamed from disk, never read into memory; stores that hand out their own URLs
+    (S3) redirect there instead.
+    """
+    
+    def get(self, request, task_id):
+        auth_header = request.headers.get('Authorization', '')
+        token = auth_header.replace('Bearer ', '')
+        
+        if token != os.environ.get('PASSWORD'):
+            return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        artifacts = pdf_task_manager.artifacts
+        meta = artifacts.get(task_id)
+        if meta is None:
+            return Response({'detail': 'No stored report for this task (unknown, unfinished or expired)'}, status=status.HTTP_404_NOT_FOUND)
+        
+        url = artifacts.url(meta)
+        if url:
+            return HttpResponseRedirect(url)
+        
+        etag = f'"{meta["sha256"]}"'
+        last_modified = int(meta['created_at'])
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        
+        try:
+            file = artifacts.open(meta)
+        except FileNotFoundError:
+            return Response({'detail': 'Stored report has expired'}, status=status.HTTP_404_NOT_FOUND)
+        
+        size = meta['size']
+        start, end = 0, size - 1
+        # An empty artifact has no satisfiable range; send it whole instead of a 416
+        byte_range = self._requested_range(request, etag, last_modified) if size else None
+        if byte_range is not None:
+            first, last = byte_range
+            if first is None:
+                start = max(0, size - last)   # suffix range: the last N bytes
+            else:
+                start, end = first, min(end, last if last is not None else end)
+            if start >= size or (first is None and last == 0):
+                file.close()
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+        
+        file.seek(start)
+        response = FileResponse(_FileRange(file, end - start + 1), content_type='application/pdf', as_attachment=True, filename=f'{task_id}.pdf')
+        if byte_range is not None:
+            response.status_code = status.HTTP_206_PARTIAL_CONTENT
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, max-age=3600'
+        return response
+    
+    @staticmethod
+    def _requested_range(request, etag, last_modified):
+        """
+        (first, last) byte positions of a single-range Range header, first None for a
+        suffix range, or None to send the whole file.
+        """
+        match = BYTE_RANGE.match(request.headers.get('Range', '').replace(' ', ''))
+        if not match or match.groups() == ('', ''):
+            return None   # absent, multi-range or malformed: a full 200 is always allowed
+        first, last = (int(value) if value else None for value in match.groups())
+        if first is not None and last is not None and last < first:
+            return None
+        if_range = request.headers.get('If-Range')
+        if if_range and if_range != etag and if_range != http_date(last_modified):
+            return None   # the client's partial copy is stale
+        return first, last
 
 
 class PDFCleanupView(APIView):
-    """Endpoint to cleanup old tasks (admin only)"""
+    """Endpoint to cleanup old tasks (admin only). Records also expire on their own."""
+    
+    def get(self, request):
+        auth_header = request.headers.get('Authorization', '')
+        token = auth_header.replace('Bearer ', '')
+        
+        if token != os.environ.get('PASSWORD'):
+            return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        return Response({
+            'task_store': pdf_task_manager.get_store_stats(),
+            'artifact_store': pdf_task_manager.get_artifact_stats()
+        })
     
     def post(self, request):
         auth_header = request.headers.get('Authorization', '')
@@ -148,6 +440,13 @@ class PDFCleanupView(APIView):
             return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
         
         hours = int(request.data.get('hours', 24))
-        pdf_task_manager.cleanup_old_tasks(hours)
+        removed = pdf_task_manager.cleanup_old_tasks(hours)
+        artifacts_removed = pdf_task_manager.cleanup_old_artifacts(hours)
         
-        return Response({'message': f'Cleaned up tasks older than {hours} hours'})
+        return Response({
+            'message': f'Cleaned up tasks older than {hours} hours',
+            'removed': removed,
+            'artifacts_removed': artifacts_removed,
+            'task_store': pdf_task_manager.get_store_stats(),
+            'artifact_store': pdf_task_manager.get_artifact_stats()
+        })
@@ -0,0 +1,214 @@
+import os
+import hmac
+import json
+import time
+import heapq
+import random
+import socket
+import ipaddress
+import hashlib
+import logging
+import threading
+import requests
+from urllib.parse import urlsplit
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Periwatch-Signature'
+EVENT_HEADER = 'X-Periwatch-Event'
+DELIVERY_HEADER = 'X-Periwatch-Delivery'   # same on every retry, for receivers to dedupe
+WEBHOOK_TIMEOUT = (5, 10)                  # connect, read seconds
+# Responses worth retrying besides 5xx; any other 4xx means the receiver refused the payload
+RETRY_STATUSES = (408, 425, 429)
+# Receivers should reject signatures older than this, so captured requests cannot be replayed
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+def sign_payload(body, secret, timestamp=None):
+    """
+    Signature header for a webhook body: "t=<unix time>,v1=<hex HMAC-SHA256>", computed
+    over "<unix time>.<body>" with the shared secret.
+    """
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+def verify_signature(body, header, secret, tolerance=SIGNATURE_TOLERANCE_SECONDS):
+    """Check a signature header made by sign_payload (what a receiver would do)."""
+    try:
+        fields = dict(part.split('=', 1) for part in header.split(','))
+        timestamp = int(fields['t'])
+    except (AttributeError, KeyError, ValueError):
+        return False
+    if tolerance and abs(time.time() - timestamp) > tolerance:
+        return False
+    expected = sign_payload(body, secret, timestamp).split('v1=', 1)[1]
+    return hmac.compare_digest(expected, fields.get('v1', ''))
+
+def webhook_allowed_hosts():
+    """Hosts listed in PDF_WEBHOOK_ALLOWED_HOSTS (lowercased); empty means any public host."""
+    return {host.strip().lower() for host in getattr(settings, 'PDF_WEBHOOK_ALLOWED_HOSTS', '').split(',') if host.strip()}
+
+def check_callback_url(url, allowed_hosts=None):
+    """
+    Raise ValueError unless url may receive webhooks. With an allowlist only the hosts on
+    it are accepted (as configured, so a local receiver can be listed); without one the
+    host must resolve to public addresses only, never loopback, link-local (cloud
+    metadata), private or otherwise reserved ones.
+    """
+    host = (urlsplit(url).hostname or '').lower()
+    if not host:
+        raise ValueError("callback URL has no host")
+    allowed_hosts = webhook_allowed_hosts() if allowed_hosts is None else allowed_hosts
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"callback host {host} is not in PDF_WEBHOOK_ALLOWED_HOSTS")
+        return
+    # A lookup failure raises socket.gaierror (an OSError): maybe transient, so not a rejection
+    addresses = {info[4][0] for info in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)}
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%', 1)[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"callback host {host} resolves to non-public address {ip}")
+
+class WebhookDispatcher:
+    """
+    Delivers signed JSON POSTs from one background thread per process. Failed deliveries
+    (network errors, 5xx, 408/425/429) are retried with exponential backoff and jitter,
+    honouring Retry-After, up to max_attempts. Pending deliveries live in memory only.
+
+    on_result, if given, is called after every attempt with a dict describing the
+    delivery: status ('pending', 'delivered' or 'failed'), attempts, response_status,
+    last_error and next_attempt_at.
+    """
+    def __init__(self, secret, max_attempts=6, backoff=2.0, max_backoff=300.0):
+        self.secret = secret
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._condition = threading.Condition()
+        self._queue = []   # (due time, sequence, delivery)
+        self._sequence = 0
+        self._thread = None
+        self._session = None
+        self._counts = {'delivered': 0, 'failed': 0, 'retried': 0}
+
+    @property
+    def session(self):
+        if self._session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = 'Periwatch-Webhooks/1.0'
+            self._session = session
+        return self._session
+
+    def send(self, url, event, payload, delivery_id, on_result=None):
+        """Queue a delivery of payload to url; returns immediately."""
+        delivery = {
+            'url': url,
+            'event': event,
+            'body': json.dumps(payload, default=str).encode(),
+            'delivery_id': delivery_id,
+            'on_result': on_result,
+            'attempts': 0,
+        }
+        self._schedule(delivery, time.time())
+
+    def _schedule(self, delivery, due):
+        with self._condition:
+            self._sequence += 1
+            heapq.heappush(self._queue, (due, self._sequence, delivery))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='webhooks', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.time():
+                    self._condition.wait(self._queue[0][0] - time.time() if self._queue else None)
+                _, _, delivery = heapq.heappop(self._queue)
+            try:
+                self._attempt(delivery)
+            except Exception as e:
+                logger.error(f"Webhook {delivery['delivery_id']} could not be processed: {e}")
+
+    def _post(self, delivery):
+        """Returns (delivered, retry, response status, error, Retry-After seconds)."""
+        headers = {
+            'Content-Type': 'application/json',
+            SIGNATURE_HEADER: sign_payload(delivery['body'], self.secret),
+            EVENT_HEADER: delivery['event'],
+            DELIVERY_HEADER: delivery['delivery_id'],
+        }
+        try:
+            # Checked again on every attempt: the name may point somewhere else by now
+            check_callback_url(delivery['url'])
+        except ValueError as e:
+            return False, False, None, str(e), None
+        except OSError as e:
+            return False, True, None, f"callback host lookup failed: {e}", None
+        try:
+            response = self.session.post(delivery['url'], data=delivery['body'], headers=headers, timeout=WEBHOOK_TIMEOUT, allow_redirects=False)
+        except requests.RequestException as e:
+            return False, True, None, str(e), None
+        if 200 <= response.status_code < 300:
+            return True, False, response.status_code, None, None
+        retry_after = response.headers.get('Retry-After', '')
+        retry_after = int(retry_after) if retry_after.isdigit() else None
+        retry = response.status_code >= 500 or response.status_code in RETRY_STATUSES
+        return False, retry, response.status_code, f"HTTP {response.status_code}", retry_after
+
+    def _attempt(self, delivery):
+        delivery['attempts'] += 1
+        delivered, retry, response_status, error, retry_after = self._post(delivery)
+        result = {
+            'status': 'delivered' if delivered else 'failed',
+            'attempts': delivery['attempts'],
+            'response_status': response_status,
+            'last_error': error,
+            'next_attempt_at': None,
+        }
+        if delivered:
+            self._counts['delivered'] += 1
+            logger.info(f"Webhook {delivery['delivery_id']} delivered to {delivery['url']} (attempt {delivery['attempts']})")
+        elif retry and delivery['attempts'] < self.max_attempts:
+            delay = min(self.max_backoff, self.backoff * 2 ** (delivery['attempts'] - 1)) * random.uniform(0.5, 1.0)
+            due = time.time() + max(delay, min(retry_after or 0, self.max_backoff))
+            result.update(status='pending', next_attempt_at=round(due, 3))
+            self._counts['retried'] += 1
+            logger.warning(f"Webhook {delivery['delivery_id']} to {delivery['url']} failed ({error}), retrying in {due - time.time():.1f}s")
+            self._schedule(delivery, due)
+        else:
+            self._counts['failed'] += 1
+            logger.error(f"Webhook {delivery['delivery_id']} to {delivery['url']} gave up after {delivery['attempts']} attempts: {error}")
+        if delivery['on_result'] is not None:
+            delivery['on_result'](result)
+
+    def stats(self):
+        with self._condition:
+            return {'pending': len(self._queue), **self._counts}
+
+_dispatcher = None
+_dispatcher_pid = None
+_dispatcher_lock = threading.Lock()
+
+def get_webhook_dispatcher():
+    """
+    Dispatcher for this process (recreated after a fork), signing with PDF_WEBHOOK_SECRET
+    and retrying PDF_WEBHOOK_MAX_ATTEMPTS times from PDF_WEBHOOK_BACKOFF_SECONDS.
+    """
+    global _dispatcher, _dispatcher_pid
+    if _dispatcher is None or _dispatcher_pid != os.getpid():
+        with _dispatcher_lock:
+            if _dispatcher is None or _dispatcher_pid != os.getpid():
+                _dispatcher = WebhookDispatcher(
+                    getattr(settings, 'PDF_WEBHOOK_SECRET', ''),
+                    max_attempts=max(1, getattr(settings, 'PDF_WEBHOOK_MAX_ATTEMPTS', 6)),
+                    backoff=getattr(settings, 'PDF_WEBHOOK_BACKOFF_SECONDS', 2.0),
+                    max_backoff=getattr(settings, 'PDF_WEBHOOK_MAX_BACKOFF_SECONDS', 300.0),
+                )
+                _dispatcher_pid = os.getpid()
+    return _dispatcher
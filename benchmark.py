@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_PATH = os.path.join(BASE_DIR, "api", "asset")
+
+def timed(func, iterations):
+    """Run func `iterations` times and return the mean wall time in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def print_results(title, rows):
+    print(f"\n{'='*50}")
+    print(title)
+    print(f"{'='*50}")
+    for label, value in rows:
+        print(f"{label:<34}{value}")
+    print(f"{'='*50}")
+
+def bench_fonts(iterations):
+    """Per-request font setup: re-registering the TTFs vs the process-wide registry."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    # api.fonts registers the family on import, so time the import itself
+    start = time.perf_counter()
+    from api.fonts import register_fonts
+    startup_ms = (time.perf_counter() - start) * 1000
+
+    def per_request_registration():
+        pdfmetrics.registerFont(TTFont('Inter', os.path.join(ASSET_PATH, "font/Inter-Regular.ttf")))
+        pdfmetrics.registerFont(TTFont('Inter-Bold', os.path.join(ASSET_PATH, "font/Inter-Bold.ttf")))
+
+    old_ms = timed(per_request_registration, iterations)
+    # The old path replaced the registered fonts; put the shared ones back
+    for font in register_fonts().values():
+        pdfmetrics.registerFont(font)
+    new_ms = timed(register_fonts, iterations)
+
+    print_results("FONT REGISTRATION", [
+        ("Iterations:", iterations),
+        ("One-time registry load:", f"{startup_ms:.2f} ms"),
+        ("Per request (registerFont x2):", f"{old_ms:.3f} ms"),
+        ("Per request (shared registry):", f"{new_ms:.5f} ms"),
+        ("Saved per request:", f"{old_ms - new_ms:.3f} ms"),
+    ])
+
+def _sample_report_pdf():
+    """A six-page report drawn like generate_pdf draws it (ReportLab), without any network calls."""
+    from io import BytesIO
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(595, 842))
+    for name in ('cover', 'ticker', 'company', 'goliath', 'vincent', 'cta'):
+        pdf.drawImage(os.path.join(ASSET_PATH, f'{name}.png'), 0, 0, 595, 842)
+        pdf.setFillColorRGB(1, 1, 1)
+        pdf.setFont('Helvetica-Bold', 24)
+        pdf.drawString(64, 722, f"Benchmark page: {name}")
+        pdf.setFont('Helvetica', 10)
+        for line in range(30):
+            pdf.drawString(64, 680 - line * 14, "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.")
+        pdf.linkURL('https://supertype.ai', (64, 100, 300, 120))
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def _rasterize_page_png(page, image_quality, zoom):
+    """The previous compression path: PNG round trip through PIL, then JPEG."""
+    import fitz
+    from io import BytesIO
+    from PIL import Image
+
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    pil_image = Image.open(BytesIO(pix.tobytes("png")))
+    if pil_image.mode in ('RGBA', 'LA', 'P'):
+        rgb_image = Image.new('RGB', pil_image.size, (255, 255, 255))
+        if pil_image.mode == 'RGBA':
+            rgb_image.paste(pil_image, mask=pil_image.split()[-1])
+        else:
+            rgb_image.paste(pil_image)
+        pil_image = rgb_image
+    img_buffer = BytesIO()
+    pil_image.save(img_buffer, format='JPEG', quality=image_quality, optimize=True, progressive=True)
+    img_buffer.seek(0)
+    return img_buffer.read()
+
+def _compression_run(variant, pdf_bytes, iterations):
+    """Compress the report `iterations` times; returns (ms per page, process peak RSS in MB, output bytes)."""
+    import fitz
+    from api.compression import rasterize_page, recompress_images, insert_image_page, DEFAULT_IMAGE_QUALITY, DEFAULT_ZOOM
+
+    rasterize = _rasterize_page_png if variant == 'png' else rasterize_page
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    sizes = []
+
+    def compress():
+        if variant == 'vector':
+            # Re-encodes in place, so work on a fresh copy each time
+            vector_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            recompress_images(vector_doc, range(len(vector_doc)))
+            sizes.append(len(vector_doc.tobytes(garbage=4, deflate=True, clean=True)))
+            vector_doc.close()
+            return
+        new_doc = fitz.open()
+        for page in doc:
+            insert_image_page(new_doc, page.rect, rasterize(page, DEFAULT_IMAGE_QUALITY, DEFAULT_ZOOM))
+        sizes.append(len(new_doc.tobytes(garbage=4, deflate=True, clean=True)))
+        new_doc.close()
+
+    page_ms = timed(compress, iterations) / len(doc)
+    # ru_maxrss is in KB on Linux
+    return page_ms, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, sizes[-1]
+
+def bench_compression(iterations):
+    """Per-page compression time and peak RSS: PNG round trip, zero-copy pixmap path and vector mode."""
+    pdf_bytes = _sample_report_pdf()
+    # Each variant runs in a fresh process so peak RSS is not polluted by the other
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for variant in ('png', 'zero-copy', 'vector'):
+        with context.Pool(1) as pool:
+            results[variant] = pool.apply(_compression_run, (variant, pdf_bytes, iterations))
+
+    (old_ms, old_rss, _), (new_ms, new_rss, raster_size), (vector_ms, vector_rss, vector_size) = (
+        results['png'], results['zero-copy'], results['vector']
+    )
+    print_results("PAGE COMPRESSION (6-page report)", [
+        ("Iterations:", iterations),
+        ("Input size:", f"{len(pdf_bytes):,} bytes"),
+        ("Per page (PNG round trip):", f"{old_ms:.1f} ms"),
+        ("Per page (zero-copy pixmap):", f"{new_ms:.1f} ms"),
+        ("Speedup:", f"{old_ms / new_ms:.2f}x"),
+        ("Peak RSS (PNG):", f"{old_rss:.1f} MB"),
+        ("Peak RSS (zero-copy):", f"{new_rss:.1f} MB"),
+        ("Per page (vector mode):", f"{vector_ms:.1f} ms"),
+        ("Peak RSS (vector mode):", f"{vector_rss:.1f} MB"),
+        ("Output (raster mode):", f"{raster_size:,} bytes"),
+        ("Output (vector mode):", f"{vector_size:,} bytes"),
+    ])
+
+BENCHMARKS = {
+    'fonts': bench_fonts,
+    'compression': bench_compression,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the PDF pipeline")
+    parser.add_argument('benchmark', nargs='?', choices=sorted(BENCHMARKS), help="Benchmark to run (default: all)")
+    parser.add_argument('-n', '--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    names = [args.benchmark] if args.benchmark else sorted(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name](args.iterations)
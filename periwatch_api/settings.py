@@ -157,6 +157,66 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Local caches (company profile snapshot, logos, company intelligence)
+PERIWATCH_CACHE_DIR = os.environ.get('PERIWATCH_CACHE_DIR', str(BASE_DIR / 'cache'))
+# Re-sync the company profile snapshot this often from inside the workers (0 disables)
+PROFILE_SNAPSHOT_REFRESH_SECONDS = int(os.environ.get('PROFILE_SNAPSHOT_REFRESH_SECONDS', 0))
+# Snapshot rows synced longer ago than this are re-read from Supabase before use (0 never expires them)
+PROFILE_SNAPSHOT_MAX_AGE_SECONDS = int(os.environ.get('PROFILE_SNAPSHOT_MAX_AGE_SECONDS', 24 * 3600))
+
+# Reports run on a fixed pool of PDF_WORKERS threads per process, with at most
+# PDF_QUEUE_SIZE more waiting; beyond that generate-pdf answers 429 with Retry-After.
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', 4))
+PDF_QUEUE_SIZE = int(os.environ.get('PDF_QUEUE_SIZE', 8))
+# Long-poll (task-status ?wait=) and task-events streams each hold one of gunicorn's
+# --threads while they wait; keep this below the thread count so reports still get served
+PDF_MAX_STATUS_STREAMS = int(os.environ.get('PDF_MAX_STATUS_STREAMS', 4))
+
+# Where task records live: 'sqlite' (a file shared by every worker on the host, so any
+# worker can answer task-status) or 'memory' (per process)
+PDF_TASK_STORE = os.environ.get('PDF_TASK_STORE', 'sqlite')
+PDF_TASK_STORE_PATH = os.environ.get('PDF_TASK_STORE_PATH')  # default: <PERIWATCH_CACHE_DIR>/tasks.sqlite3
+PDF_TASK_STORE_STRIPES = int(os.environ.get('PDF_TASK_STORE_STRIPES', 16))
+# Task records are evicted automatically, oldest first: after PDF_TASK_TTL_SECONDS, and
+# whenever the store holds more than PDF_TASK_MAX_ENTRIES records or PDF_TASK_STORE_MAX_BYTES
+PDF_TASK_TTL_SECONDS = int(os.environ.get('PDF_TASK_TTL_SECONDS', 24 * 3600))
+PDF_TASK_MAX_ENTRIES = int(os.environ.get('PDF_TASK_MAX_ENTRIES', 10000))
+PDF_TASK_STORE_MAX_BYTES = int(os.environ.get('PDF_TASK_STORE_MAX_BYTES', 16 * 1024 * 1024))
+
+# PDF compression mode per delivery channel: 'raster' flattens pages to JPEG,
+# 'vector' keeps text and links and only re-encodes embedded images.
+# A request's ?compression= parameter overrides both.
+PDF_COMPRESSION_DOWNLOAD = os.environ.get('PDF_COMPRESSION_DOWNLOAD', 'raster')
+PDF_COMPRESSION_EMAIL = os.environ.get('PDF_COMPRESSION_EMAIL', 'raster')
+# Quality profile ('fast', 'balanced', 'smallest') and byte budget (0 = none) per channel.
+# SES rejects messages over 10 MB and the attachment grows by a third in base64.
+PDF_DOWNLOAD_PROFILE = os.environ.get('PDF_DOWNLOAD_PROFILE', 'balanced')
+PDF_DOWNLOAD_MAX_BYTES = int(os.environ.get('PDF_DOWNLOAD_MAX_BYTES', 0))
+PDF_EMAIL_PROFILE = os.environ.get('PDF_EMAIL_PROFILE', 'balanced')
+PDF_EMAIL_MAX_BYTES = int(os.environ.get('PDF_EMAIL_MAX_BYTES', 7 * 1024 * 1024))
+
+# Finished reports are kept for download/<task_id>/: 'local' (files under
+# PDF_ARTIFACT_DIR, shared by every worker on the host) or 's3' (an S3-compatible
+# bucket; downloads redirect to a presigned URL). Artifacts expire after PDF_ARTIFACT_TTL_SECONDS.
+PDF_ARTIFACT_STORE = os.environ.get('PDF_ARTIFACT_STORE', 'local')
+PDF_ARTIFACT_DIR = os.environ.get('PDF_ARTIFACT_DIR')  # default: <PERIWATCH_CACHE_DIR>/artifacts
+PDF_ARTIFACT_TTL_SECONDS = int(os.environ.get('PDF_ARTIFACT_TTL_SECONDS', 24 * 3600))
+PDF_ARTIFACT_BUCKET = os.environ.get('PDF_ARTIFACT_BUCKET')
+PDF_ARTIFACT_PREFIX = os.environ.get('PDF_ARTIFACT_PREFIX', 'reports/')
+PDF_ARTIFACT_S3_ENDPOINT_URL = os.environ.get('PDF_ARTIFACT_S3_ENDPOINT_URL')  # e.g. a MinIO stand-in
+PDF_ARTIFACT_URL_EXPIRES = int(os.environ.get('PDF_ARTIFACT_URL_EXPIRES', 300))
+
+# Completion webhooks (generate-pdf ?callback_url=). Payloads are signed with
+# HMAC-SHA256 over "<timestamp>.<body>" using PDF_WEBHOOK_SECRET (required to accept
+# callback URLs) and retried with exponential backoff on network errors and 5xx.
+PDF_WEBHOOK_SECRET = os.environ.get('PDF_WEBHOOK_SECRET', '')
+PDF_WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('PDF_WEBHOOK_MAX_ATTEMPTS', 6))
+PDF_WEBHOOK_BACKOFF_SECONDS = float(os.environ.get('PDF_WEBHOOK_BACKOFF_SECONDS', 2))
+PDF_WEBHOOK_MAX_BACKOFF_SECONDS = float(os.environ.get('PDF_WEBHOOK_MAX_BACKOFF_SECONDS', 300))
+# Comma-separated hosts allowed as callback URLs. Empty accepts any host that resolves to
+# public addresses only; list e.g. 127.0.0.1 to use the local webhook_receiver.
+PDF_WEBHOOK_ALLOWED_HOSTS = os.environ.get('PDF_WEBHOOK_ALLOWED_HOSTS', '')
+
 # Email Configuration
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
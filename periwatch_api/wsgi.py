@@ -14,3 +14,19 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'periwatch_api.settings')
 
 application = get_wsgi_application()
+
+# Load shared assets once at startup instead of on the first report. With
+# gunicorn --preload this runs in the master, so workers share it copy-on-write.
+from api.fonts import register_fonts
+from api.assets import asset_registry
+from api.static_pages import get_static_bundle
+from api.compression import COMPRESSION_PROFILES
+from api.company_descriptions import get_description_store
+from api.page_templates import warm_page_templates
+register_fonts()
+asset_registry.warm()
+# One static bundle per quality profile, so no request waits for a non-default one
+for profile in COMPRESSION_PROFILES.values():
+    get_static_bundle(profile['image_quality'], profile['zoom'])
+warm_page_templates()
+get_description_store()
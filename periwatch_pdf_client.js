@@ -4,12 +4,21 @@
  */
 
 class PeriwatchPDFClient {
-    constructor(baseUrl, authToken) {
+    /**
+     * @param {string} baseUrl - Base URL API
+     * @param {string} authToken - Password / bearer token
+     * @param {Object} options - Client options
+     * @param {string} options.statusMode - Cara memantau background task:
+     *   'sse' (default, stream task-events), 'longpoll' (task-status dengan ?wait=)
+     *   atau 'poll' (task-status setiap 5 detik)
+     */
+    constructor(baseUrl, authToken, options = {}) {
         this.baseUrl = baseUrl.replace(/\/$/, ''); // Remove trailing slash
         this.authToken = authToken;
         this.headers = {
             'Authorization': `Bearer ${authToken}`
         };
+        this.statusMode = options.statusMode || 'sse';
     }
 
     /**
@@ -113,12 +122,176 @@ class PeriwatchPDFClient {
     }
 
     /**
-     * Monitor background task status
+     * Monitor background task status, using the client's statusMode
      * @param {string} taskId - Task ID to monitor
      * @param {Function} onProgress - Progress callback
      * @returns {Promise<Object>} Final task status
      */
     async monitorTask(taskId, onProgress) {
+        if (this.statusMode === 'sse') {
+            return this.streamTask(taskId, onProgress);
+        } else if (this.statusMode === 'longpoll') {
+            return this.longPollTask(taskId, onProgress);
+        }
+        return this.pollTask(taskId, onProgress);
+    }
+
+    /**
+     * Report a status update to onProgress and settle on final statuses.
+     * Returns statusData when the task is finished, null otherwise.
+     */
+    handleStatus(statusData, onProgress) {
+        const { status, stage } = statusData;
+
+        if (onProgress) {
+            const progressMessage = this.getProgressMessage(status, stage);
+            const progressPercent = this.getProgressPercent(status, stage);
+            onProgress(progressMessage, progressPercent);
+        }
+
+        if (status === 'completed_and_sent' || status === 'completed') {
+            return statusData;
+        } else if (status === 'failed') {
+            throw new Error(statusData.error || 'Task failed');
+        }
+        return null;
+    }
+
+    /**
+     * Monitor via Server-Sent Events (task-events). Dibaca dengan fetch karena
+     * EventSource tidak bisa mengirim header Authorization. Server menutup stream
+     * setiap ~50 detik; client menyambung lagi dari event terakhir (since).
+     */
+    async streamTask(taskId, onProgress) {
+        const maxDuration = 10 * 60 * 1000; // Stop monitoring after 10 minutes
+        const startedAt = Date.now();
+        let since = '';
+
+        try {
+            while (Date.now() - startedAt < maxDuration) {
+                const query = since ? `?since=${encodeURIComponent(since)}` : '';
+                const response = await fetch(`${this.baseUrl}/api/task-events/${taskId}/${query}`, {
+                    headers: { ...this.headers, 'Accept': 'text/event-stream' },
+                    mode: 'cors',
+                    credentials: 'omit'
+                });
+
+                if (response.status === 503) {
+                    // Server sudah penuh dengan stream lain; coba lagi setelah Retry-After
+                    await this.waitRetryAfter(response);
+                    continue;
+                }
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+
+                    // Events are separated by a blank line
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                        const event = this.parseEvent(buffer.slice(0, boundary));
+                        buffer = buffer.slice(boundary + 2);
+
+                        if (event.id) since = event.id;
+                        if (event.type === 'not_found') {
+                            throw new Error('Task not found');
+                        }
+                        if (event.type === 'status' && event.data) {
+                            const finalStatus = this.handleStatus(JSON.parse(event.data), onProgress);
+                            if (finalStatus) {
+                                reader.cancel();
+                                return finalStatus;
+                            }
+                        }
+                    }
+                }
+            }
+            if (onProgress) onProgress('Monitoring timeout - check your email', 90);
+
+        } catch (error) {
+            if (onProgress) onProgress(`Monitoring error: ${error.message}`, -1);
+            throw error;
+        }
+    }
+
+    /**
+     * Tunggu sesuai header Retry-After (default 5 detik) sebelum mencoba lagi
+     */
+    waitRetryAfter(response) {
+        const seconds = parseInt(response.headers.get('Retry-After'), 10) || 5;
+        return new Promise(resolve => setTimeout(resolve, seconds * 1000));
+    }
+
+    /**
+     * Parse one Server-Sent Events block into { id, type, data }
+     */
+    parseEvent(block) {
+        const event = { id: null, type: 'message', data: '' };
+        for (const line of block.split('\n')) {
+            if (!line || line.startsWith(':')) continue; // keep-alive comment
+            const separator = line.indexOf(':');
+            const field = separator === -1 ? line : line.slice(0, separator);
+            const value = separator === -1 ? '' : line.slice(separator + 1).replace(/^ /, '');
+            if (field === 'id') event.id = value;
+            else if (field === 'event') event.type = value;
+            else if (field === 'data') event.data += (event.data ? '\n' : '') + value;
+        }
+        return event;
+    }
+
+    /**
+     * Monitor via long-poll: task-status menahan request sampai status berubah
+     * (maksimal 25 detik), lalu client langsung bertanya lagi.
+     */
+    async longPollTask(taskId, onProgress) {
+        const maxChecks = 24; // Maximum 24 long polls (10 minutes)
+        let since = '';
+
+        try {
+            for (let checkCount = 0; checkCount < maxChecks; checkCount++) {
+                const params = new URLSearchParams({ wait: '25' });
+                if (since) params.append('since', since);
+
+                const response = await fetch(`${this.baseUrl}/api/task-status/${taskId}/?${params}`, {
+                    headers: this.headers,
+                    mode: 'cors',
+                    credentials: 'omit'
+                });
+
+                if (response.status === 503) {
+                    await this.waitRetryAfter(response);
+                    continue;
+                }
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+
+                const statusData = await response.json();
+                if (statusData.updated_at) since = String(statusData.updated_at);
+
+                const finalStatus = this.handleStatus(statusData, onProgress);
+                if (finalStatus) return finalStatus;
+            }
+            if (onProgress) onProgress('Monitoring timeout - check your email', 90);
+
+        } catch (error) {
+            if (onProgress) onProgress(`Monitoring error: ${error.message}`, -1);
+            throw error;
+        }
+    }
+
+    /**
+     * Monitor by polling task-status every 5 seconds
+     */
+    async pollTask(taskId, onProgress) {
         const maxChecks = 30; // Maximum 30 checks (2.5 minutes)
         let checkCount = 0;
 
@@ -135,18 +308,10 @@ class PeriwatchPDFClient {
                 }
 
                 const statusData = await response.json();
-                const { status } = statusData;
+                const finalStatus = this.handleStatus(statusData, onProgress);
 
-                if (onProgress) {
-                    const progressMessage = this.getProgressMessage(status);
-                    const progressPercent = this.getProgressPercent(status);
-                    onProgress(progressMessage, progressPercent);
-                }
-
-                if (status === 'completed_and_sent') {
-                    return statusData;
-                } else if (status === 'failed') {
-                    throw new Error(statusData.error || 'Task failed');
+                if (finalStatus) {
+                    return finalStatus;
                 } else if (checkCount < maxChecks) {
                     checkCount++;
                     setTimeout(checkStatus, 5000); // Check again in 5 seconds
@@ -164,9 +329,18 @@ class PeriwatchPDFClient {
     }
 
     /**
-     * Get progress message for different task statuses
+     * Get progress message for different task statuses (and stages, while running)
      */
-    getProgressMessage(status) {
+    getProgressMessage(status, stage) {
+        const stageMessages = {
+            'fetching': 'Fetching company data...',
+            'rendering': 'Rendering report pages...',
+            'compressing': 'Compressing PDF...',
+            'emailing': 'Sending PDF to email...'
+        };
+        if (stage in stageMessages && status !== 'failed') {
+            return stageMessages[stage];
+        }
         const messages = {
             'running': 'Generating PDF...',
             'completed': 'PDF completed',
@@ -179,9 +353,18 @@ class PeriwatchPDFClient {
     }
 
     /**
-     * Get progress percentage for different task statuses
+     * Get progress percentage for different task statuses (and stages, while running)
      */
-    getProgressPercent(status) {
+    getProgressPercent(status, stage) {
+        const stagePercentages = {
+            'fetching': 30,
+            'rendering': 60,
+            'compressing': 80,
+            'emailing': 90
+        };
+        if (stage in stagePercentages && status !== 'failed') {
+            return stagePercentages[stage];
+        }
         const percentages = {
             'running': 25,
             'completed': 100,
@@ -193,6 +376,24 @@ class PeriwatchPDFClient {
         return percentages[status] || 0;
     }
 
+    /**
+     * Ambil PDF yang sudah selesai (termasuk yang selesai di background) dari server
+     * @param {string} taskId - Task ID
+     * @returns {Promise<Blob>} PDF blob
+     */
+    async fetchReport(taskId) {
+        const response = await fetch(`${this.baseUrl}/api/download/${taskId}/`, {
+            headers: this.headers,
+            mode: 'cors',
+            credentials: 'omit'
+        });
+
+        if (!response.ok) {
+            throw new Error(`Download failed: HTTP ${response.status}`);
+        }
+        return response.blob();
+    }
+
     /**
      * Download PDF blob as file
      * @param {Blob} pdfBlob - PDF blob to download
@@ -243,6 +444,8 @@ class PeriwatchPDFClient {
 // Example usage
 /*
 const pdfClient = new PeriwatchPDFClient('http://localhost:8000', 'your_password');
+// Or pick how background tasks are monitored: 'sse' (default), 'longpoll' or 'poll'
+// const pdfClient = new PeriwatchPDFClient('http://localhost:8000', 'your_password', { statusMode: 'longpoll' });
 
 // Generate PDF with progress tracking
 pdfClient.generatePDF({